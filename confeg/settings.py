@@ -23,6 +23,7 @@ db_user = os.getenv('DB_USER', 'redesignedquizuser')
 db_password = os.getenv('DB_PASSWORD', 'QUIZ-USER-312')
 db_host = os.getenv('DB_HOST', 'localhost')
 db_port = os.getenv('DB_PORT', '5432')
+redis_url = os.getenv('REDIS_URL', '')
 
 
 
@@ -128,6 +129,82 @@ DATABASES = {
 }
 
 
+# Cache
+# Redis sozlangan bo'lsa ikkinchi darajali kesh sifatida ishlatiladi,
+# aks holda (lokal ishga tushirish, testlar) jarayon xotirasi.
+
+if redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': redis_url,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Javob kaliti keshi (main.answer_key)
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60 * 24
+ANSWER_KEY_LOCAL_SIZE = 256
+
+# Oldindan render qilingan test savollari keshi (main.quiz_payload)
+QUIZ_PAYLOAD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Avtosaqlash buferi (main.answer_buffer) - Redis bo'lmasa javoblar darhol bazaga yoziladi
+QUIZ_ANSWER_BUFFER_URL = os.getenv('QUIZ_ANSWER_BUFFER_URL', redis_url)
+QUIZ_ANSWER_BUFFER_TTL = 60 * 60 * 6
+QUIZ_ANSWER_FLUSH_INTERVAL = 3
+
+# Vaqti tugagan urinishlar supurgichi (main.expiry)
+QUIZ_EXPIRY_BATCH_SIZE = 200
+QUIZ_EXPIRY_INTERVAL = 30
+
+# Test boshlanishini cheklash (main.admission): har WINDOW soniyada RATE ta talaba
+QUIZ_ADMISSION_ENABLED = os.getenv('QUIZ_ADMISSION_ENABLED', 'True') == 'True'
+QUIZ_ADMISSION_RATE = int(os.getenv('QUIZ_ADMISSION_RATE', 30))
+QUIZ_ADMISSION_WINDOW = int(os.getenv('QUIZ_ADMISSION_WINDOW', 1))
+QUIZ_ADMISSION_TIMEOUT = 60 * 60
+
+# Baholash navbati (main.scoring_queue) - Redis bo'lmasa darhol baholanadi
+QUIZ_SCORING_QUEUE_URL = os.getenv('QUIZ_SCORING_QUEUE_URL', redis_url)
+QUIZ_SCORING_BATCH_SIZE = 200
+QUIZ_SCORING_INTERVAL = 1
+QUIZ_SCORING_RECONCILE_AFTER = 60
+
+# Admin "qayta baholash" amali so'rov ichida shu sondan ko'p urinishli testlarni
+# baholamaydi - ular uchun manage.py rescore_quiz
+RESCORE_ADMIN_MAX_ATTEMPTS = 2000
+
+# Savollar tahlili keshi (main.item_analysis)
+ITEM_ANALYSIS_CACHE_TIMEOUT = 60 * 60
+
+# Shkala normalari (main.scale_analytics) - kichik kogortalar uchun norma tuzilmaydi
+SCALE_NORM_MIN_COHORT = 20
+
+# Talaba testlar holati xaritasi keshi (main.quiz_status)
+QUIZ_STATUS_CACHE_TIMEOUT = 60 * 60
+
+# Yakunlangan urinish natija sahifasi snapshoti (main.result_page)
+RESULT_PAGE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Psixologik statistika kubi (main.stats_cube): yangi qatorlar har INTERVAL soniyada
+# olinadi, kechikib commit bo'lganlar uchun OVERLAP soniya orqaga qaraladi
+PSYCH_CUBE_REFRESH_INTERVAL = 10
+PSYCH_CUBE_OVERLAP = 5 * 60
+
+# Psixologik statistika sahifasi keshi (main.stats_cache): SOFT_TIMEOUT dan keyin
+# bitta worker qayta hisoblaydi, qolganlar eski qiymatni oladi
+PSYCH_STATS_CACHE_TIMEOUT = 60 * 60
+PSYCH_STATS_CACHE_SOFT_TIMEOUT = 60
+PSYCH_STATS_CACHE_LOCK_TIMEOUT = 30
+
+# Admin Excel eksporti: natijalar bazadan shu hajmdagi bo'laklar bilan o'qiladi
+EXCEL_EXPORT_CHUNK_SIZE = 2000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -2,19 +2,30 @@
 # ADMIN PANEL - PSIXOLOGIK VA STANDART TESTLAR
 # ============================================
 
-from django.contrib import admin
-from django.http import HttpResponse
-from django.utils.html import format_html
+import tempfile
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ValidationError
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery
+from django.forms.models import BaseInlineFormSet
+from django.http import FileResponse, HttpResponse
+from django.utils.html import format_html, format_html_join
 from .models import (
     Quiz, Question, QuestionText, Option,
     QuizAttempt, UserResponse, Result,
     PsychologicalScale, PsychologicalCategory,
-    PsychologicalResult, PsychologicalScaleResult
+    PsychologicalResult, PsychologicalScaleResult,
+    ScaleStatistics, ScaleNorm, ScaleResultFact
 )
+from .category_lookup import CategoryLookup
 
 try:
     import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, NamedStyle, PatternFill, Alignment
     from openpyxl.utils import get_column_letter
     OPENPYXL_AVAILABLE = True
 except ImportError:
@@ -23,11 +34,12 @@ except ImportError:
 
 # ==================== HELPERS ====================
 
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
 def _make_excel_response(wb, filename):
     """Excel faylni HTTP response sifatida qaytarish"""
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    response = HttpResponse(content_type=EXCEL_CONTENT_TYPE)
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
     wb.save(response)
     return response
@@ -59,6 +71,57 @@ def _auto_column_width(ws):
         ws.column_dimensions[col_letter].width = min(max_len + 4, 50)
 
 
+def _export_chunk_size():
+    return getattr(settings, 'EXCEL_EXPORT_CHUNK_SIZE', 2000)
+
+
+def _fill_style(name, color, **kwargs):
+    return NamedStyle(
+        name=name,
+        fill=PatternFill(start_color=color, end_color=color, fill_type="solid"),
+        **kwargs
+    )
+
+
+def _write_only_sheet(title, columns, fill_color="4F46E5", styles=()):
+    """
+    Oqimli (write-only) kitob: qatorlar yozilishi bilan diskka tushadi
+    columns - [(sarlavha, kenglik), ...] - kengliklar oldindan beriladi,
+    styles - qatorlar uchun umumiy NamedStyle lar (har katakka nomi bilan)
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for style in (_fill_style(
+        'header', fill_color,
+        font=Font(color="FFFFFF", bold=True),
+        alignment=Alignment(horizontal="center", vertical="center"),
+    ), *styles):
+        wb.add_named_style(style)
+    for col, (_, width) in enumerate(columns, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    ws.freeze_panes = "A2"
+    ws.append(_styled_row(ws, [header for header, _ in columns], 'header'))
+    return wb, ws
+
+
+def _styled_row(ws, values, style):
+    """Write-only varaq qatori - barcha kataklar bitta nomli stilda"""
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value)
+        cell.style = style
+        cells.append(cell)
+    return cells
+
+
+def _stream_excel_response(wb, filename):
+    """Kitob vaqtinchalik faylga saqlanib bo'laklab yuboriladi (xotirada emas)"""
+    stream = tempfile.TemporaryFile()
+    wb.save(stream)
+    stream.seek(0)
+    return FileResponse(stream, as_attachment=True, filename=filename, content_type=EXCEL_CONTENT_TYPE)
+
+
 COLOR_MAP = {
     'green': 'C6EFCE',
     'yellow': 'FFEB9C',
@@ -91,9 +154,10 @@ class PsychologicalColorFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value():
+            # Analitika jadvalidan - JOIN va DISTINCT siz
             return queryset.filter(
-                scale_results__category__color=self.value()
-            ).distinct()
+                pk__in=ScaleResultFact.objects.filter(color=self.value()).values('result_id')
+            )
         return queryset
 
 
@@ -129,6 +193,16 @@ class GroupFilter(admin.SimpleListFilter):
         return queryset
 
 
+class ScaleListFilter(admin.RelatedFieldListFilter):
+    """Shkala filtri - nomi testi bilan (bitta so'rovda)"""
+
+    def field_choices(self, field, request, model_admin):
+        return [
+            (scale.pk, str(scale))
+            for scale in PsychologicalScale.objects.select_related('quiz').order_by('quiz__title', 'order')
+        ]
+
+
 # ==================== INLINE ADMINS ====================
 
 class PsychologicalScaleInline(admin.TabularInline):
@@ -138,9 +212,31 @@ class PsychologicalScaleInline(admin.TabularInline):
     fields = ('name', 'description', 'order')
 
 
+class PsychologicalCategoryInlineFormSet(BaseInlineFormSet):
+    """Shkala kategoriyalari oraliqlari kesishmasligini tekshirish"""
+
+    def clean(self):
+        super().clean()
+        forms_data = [
+            form.cleaned_data for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get('DELETE')
+            and form.cleaned_data.get('min_score') is not None
+            and form.cleaned_data.get('max_score') is not None
+        ]
+        intervals = [(data['min_score'], data['max_score'], None) for data in forms_data]
+        overlaps = CategoryLookup.overlaps(intervals)
+        if overlaps:
+            raise ValidationError([
+                f"Oraliqlar kesishadi: {forms_data[i]['name']} ({intervals[i][0]}-{intervals[i][1]}) "
+                f"va {forms_data[j]['name']} ({intervals[j][0]}-{intervals[j][1]})"
+                for i, j in overlaps
+            ])
+
+
 class PsychologicalCategoryInline(admin.TabularInline):
     """Shkala ichida kategoriyalarni ko'rsatish"""
     model = PsychologicalCategory
+    formset = PsychologicalCategoryInlineFormSet
     extra = 1
     fields = ('name', 'min_score', 'max_score', 'color', 'order', 'description')
 
@@ -243,6 +339,8 @@ class QuizAdmin(admin.ModelAdmin):
     )
     
     inlines = [PsychologicalScaleInline, QuestionInline]
+
+    actions = ['rescore_quizzes']
     
     def save_model(self, request, obj, form, change):
         """Yaratuvchini avtomatik o'rnatish"""
@@ -258,50 +356,211 @@ class QuizAdmin(admin.ModelAdmin):
     
     quiz_icon.short_description = ''
     
+    def get_queryset(self, request):
+        """Savollar va urinishlar soni - ro'yxat uchun bitta so'rovda"""
+        return super().get_queryset(request).annotate(
+            questions_total=Subquery(
+                Question.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz')
+                .annotate(total=Count('pk')).values('total'),
+                output_field=IntegerField(),
+            ),
+            attempts_total=Subquery(
+                QuizAttempt.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz')
+                .annotate(total=Count('pk')).values('total'),
+                output_field=IntegerField(),
+            ),
+        )
+
     def questions_count(self, obj):
         """Savollar soni"""
-        count = obj.get_total_questions()
+        count = obj.questions_total or 0
         return format_html(
             '<strong style="color:#4F46E5;">{}</strong> ta',
             count
         )
     
     questions_count.short_description = 'Savollar'
+    questions_count.admin_order_field = 'questions_total'
     
     def attempts_count(self, obj):
         """Urinishlar soni"""
-        count = obj.attempts.count()
+        count = obj.attempts_total or 0
         return format_html(
             '<span style="color:#10B981;">{}</span> urinish',
             count
         )
     
     attempts_count.short_description = 'Urinishlar'
+    attempts_count.admin_order_field = 'attempts_total'
+
+    @admin.action(description='🔄 Tanlangan testlarni qayta baholash')
+    def rescore_quizzes(self, request, queryset):
+        """
+        Yakunlangan urinishlarni joriy javob kaliti bo'yicha qayta baholash
+
+        So'rov ichida faqat kichik testlar baholanadi (RESCORE_ADMIN_MAX_ATTEMPTS),
+        kattalari uchun: manage.py rescore_quiz <id> --workers N
+        """
+        from main.rescoring import rescore_quiz
+
+        limit = getattr(settings, 'RESCORE_ADMIN_MAX_ATTEMPTS', 2000)
+        for quiz in queryset:
+            attempts = QuizAttempt.objects.filter(quiz=quiz, status__in=['completed', 'expired']).count()
+            if attempts > limit:
+                self.message_user(
+                    request,
+                    f"{quiz.title}: {attempts} ta urinish - admin orqali baholash uchun juda ko'p. "
+                    f"Serverda ishga tushiring: python manage.py rescore_quiz {quiz.pk} --workers 4",
+                    level='warning'
+                )
+                continue
+            totals = rescore_quiz(quiz.pk)
+            self.message_user(
+                request,
+                f"{quiz.title}: {totals['attempts']} ta urinish, "
+                f"{totals['responses_changed']} ta javob va "
+                f"{totals['results_changed']} ta natija o'zgardi",
+                level='success'
+            )
 
 
 @admin.register(PsychologicalScale)
 class PsychologicalScaleAdmin(admin.ModelAdmin):
     """Psixologik shkala admin"""
     
-    list_display = ('name', 'quiz', 'categories_count', 'order')
+    list_display = ('name', 'quiz', 'categories_count', 'ranges_status', 'alpha_display', 'order')
     list_filter = ('quiz',)
     search_fields = ('name', 'description')
     
     inlines = [PsychologicalCategoryInline]
+
+    readonly_fields = ('reliability_display',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'quiz', 'statistics'
+        ).prefetch_related('categories')
+
+    def _statistics(self, obj):
+        try:
+            return obj.statistics
+        except ScaleStatistics.DoesNotExist:
+            return None
+
+    def alpha_display(self, obj):
+        """Cronbach alfa (0.7 dan past - ishonchsiz)"""
+        statistics = self._statistics(obj)
+        if not statistics or statistics.cronbach_alpha is None:
+            return '—'
+        color = '#10B981' if statistics.cronbach_alpha >= 0.7 else '#EF4444'
+        return format_html(
+            '<span style="color:{};">{}</span>',
+            color, f'{statistics.cronbach_alpha:.2f}'
+        )
+
+    alpha_display.short_description = 'Alfa'
+
+    def reliability_display(self, obj):
+        """Ishonchlilik va savol-umumiy ball korrelyatsiyalari"""
+        statistics = self._statistics(obj)
+        if not statistics:
+            return "Hisoblanmagan (manage.py compute_scale_norms)"
+
+        questions = dict(obj.questions.values_list('pk', 'question_text'))
+        rows = format_html_join(
+            '',
+            '<tr><td>{}</td><td>{}</td></tr>',
+            (
+                (questions.get(int(question_id), question_id)[:80], correlation if correlation is not None else '—')
+                for question_id, correlation in statistics.item_total.items()
+            )
+        )
+        return format_html(
+            '<p>Cronbach alfa: <b>{}</b>, respondentlar: <b>{}</b> ({})</p>'
+            '<table><tr><th>Savol</th><th>Savol-umumiy r</th></tr>{}</table>',
+            statistics.cronbach_alpha if statistics.cronbach_alpha is not None else '—',
+            statistics.respondents,
+            statistics.computed_at.strftime('%d.%m.%Y %H:%M'),
+            rows
+        )
+
+    reliability_display.short_description = 'Ishonchlilik'
     
     def categories_count(self, obj):
         """Kategoriyalar soni"""
-        return obj.categories.count()
+        return len(obj.categories.all())
     
     categories_count.short_description = 'Kategoriyalar'
 
+    def ranges_status(self, obj):
+        """Oraliqlardagi kesishish va bo'shliqlar"""
+        problems = obj.get_category_problems()
+        if not problems:
+            return format_html('<span style="color:#10B981;">✓</span>')
+        return format_html(
+            '<span style="color:#EF4444;" title="{}">⚠ {}</span>',
+            '; '.join(problems), len(problems)
+        )
+
+    ranges_status.short_description = 'Oraliqlar'
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # get_queryset dagi prefetch eskirgan - kategoriyalar qayta o'qiladi
+        scale = PsychologicalScale.objects.get(pk=form.instance.pk)
+        for problem in scale.get_category_problems():
+            messages.warning(request, problem)
+
+
+@admin.register(ScaleNorm)
+class ScaleNormAdmin(admin.ModelAdmin):
+    """Shkala normalari (faqat ko'rish)"""
+
+    list_display = ('scale', 'cohort_type', 'cohort_value', 'size', 'mean', 'std', 'computed_at')
+    list_filter = ('cohort_type', 'scale__quiz', ('scale', ScaleListFilter))
+    search_fields = ('cohort_value', 'scale__name')
+    list_select_related = ('scale', 'scale__quiz')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PsychologicalCategoryForm(forms.ModelForm):
+    """Kategoriya oralig'i shu shkaladagi boshqa kategoriyalar bilan kesishmasligi"""
+
+    class Meta:
+        model = PsychologicalCategory
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        scale = cleaned_data.get('scale')
+        min_score = cleaned_data.get('min_score')
+        max_score = cleaned_data.get('max_score')
+        if scale and min_score is not None and max_score is not None:
+            overlapping = scale.categories.exclude(pk=self.instance.pk).filter(
+                min_score__lte=max_score,
+                max_score__gte=min_score,
+            )
+            if overlapping.exists():
+                raise ValidationError(
+                    f"Oraliq boshqa kategoriyalar bilan kesishadi: "
+                    f"{', '.join(str(category) for category in overlapping)}"
+                )
+        return cleaned_data
+
 
 @admin.register(PsychologicalCategory)
 class PsychologicalCategoryAdmin(admin.ModelAdmin):
     """Kategoriya admin"""
     
+    form = PsychologicalCategoryForm
     list_display = ('name', 'scale', 'score_range', 'color_display', 'order')
-    list_filter = ('scale', 'color')
+    list_filter = (('scale', ScaleListFilter), 'color')
+    list_select_related = ('scale__quiz',)
     search_fields = ('name', 'description')
     
     def score_range(self, obj):
@@ -309,6 +568,11 @@ class PsychologicalCategoryAdmin(admin.ModelAdmin):
         return f"{obj.min_score} - {obj.max_score}"
     
     score_range.short_description = 'Ball oralig\'i'
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        for problem in obj.scale.get_category_problems():
+            messages.warning(request, problem)
     
     def color_display(self, obj):
         """Rang ko'rsatish"""
@@ -328,6 +592,21 @@ class PsychologicalCategoryAdmin(admin.ModelAdmin):
     color_display.short_description = 'Rang'
 
 
+class QuestionChangeList(ChangeList):
+    """Savollar tahlili sahifadagi har bir test uchun bir marta, faqat keshdan"""
+
+    def get_results(self, request):
+        from main.item_analysis import get_item_analysis
+
+        super().get_results(request)
+        analyses = {}
+        for question in self.result_list:
+            if question.quiz_id not in analyses:
+                analyses[question.quiz_id] = get_item_analysis(question.quiz, compute=False)
+            analysis = analyses[question.quiz_id]
+            question.item_analysis = analysis['questions'].get(question.pk) if analysis else None
+
+
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     """Savol admin"""
@@ -339,18 +618,22 @@ class QuestionAdmin(admin.ModelAdmin):
         'score',
         'psychological_scale',
         'options_count',
+        'difficulty_display',
+        'discrimination_display',
         'order'
     )
     
     list_filter = (
         'quiz__quiz_type',
         'quiz',
-        'psychological_scale',
+        ('psychological_scale', ScaleListFilter),
     )
     
     search_fields = ('question_text',)
     
     inlines = [OptionInline]
+
+    readonly_fields = ('item_analysis_display',)
     
     fieldsets = (
         ('Savol', {
@@ -363,7 +646,32 @@ class QuestionAdmin(admin.ModelAdmin):
                 'Psixologik testda "psychological_scale" tanlash majburiy.'
             )
         }),
+        ('Savol tahlili', {
+            'fields': ('item_analysis_display',),
+            'classes': ('collapse',)
+        }),
     )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'quiz', 'psychological_scale__quiz'
+        ).annotate(options_total=Count('options'))
+
+    def get_changelist(self, request, **kwargs):
+        return QuestionChangeList
+
+    def _item_analysis(self, obj):
+        """Savol tahlili (test versiyasi bo'yicha keshlangan, ro'yxatda - QuestionChangeList)"""
+        from main.item_analysis import get_item_analysis
+
+        if hasattr(obj, 'item_analysis'):
+            return obj.item_analysis
+        if obj.pk is None:
+            return None
+        analysis = get_item_analysis(obj.quiz)
+        if analysis is None:
+            return None
+        return analysis['questions'].get(obj.pk)
     
     def question_preview(self, obj):
         """Savol previewi"""
@@ -384,9 +692,63 @@ class QuestionAdmin(admin.ModelAdmin):
     
     def options_count(self, obj):
         """Javoblar soni"""
-        return obj.options.count()
+        return obj.options_total
     
     options_count.short_description = 'Javoblar'
+    options_count.admin_order_field = 'options_total'
+
+    def difficulty_display(self, obj):
+        """Qiyinlik (to'g'ri javoblar ulushi)"""
+        item = self._item_analysis(obj)
+        if not item or item['p_value'] is None:
+            return '—'
+        p_value = item['p_value']
+        # Juda oson yoki juda qiyin savollar ajratib ko'rsatiladi
+        color = '#EF4444' if p_value < 0.2 or p_value > 0.9 else '#10B981'
+        return format_html('<span style="color:{};">{}</span>', color, f'{p_value:.2f}')
+
+    difficulty_display.short_description = 'Qiyinlik (p)'
+
+    def discrimination_display(self, obj):
+        """Farqlash (point-biserial)"""
+        item = self._item_analysis(obj)
+        if not item or item['discrimination'] is None:
+            return '—'
+        discrimination = item['discrimination']
+        color = '#EF4444' if discrimination < 0.2 else '#10B981'
+        return format_html('<span style="color:{};">{}</span>', color, f'{discrimination:.2f}')
+
+    discrimination_display.short_description = 'Farqlash (r)'
+
+    def item_analysis_display(self, obj):
+        """Variantlar bo'yicha taqsimot"""
+        item = self._item_analysis(obj)
+        if not item:
+            return "Tahlil faqat standart testlar uchun (NumPy o'rnatilgan bo'lishi kerak)"
+
+        options = {option.pk: option for option in obj.options.all()}
+        rows = format_html_join(
+            '',
+            '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+            (
+                (
+                    options[oid].option_text[:60] if oid in options else oid,
+                    '✓' if stats['is_correct'] else '',
+                    stats['count'],
+                    f"{stats['share'] * 100:.1f}%" if stats['share'] is not None else '—',
+                )
+                for oid, stats in item['options'].items()
+            )
+        )
+        return format_html(
+            '<p>Qiyinlik: <b>{}</b>, farqlash: <b>{}</b></p>'
+            '<table><tr><th>Variant</th><th>To\'g\'ri</th><th>Tanlangan</th><th>Ulush</th></tr>{}</table>',
+            item['p_value'] if item['p_value'] is not None else '—',
+            item['discrimination'] if item['discrimination'] is not None else '—',
+            rows
+        )
+
+    item_analysis_display.short_description = 'Tahlil'
 
 
 @admin.register(Option)
@@ -463,6 +825,8 @@ class QuizAttemptAdmin(admin.ModelAdmin):
         'time_display',
         'view_result'
     )
+
+    list_select_related = ('student', 'quiz', 'result', 'psychological_result')
     
     list_filter = (
         'status',
@@ -479,6 +843,7 @@ class QuizAttemptAdmin(admin.ModelAdmin):
     
     readonly_fields = (
         'started_at',
+        'deadline_at',
         'completed_at',
         'time_taken'
     )
@@ -564,6 +929,8 @@ class ResultAdmin(admin.ModelAdmin):
     )
 
     actions = ['export_results_excel']
+
+    list_select_related = ('attempt__student__group', 'attempt__quiz')
     
     def student_name(self, obj):
         """Talaba ismi"""
@@ -594,9 +961,9 @@ class ResultAdmin(admin.ModelAdmin):
         """Foiz ko'rsatish"""
         color = '#10B981' if obj.passed else '#EF4444'
         return format_html(
-            '<strong style="color:{}; font-size:16px;">{:.1f}%</strong>',
+            '<strong style="color:{}; font-size:16px;">{}%</strong>',
             color,
-            obj.percentage
+            f'{obj.percentage:.1f}'
         )
     
     percentage_display.short_description = 'Natija'
@@ -633,28 +1000,26 @@ class ResultAdmin(admin.ModelAdmin):
             self.message_user(request, "openpyxl o'rnatilmagan! pip install openpyxl", level='error')
             return
 
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Natijalar"
-
-        headers = [
-            '№', 'Talaba ismi', 'Fakultet', 'Guruh', 'Test nomi',
-            'Jami savollar', "To'g'ri", "Noto'g'ri", 'Javobsiz',
-            'Ball', 'Max ball', 'Foiz (%)', 'Baho', 'Holat', 'Sana'
-        ]
-
-        ws.append(headers)
-        _style_header_row(ws, 1, len(headers), fill_color="4F46E5")
-
-        pass_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-        fail_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-
-        for idx, result in enumerate(queryset.select_related(
-            'attempt__student__group', 'attempt__quiz'
-        ), start=1):
+        wb, ws = _write_only_sheet("Natijalar", [
+            ('№', 8), ('Talaba ismi', 32), ('Fakultet', 32), ('Guruh', 16), ('Test nomi', 36),
+            ('Jami savollar', 16), ("To'g'ri", 10), ("Noto'g'ri", 12), ('Javobsiz', 12),
+            ('Ball', 10), ('Max ball', 12), ('Foiz (%)', 12), ('Baho', 8), ('Holat', 12), ('Sana', 20),
+        ], fill_color="4F46E5", styles=(
+            _fill_style('passed', "C6EFCE"),
+            _fill_style('failed', "FFC7CE"),
+        ))
+
+        results = queryset.select_related('attempt__student__group', 'attempt__quiz').only(
+            'total_questions', 'correct_answers', 'wrong_answers', 'unanswered',
+            'total_score', 'max_score', 'percentage', 'passed', 'created_at',
+            'attempt__student__student_name', 'attempt__student__faculty',
+            'attempt__student__group__group_name', 'attempt__quiz__title',
+        )
+        # Server tomoni kursori - natijalar bo'laklab o'qiladi
+        for idx, result in enumerate(results.iterator(chunk_size=_export_chunk_size()), start=1):
             student = result.attempt.student
             group = student.group
-            row = [
+            ws.append(_styled_row(ws, [
                 idx,
                 student.student_name or '-',
                 student.faculty or '-',
@@ -670,19 +1035,9 @@ class ResultAdmin(admin.ModelAdmin):
                 result.get_grade(),
                 "O'tdi" if result.passed else "O'tmadi",
                 result.created_at.strftime('%Y-%m-%d %H:%M') if result.created_at else '-',
-            ]
-            ws.append(row)
+            ], 'passed' if result.passed else 'failed'))
 
-            # Rangni belgilash
-            row_num = ws.max_row
-            fill = pass_fill if result.passed else fail_fill
-            for col in range(1, len(headers) + 1):
-                ws.cell(row=row_num, column=col).fill = fill
-
-        _auto_column_width(ws)
-        ws.freeze_panes = "A2"
-
-        return _make_excel_response(wb, "natijalar.xlsx")
+        return _stream_excel_response(wb, "natijalar.xlsx")
 
 
 # ==================== PSYCHOLOGICAL RESULT ADMIN ====================
@@ -725,6 +1080,13 @@ class PsychologicalResultAdmin(admin.ModelAdmin):
 
     actions = ['export_psychological_excel', 'export_single_psychological_excel']
 
+    list_select_related = ('attempt__student__group', 'attempt__quiz')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            'scale_results__scale', 'scale_results__category'
+        )
+
     def changelist_view(self, request, extra_context=None):
         """Changelist sahifasiga Statistika tugmasini qo'shish"""
         extra_context = extra_context or {}
@@ -768,7 +1130,7 @@ class PsychologicalResultAdmin(admin.ModelAdmin):
 
     def scales_summary(self, obj):
         """Shkalalar qisqacha (ranglar bilan)"""
-        results = obj.scale_results.select_related('scale', 'category')
+        results = obj.scale_results.all()
         if not results:
             return '-'
 
@@ -804,85 +1166,72 @@ class PsychologicalResultAdmin(admin.ModelAdmin):
             self.message_user(request, "openpyxl o'rnatilmagan! pip install openpyxl", level='error')
             return
 
-        # Barcha shkalalarni olish
-        all_scales = []
-        for result in queryset.prefetch_related('scale_results__scale'):
-            for sr in result.scale_results.all():
-                scale_name = sr.scale.name
-                if scale_name not in all_scales:
-                    all_scales.append(scale_name)
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Psixologik natijalar"
-
-        # Headerlar
-        base_headers = ['№', 'Talaba ismi', 'Fakultet', 'Guruh', 'Test nomi',
-                        'Jami savollar', 'Javob berilgan', 'Javobsiz', 'Sana']
-        scale_headers = []
-        for s in all_scales:
-            scale_headers.append(f"{s} (ball)")
-            scale_headers.append(f"{s} (kategoriya)")
-            scale_headers.append(f"{s} (rang)")
-
-        headers = base_headers + scale_headers
-        ws.append(headers)
-        _style_header_row(ws, 1, len(headers), fill_color="7C3AED")
-
-        for idx, result in enumerate(queryset.select_related(
-            'attempt__student__group', 'attempt__quiz'
-        ).prefetch_related('scale_results__scale', 'scale_results__category'), start=1):
-            student = result.attempt.student
-            group = student.group
-
+        # Shkala ustunlari tanlangan testlar shkalalaridan (bir xil nomlilar bitta ustunda)
+        columns = {}
+        for scale_id, scale_name in PsychologicalScale.objects.filter(
+            quiz__in=queryset.values('attempt__quiz')
+        ).order_by('-quiz__created_at', 'quiz_id', 'order', 'id').values_list('id', 'name'):
+            columns.setdefault(scale_name, []).append(scale_id)
+        categories = dict(PsychologicalCategory.objects.filter(
+            scale__in=[scale_id for scale_ids in columns.values() for scale_id in scale_ids]
+        ).values_list('id', 'name'))
+
+        # Pivot - har bir shkala uchun ball/kategoriya/rang shartli agregat bilan, bitta so'rov
+        pivot = {}
+        for idx, scale_ids in enumerate(columns.values()):
+            in_scale = Q(scaleresultfact__scale_id__in=scale_ids)
+            pivot[f'score_{idx}'] = Max('scaleresultfact__score', filter=in_scale)
+            pivot[f'category_{idx}'] = Max('scaleresultfact__category_id', filter=in_scale)
+            pivot[f'color_{idx}'] = Max('scaleresultfact__color', filter=in_scale)
+
+        category_width = max(map(len, categories.values()), default=0)
+        scale_columns = []
+        for scale_name in columns:
+            scale_columns += [
+                (f"{scale_name} (ball)", None),
+                (f"{scale_name} (kategoriya)", category_width),
+                (f"{scale_name} (rang)", None),
+            ]
+        wb, ws = _write_only_sheet("Psixologik natijalar", [
+            ('№', 8), ('Talaba ismi', 32), ('Fakultet', 32), ('Guruh', 16), ('Test nomi', 36),
+            ('Jami savollar', 16), ('Javob berilgan', 16), ('Javobsiz', 12), ('Sana', 20),
+            *((header, min(max(len(header), width or 0) + 4, 50)) for header, width in scale_columns),
+        ], fill_color="7C3AED", styles=[_fill_style(color, fill) for color, fill in COLOR_MAP.items()])
+
+        rows = queryset.prefetch_related(None).values_list(
+            'pk', 'attempt__student__student_name', 'attempt__student__faculty',
+            'attempt__student__group__group_name', 'attempt__quiz__title',
+            'total_questions', 'answered_questions', 'unanswered', 'created_at',
+        ).annotate(**pivot)
+        # Server tomoni kursori - natijalar bo'laklab o'qiladi
+        for idx, (_, student_name, faculty, group_name, quiz_title, total_questions,
+                  answered_questions, unanswered, created_at, *scales) in enumerate(
+                rows.iterator(chunk_size=_export_chunk_size()), start=1):
             row = [
                 idx,
-                student.student_name or '-',
-                student.faculty or '-',
-                group.group_name if group else '-',
-                result.attempt.quiz.title,
-                result.total_questions,
-                result.answered_questions,
-                result.unanswered,
-                result.created_at.strftime('%Y-%m-%d %H:%M') if result.created_at else '-',
+                student_name or '-',
+                faculty or '-',
+                group_name or '-',
+                quiz_title,
+                total_questions,
+                answered_questions,
+                unanswered,
+                created_at.strftime('%Y-%m-%d %H:%M') if created_at else '-',
             ]
-
-            # Shkala natijalarini map
-            scale_map = {}
-            for sr in result.scale_results.all():
-                scale_map[sr.scale.name] = sr
-
-            for scale_name in all_scales:
-                sr = scale_map.get(scale_name)
-                if sr:
-                    row.append(sr.total_score)
-                    row.append(sr.category.name if sr.category else '-')
-                    row.append(COLOR_LABEL.get(sr.category.color, '-') if sr.category else '-')
-                else:
-                    row.extend(['-', '-', '-'])
-
-            ws.append(row)
-
-            # Rang ranglash - birinchi rang categoriyasiga qarab
-            row_num = ws.max_row
             first_color = None
-            for sr in result.scale_results.all():
-                if sr.category:
-                    first_color = sr.category.color
-                    break
-            if first_color and first_color in COLOR_MAP:
-                fill = PatternFill(
-                    start_color=COLOR_MAP[first_color],
-                    end_color=COLOR_MAP[first_color],
-                    fill_type="solid"
-                )
-                for col in range(1, len(headers) + 1):
-                    ws.cell(row=row_num, column=col).fill = fill
+            for score, category_id, color in zip(scales[::3], scales[1::3], scales[2::3]):
+                if score is None:
+                    row.extend(['-', '-', '-'])
+                    continue
+                row.append(score)
+                row.append(categories.get(category_id, '-'))
+                row.append(COLOR_LABEL.get(color, '-') if color else '-')
+                first_color = first_color or color
 
-        _auto_column_width(ws)
-        ws.freeze_panes = "A2"
+            # Qator rangi - birinchi rangli shkala kategoriyasiga qarab
+            ws.append(_styled_row(ws, row, first_color) if first_color in COLOR_MAP else row)
 
-        return _make_excel_response(wb, "psixologik_natijalar.xlsx")
+        return _stream_excel_response(wb, "psixologik_natijalar.xlsx")
 
     @admin.action(description='📋 Bitta talabaning batafsil psixologik natijasini yuklab olish')
     def export_single_psychological_excel(self, request, queryset):
@@ -997,6 +1346,8 @@ class UserResponseAdmin(admin.ModelAdmin):
     search_fields = ('attempt__student__student_name', 'question__question_text')
     
     readonly_fields = ('attempt', 'question', 'selected_option', 'is_correct', 'earned_score', 'answered_at')
+
+    list_select_related = ('attempt__student', 'attempt__quiz', 'question', 'selected_option')
     
     def student_name(self, obj):
         return obj.attempt.student.student_name
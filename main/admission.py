@@ -0,0 +1,139 @@
+"""
+Test boshlanishini cheklash (admission control / kutish zali)
+
+Guruh uchun test ochilganda yuzlab talaba bir vaqtda urinish yaratadi.
+Har bir test uchun token bucket ishlatiladi: har WINDOW soniyada RATE ta
+yangi talaba qabul qilinadi, qolganlar navbat raqami (ticket) oladi va
+yengil kutish sahifasidan holat endpointini so'rab turadi.
+
+Hisoblagichlar Django cache'da (Redis bo'lsa - barcha node'lar uchun umumiy,
+aks holda har bir node uchun alohida) saqlanadi.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+SESSION_KEY = 'admission_tickets'
+
+
+# position - navbatdagi o'rin, retry_after - taxminiy kutish (soniya)
+Admission = namedtuple('Admission', 'admitted position retry_after', defaults=(0, 0))
+
+
+def _setting(name, default):
+    return getattr(settings, f'QUIZ_ADMISSION_{name}', default)
+
+
+def _key(quiz_id, name):
+    return f'admission:{quiz_id}:{name}'
+
+
+def _advance_head(quiz_id, rate, window, timeout):
+    """
+    Navbat boshini o'tgan vaqtga qarab surish: oxirgi surilgandan beri
+    o'tgan har bir oyna uchun RATE ta (so'rovlar kelmagan oynalar ham sanaladi)
+
+    Har oynada faqat bitta jarayon (cache.add muvaffaqiyatli bo'lgan) suradi.
+    Bosh dumdan RATE tadan ko'p oldinga ketmaydi - bo'sh vaqtda token
+    to'planib qolmaydi.
+    """
+    window_index = int(time.time() // window)
+    if not cache.add(_key(quiz_id, f'window:{window_index}'), 1, window * 2):
+        return
+    values = cache.get_many([_key(quiz_id, name) for name in ('head', 'tail', 'advanced_at')])
+    head = values.get(_key(quiz_id, 'head'), 0)
+    tail = values.get(_key(quiz_id, 'tail'), 0)
+    elapsed = max(1, window_index - values.get(_key(quiz_id, 'advanced_at'), window_index - 1))
+    cache.set_many({
+        _key(quiz_id, 'head'): max(head, min(head + elapsed * rate, tail + rate)),
+        _key(quiz_id, 'advanced_at'): window_index,
+    }, timeout)
+
+
+def _issue_ticket(quiz_id, timeout):
+    cache.add(_key(quiz_id, 'tail'), 0, timeout)
+    try:
+        return cache.incr(_key(quiz_id, 'tail'))
+    except ValueError:
+        # Kalit shu orada o'chib ketgan
+        cache.set(_key(quiz_id, 'tail'), 1, timeout)
+        return 1
+
+
+def admit(request, quiz_id):
+    """
+    Talabani test boshlashga qo'yish yoki navbatda ushlab turish
+
+    Navbat raqami sessiyada saqlanadi, shuning uchun holat endpointi va
+    test sahifasi bir xil raqam bilan ishlaydi.
+    """
+    if not _setting('ENABLED', True):
+        return Admission(admitted=True)
+
+    rate = _setting('RATE', 30)
+    window = _setting('WINDOW', 1)
+    timeout = _setting('TIMEOUT', 60 * 60)
+
+    _advance_head(quiz_id, rate, window, timeout)
+
+    tickets = request.session.get(SESSION_KEY, {})
+    entry = tickets.get(str(quiz_id))
+    tail = cache.get(_key(quiz_id, 'tail'), 0)
+    if entry is None or entry['ticket'] > tail or time.time() - entry['issued_at'] > timeout:
+        entry = {'ticket': _issue_ticket(quiz_id, timeout), 'issued_at': time.time()}
+        tickets[str(quiz_id)] = entry
+        request.session[SESSION_KEY] = tickets
+
+    head = cache.get(_key(quiz_id, 'head'), 0)
+    if entry['ticket'] <= head:
+        return Admission(admitted=True)
+
+    position = entry['ticket'] - head
+    return Admission(
+        admitted=False,
+        position=position,
+        retry_after=max(1, int(position / rate * window)),
+    )
+
+
+def release(request, quiz_id):
+    """Urinish yaratildi - navbat raqamini o'chirish va kutish vaqtini yozish"""
+    tickets = request.session.get(SESSION_KEY, {})
+    entry = tickets.pop(str(quiz_id), None)
+    if entry is None:
+        return
+    request.session[SESSION_KEY] = tickets
+
+    timeout = _setting('TIMEOUT', 60 * 60)
+    waited_ms = int((time.time() - entry['issued_at']) * 1000)
+    for name, value in (('admitted', 1), ('wait_total_ms', waited_ms)):
+        cache.add(_key(quiz_id, name), 0, timeout)
+        try:
+            cache.incr(_key(quiz_id, name), value)
+        except ValueError:
+            pass
+    if waited_ms > cache.get(_key(quiz_id, 'wait_max_ms'), 0):
+        cache.set(_key(quiz_id, 'wait_max_ms'), waited_ms, timeout)
+
+
+def admission_stats(quiz_id):
+    """Navbat uzunligi va kutish vaqti metrikalari"""
+    values = cache.get_many([
+        _key(quiz_id, name)
+        for name in ('head', 'tail', 'admitted', 'wait_total_ms', 'wait_max_ms')
+    ])
+
+    def value(name):
+        return values.get(_key(quiz_id, name), 0)
+
+    admitted = value('admitted')
+    return {
+        'quiz_id': quiz_id,
+        'queue_depth': max(0, value('tail') - value('head')),
+        'admitted': admitted,
+        'avg_wait_ms': int(value('wait_total_ms') / admitted) if admitted else 0,
+        'max_wait_ms': value('wait_max_ms'),
+    }
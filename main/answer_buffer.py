@@ -0,0 +1,156 @@
+"""
+Javoblar uchun write-behind bufer
+
+Avtosaqlash endpointi javoblarni bazaga emas, urinish bo'yicha Redis
+hash buferiga yozadi. Fon jarayoni (`manage.py flush_answer_buffer`) bir
+necha soniyada bir marta "iflos" urinishlarni UserResponse jadvaliga bitta
+upsert bilan ko'chiradi. Test yakunlanganda yoki vaqti tugaganda bufer
+sinxron tozalanadi.
+
+Redis sozlanmagan bo'lsa javoblar buferlanmay darhol bazaga yoziladi -
+jarayon xotirasidagi bufer boshqa worker'larga ko'rinmas edi.
+"""
+import threading
+
+from django.conf import settings
+
+
+class DatabaseAnswerBuffer:
+    """Buferlashsiz - javoblar darhol bitta upsert bilan bazaga yoziladi"""
+
+    def record(self, attempt, rows):
+        from main.models import UserResponse
+        UserResponse.bulk_upsert(rows)
+
+    def peek(self, attempt_id):
+        return {}
+
+    def pop(self, attempt_id):
+        return {}
+
+    def dirty_attempts(self):
+        return []
+
+
+class RedisAnswerBuffer:
+    """Redis hash bufer - barcha app node'lari uchun umumiy"""
+
+    DIRTY_KEY = 'quiz:answers:dirty'
+
+    def __init__(self, url, ttl):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def _key(self, attempt_id):
+        return f'quiz:answers:{attempt_id}'
+
+    def record(self, attempt, rows):
+        """rows - UserResponse.build_rows bilan tekshirilgan javoblar"""
+        key = self._key(attempt.pk)
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={str(row.question_id): str(row.selected_option_id) for row in rows})
+        pipe.expire(key, self.ttl)
+        pipe.sadd(self.DIRTY_KEY, attempt.pk)
+        pipe.execute()
+
+    def peek(self, attempt_id):
+        return self._decode(self.client.hgetall(self._key(attempt_id)))
+
+    def pop(self, attempt_id):
+        # O'qish va o'chirish bitta MULTI/EXEC ichida - javob yo'qolmaydi
+        key = self._key(attempt_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(key)
+        pipe.delete(key)
+        pipe.srem(self.DIRTY_KEY, attempt_id)
+        answers, _, _ = pipe.execute()
+        return self._decode(answers)
+
+    def dirty_attempts(self):
+        return [int(attempt_id) for attempt_id in self.client.smembers(self.DIRTY_KEY)]
+
+    @staticmethod
+    def _decode(answers):
+        return {int(q): int(o) for q, o in answers.items()}
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_answer_buffer():
+    """Sozlamalarga qarab bufer obyektini qaytarish"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                url = getattr(settings, 'QUIZ_ANSWER_BUFFER_URL', '')
+                if url:
+                    _buffer = RedisAnswerBuffer(
+                        url, getattr(settings, 'QUIZ_ANSWER_BUFFER_TTL', 60 * 60 * 6)
+                    )
+                else:
+                    _buffer = DatabaseAnswerBuffer()
+    return _buffer
+
+
+def flush_attempt(attempt):
+    """Bitta urinish buferini sinxron saqlash - urinish qatori bloklanadi (flush_dirty dagidek)"""
+    from django.db import transaction
+    from main.models import QuizAttempt
+
+    with transaction.atomic():
+        list(QuizAttempt.objects.select_for_update().filter(pk=attempt.pk).values_list('pk', flat=True))
+        return flush_attempts([attempt])
+
+
+def flush_attempts(attempts):
+    """Bir nechta urinish buferini bitta upsert bilan saqlash (urinish qatorlari bloklangan bo'lishi kerak)"""
+    from main.models import UserResponse
+
+    buffer = get_answer_buffer()
+    rows = []
+    for attempt in attempts:
+        answers = buffer.pop(attempt.pk)
+        if answers:
+            attempt_rows, _ = UserResponse.build_rows(attempt, answers)
+            rows.extend(attempt_rows)
+
+    UserResponse.bulk_upsert(rows)
+    return len(rows)
+
+
+def flush_dirty():
+    """
+    Barcha "iflos" urinishlarni bitta upsert bilan saqlash
+
+    Urinish qatorlari avval bloklanadi, keyin bufer o'qiladi. Buferni o'qiydigan
+    boshqa yo'llar ham (flush_attempt, QuizAttempt.complete_attempt/expire_attempt,
+    main.expiry) avval shu qulfni oladi - buferdan olingan javoblar olingan
+    tartibda commit qilinadi va eski javob yangisining ustidan yozilmaydi.
+    Yakunlangan urinishlarning kechikkan javoblari tashlab yuboriladi.
+    Qaytaradi: (urinishlar soni, saqlangan javoblar soni)
+    """
+    from django.db import transaction
+    from main.models import QuizAttempt
+
+    buffer = get_answer_buffer()
+    attempt_ids = buffer.dirty_attempts()
+    if not attempt_ids:
+        return 0, 0
+
+    with transaction.atomic():
+        attempts = list(QuizAttempt.objects.filter(
+            pk__in=attempt_ids,
+            status='in_progress',
+        ).select_related('quiz').select_for_update(of=('self',)))
+
+        saved = flush_attempts(attempts)
+
+    # Yakunlangan yoki o'chirilgan urinishlar buferini tozalash
+    for attempt_id in set(attempt_ids) - {attempt.pk for attempt in attempts}:
+        buffer.pop(attempt_id)
+
+    return len(attempt_ids), saved
@@ -0,0 +1,169 @@
+"""
+Test javob kaliti (answer key) keshi
+
+Har bir test uchun bir marta quriladigan ixcham jadval:
+    option_id -> (question_id, is_correct, score, psychological_score, scale_id)
+    scale_id -> [(min_score, max_score, category_id), ...]
+
+Kalit test kontent versiyasi (Quiz.content_version) bilan bog'langan.
+Question, Option, PsychologicalScale yoki PsychologicalCategory o'zgarsa
+versiya oshadi (main.signals) va eski kalit avtomatik eskiradi.
+
+Ikki darajali kesh:
+    1. jarayon xotirasi (LRU)
+    2. Django cache (Redis sozlangan bo'lsa - Redis)
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from main.category_lookup import CategoryLookup
+
+
+OptionKey = namedtuple(
+    'OptionKey',
+    ['question_id', 'is_correct', 'score', 'psychological_score', 'scale_id']
+)
+
+
+class AnswerKey:
+    """Bitta test versiyasi uchun kompilyatsiya qilingan javob kaliti"""
+
+    __slots__ = ('quiz_id', 'version', 'options', 'questions', 'scales', 'category_lookups', 'max_score')
+
+    def __init__(self, quiz_id, version, questions, options, scales):
+        self.quiz_id = quiz_id
+        self.version = version
+        # question_id -> (score, scale_id)
+        self.questions = questions
+        # option_id -> OptionKey
+        self.options = options
+        # scale_id -> kategoriya oraliqlari (kategoriya tartibida)
+        self.scales = scales
+        self.category_lookups = {
+            scale_id: CategoryLookup(intervals) for scale_id, intervals in scales.items()
+        }
+        self.max_score = sum(score for score, _ in questions.values())
+
+    @property
+    def total_questions(self):
+        return len(self.questions)
+
+    def lookup(self, question_id, option_id):
+        """Variant shu savolga tegishli bo'lsa OptionKey, aks holda None"""
+        option = self.options.get(option_id)
+        if option is None or option.question_id != question_id:
+            return None
+        return option
+
+    def resolve_category(self, scale_id, score):
+        """Ball tushadigan kategoriya id si (yoki None)"""
+        lookup = self.category_lookups.get(scale_id)
+        return lookup.resolve(score) if lookup else None
+
+    def to_payload(self):
+        """Redis uchun ixcham ko'rinish"""
+        return {
+            'questions': [(qid, score, scale_id) for qid, (score, scale_id) in self.questions.items()],
+            'options': [(oid,) + tuple(opt) for oid, opt in self.options.items()],
+            'scales': list(self.scales.items()),
+        }
+
+    @classmethod
+    def from_payload(cls, quiz_id, version, payload):
+        questions = {qid: (score, scale_id) for qid, score, scale_id in payload['questions']}
+        options = {row[0]: OptionKey(*row[1:]) for row in payload['options']}
+        scales = {
+            scale_id: [tuple(interval) for interval in intervals]
+            for scale_id, intervals in payload['scales']
+        }
+        return cls(quiz_id, version, questions, options, scales)
+
+    @classmethod
+    def build(cls, quiz_id, version):
+        """Kalitni bazadan qurish (4 ta so'rov)"""
+        from main.models import Question, Option, PsychologicalScale, PsychologicalCategory
+
+        questions = {
+            qid: (score, scale_id)
+            for qid, score, scale_id in Question.objects.filter(
+                quiz_id=quiz_id
+            ).values_list('id', 'score', 'psychological_scale_id')
+        }
+        options = {}
+        for oid, qid, is_correct, psychological_score in Option.objects.filter(
+            question__quiz_id=quiz_id
+        ).values_list('id', 'question_id', 'is_correct', 'psychological_score'):
+            score, scale_id = questions[qid]
+            options[oid] = OptionKey(qid, is_correct, score, psychological_score, scale_id)
+
+        scales = {
+            scale_id: []
+            for scale_id in PsychologicalScale.objects.filter(
+                quiz_id=quiz_id
+            ).values_list('id', flat=True)
+        }
+        for scale_id, min_score, max_score, category_id in PsychologicalCategory.objects.filter(
+            scale__quiz_id=quiz_id
+        ).order_by('scale_id', 'order', 'id').values_list('scale_id', 'min_score', 'max_score', 'id'):
+            scales[scale_id].append((min_score, max_score, category_id))
+
+        return cls(quiz_id, version, questions, options, scales)
+
+
+_local_keys = OrderedDict()
+_local_lock = threading.Lock()
+
+
+# Payload formati o'zgarsa oshiriladi - eski formatdagi kesh o'qilmaydi
+PAYLOAD_FORMAT = 2
+
+
+def _cache_key(quiz_id, version):
+    return f'answer_key:{PAYLOAD_FORMAT}:{quiz_id}:{version}'
+
+
+def get_answer_key(quiz):
+    """Test uchun joriy versiyadagi javob kalitini olish"""
+    key = (quiz.pk, quiz.content_version)
+
+    with _local_lock:
+        answer_key = _local_keys.get(key)
+        if answer_key is not None:
+            _local_keys.move_to_end(key)
+            return answer_key
+
+    payload = cache.get(_cache_key(*key))
+    if payload is not None:
+        answer_key = AnswerKey.from_payload(quiz.pk, quiz.content_version, payload)
+    else:
+        answer_key = AnswerKey.build(quiz.pk, quiz.content_version)
+        cache.set(
+            _cache_key(*key),
+            answer_key.to_payload(),
+            getattr(settings, 'ANSWER_KEY_CACHE_TIMEOUT', 60 * 60 * 24),
+        )
+
+    with _local_lock:
+        _local_keys[key] = answer_key
+        _local_keys.move_to_end(key)
+        while len(_local_keys) > getattr(settings, 'ANSWER_KEY_LOCAL_SIZE', 256):
+            _local_keys.popitem(last=False)
+
+    return answer_key
+
+
+def bump_quiz_version(quiz_id):
+    """Test kontent versiyasini oshirish - eski kalitlar o'z-o'zidan eskiradi"""
+    from main.models import Quiz
+
+    if quiz_id is None:
+        return
+    Quiz.objects.filter(pk=quiz_id).update(content_version=F('content_version') + 1)
+
+    with _local_lock:
+        for key in [k for k in _local_keys if k[0] == quiz_id]:
+            del _local_keys[key]
@@ -0,0 +1,94 @@
+"""
+Ball -> kategoriya qidiruv jadvali
+
+Shkala kategoriyalari (min_score, max_score, category_id) oraliqlaridan bir
+marta kesishmaydigan segmentlarga kompilyatsiya qilinadi. Kesishgan
+oraliqlarda avvalgi tartib saqlanadi: tartib bo'yicha birinchi kategoriya
+yutadi.
+
+Ball diapazoni kichik bo'lsa - ball indeksli massiv (O(1)), aks holda
+saralangan chegaralar bo'yicha bisect. Jadval javob kaliti ichida, test
+kontent versiyasi bilan birga keshlanadi (main.answer_key).
+"""
+from bisect import bisect_right
+
+
+class CategoryLookup:
+    """Bitta shkala uchun kompilyatsiya qilingan qidiruv jadvali"""
+
+    # Massiv ishlatiladigan maksimal ball diapazoni
+    DENSE_LIMIT = 1024
+
+    __slots__ = ('low', 'table', 'starts', 'ends', 'ids')
+
+    def __init__(self, intervals):
+        segments = self.segments(intervals)
+        self.low = segments[0][0] if segments else 0
+        self.table = None
+        self.starts = [start for start, _, _ in segments]
+        self.ends = [end for _, end, _ in segments]
+        self.ids = [category_id for _, _, category_id in segments]
+
+        if segments and segments[-1][1] - self.low < self.DENSE_LIMIT:
+            self.table = [None] * (segments[-1][1] - self.low + 1)
+            for start, end, category_id in segments:
+                for score in range(start, end + 1):
+                    self.table[score - self.low] = category_id
+
+    def resolve(self, score):
+        """Ball tushadigan kategoriya id si (yoki None)"""
+        if self.table is not None:
+            index = score - self.low
+            if 0 <= index < len(self.table):
+                return self.table[index]
+            return None
+
+        index = bisect_right(self.starts, score) - 1
+        if index >= 0 and score <= self.ends[index]:
+            return self.ids[index]
+        return None
+
+    @staticmethod
+    def segments(intervals):
+        """Oraliqlarni kesishmaydigan (start, end, category_id) segmentlarga aylantirish"""
+        intervals = [interval for interval in intervals if interval[0] <= interval[1]]
+        points = sorted(
+            {min_score for min_score, _, _ in intervals}
+            | {max_score + 1 for _, max_score, _ in intervals}
+        )
+
+        segments = []
+        for start, next_start in zip(points, points[1:]):
+            category_id = next(
+                (cid for min_score, max_score, cid in intervals if min_score <= start <= max_score),
+                None
+            )
+            if category_id is None:
+                continue
+            if segments and segments[-1][2] == category_id and segments[-1][1] == start - 1:
+                segments[-1] = (segments[-1][0], next_start - 1, category_id)
+            else:
+                segments.append((start, next_start - 1, category_id))
+        return segments
+
+    @staticmethod
+    def overlaps(intervals):
+        """Kesishgan oraliqlar juftliklari: [(i, j), ...] (intervals indekslari)"""
+        return [
+            (i, j)
+            for i, (min_i, max_i, _) in enumerate(intervals)
+            for j, (min_j, max_j, _) in enumerate(intervals)
+            if i < j and min_i <= max_j and min_j <= max_i
+        ]
+
+    @staticmethod
+    def gaps(intervals):
+        """Hech bir kategoriyaga tushmaydigan ball oraliqlari: [(start, end), ...]"""
+        gaps = []
+        covered_to = None
+        valid = [interval for interval in intervals if interval[0] <= interval[1]]
+        for min_score, max_score, _ in sorted(valid, key=lambda interval: interval[:2]):
+            if covered_to is not None and min_score > covered_to + 1:
+                gaps.append((covered_to + 1, min_score - 1))
+            covered_to = max_score if covered_to is None else max(covered_to, max_score)
+        return gaps
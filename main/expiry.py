@@ -0,0 +1,95 @@
+"""
+Vaqti tugagan urinishlarni fon rejimida yakunlash
+
+Talaba sahifani qayta yuklamasa ham muddati o'tgan `in_progress`
+urinishlar guruh-guruh qilib `expired` holatiga o'tkaziladi va baholanadi.
+Qatorlar `SELECT ... FOR UPDATE SKIP LOCKED` bilan olinadi, holat shartli
+UPDATE bilan o'zgaradi - supurgichni bir nechta app node'da ishga tushirish
+va sahifadagi yakunlash bilan poyga xavfsiz (hisoblagich bir marta oshadi).
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+
+def overdue_attempts(now=None):
+    """Muddati o'tgan faol urinishlar"""
+    from main.models import QuizAttempt
+
+    now = now or timezone.now()
+    # attempt_active_deadline_idx bo'yicha indeks oralig'ini skanerlash
+    return QuizAttempt.objects.filter(
+        status='in_progress',
+        deadline_at__lt=now,
+    )
+
+
+def expire_batch(batch_size=200):
+    """
+    Bitta guruhni yakunlash va baholash
+
+    Qaytaradi: yakunlangan urinishlar soni
+    """
+    from main.models import QuizAttempt, StudentStats
+    from main.answer_buffer import flush_attempts
+    from main.scoring import score_attempts
+    from main.quiz_status import invalidate_quiz_status
+
+    now = timezone.now()
+    with transaction.atomic():
+        attempts = list(
+            overdue_attempts(now)
+            .select_related('quiz')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('deadline_at')[:batch_size]
+        )
+        if not attempts:
+            return 0
+
+        for attempt in attempts:
+            attempt.status = 'expired'
+            attempt.completed_at = now
+            attempt.time_taken = attempt.get_time_limit_seconds()
+
+        # Shartli UPDATE (QuizAttempt._finish bilan bir xil) - orada yakunlash
+        # yo'li bilan yopilgan urinish qayta yakunlanmaydi va sanalmaydi
+        attempt_ids = [attempt.pk for attempt in attempts]
+        updated = QuizAttempt.objects.filter(pk__in=attempt_ids, status='in_progress').update(
+            status='expired',
+            completed_at=now,
+            time_taken=Case(
+                *[When(pk=attempt.pk, then=Value(attempt.time_taken)) for attempt in attempts],
+                output_field=PositiveIntegerField(),
+            ),
+        )
+        if updated != len(attempts):
+            expired_ids = set(QuizAttempt.objects.filter(
+                pk__in=attempt_ids, status='expired', completed_at=now,
+            ).values_list('pk', flat=True))
+            attempts = [attempt for attempt in attempts if attempt.pk in expired_ids]
+            if not attempts:
+                return 0
+
+        # Buferdagi javoblar baholashdan oldin saqlanadi (qatorlar bloklangan)
+        flush_attempts(attempts)
+
+        expired_by_student = Counter(attempt.student_id for attempt in attempts)
+        for student_id, count in expired_by_student.items():
+            StudentStats.increment(student_id, expired_attempts=count)
+        invalidate_quiz_status(expired_by_student)
+
+        score_attempts(attempts)
+
+    return len(attempts)
+
+
+def expire_overdue(batch_size=200):
+    """Barcha muddati o'tgan urinishlarni guruhlab yakunlash"""
+    total = 0
+    while True:
+        expired = expire_batch(batch_size)
+        total += expired
+        if expired < batch_size:
+            return total
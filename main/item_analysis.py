@@ -0,0 +1,157 @@
+"""
+Standart testlar uchun savollar tahlili (item analysis)
+
+Test urinishlari va javoblari bitta oqimli (streamed) so'rov bilan urinishlar x savollar
+matritsasiga yuklanadi va NumPy bilan hisoblanadi:
+    - qiyinlik (p-value): to'g'ri javob berganlar ulushi
+    - farqlash (point-biserial): savol va qolgan savollar balli korrelyatsiyasi
+    - distraktorlar: har bir variantni tanlaganlar soni va ulushi
+    - KR-20 ishonchliligi
+Natija test kontent versiyasi bo'yicha keshlanadi.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+FINISHED_STATUSES = ['completed', 'expired']
+
+
+def _cache_key(quiz):
+    return f'item_analysis:{quiz.pk}:{quiz.content_version}'
+
+
+def _round(value, digits=4):
+    """NaN/inf -> None, aks holda yaxlitlangan float"""
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def load_response_matrix(quiz):
+    """
+    Javoblar matritsasini yuklash
+
+    Qaytaradi: (attempt_ids, question_ids, correct, option_ids, option_counts)
+        correct - (urinishlar x savollar) 0/1 matritsa
+        option_counts - option_ids tartibida har bir variant tanlanganlar soni
+    """
+    from main.models import QuizAttempt
+
+    answer_key = quiz.get_answer_key()
+    question_ids = np.array(sorted(answer_key.questions), dtype=np.int64)
+    option_ids = np.array(sorted(answer_key.options), dtype=np.int64)
+
+    # Urinishlar va javoblar bitta so'rovda (LEFT JOIN) - so'rovlar orasida
+    # yakunlangan urinish matritsani buzmaydi, javobsiz urinishlar ham qatordir
+    attempts = []
+    rows = []
+    cols = []
+    correct_flags = []
+    selected = []
+    for attempt_id, question_id, option_id, is_correct in QuizAttempt.objects.filter(
+        quiz=quiz,
+        status__in=FINISHED_STATUSES,
+    ).values_list(
+        'pk', 'responses__question_id', 'responses__selected_option_id', 'responses__is_correct'
+    ).order_by().iterator(chunk_size=10000):
+        attempts.append(attempt_id)
+        if question_id is None:
+            continue
+        rows.append(attempt_id)
+        cols.append(question_id)
+        correct_flags.append(bool(is_correct))
+        selected.append(option_id or 0)
+    attempt_ids = np.unique(np.array(attempts, dtype=np.int64))
+
+    correct = np.zeros((len(attempt_ids), len(question_ids)), dtype=np.float32)
+    option_counts = np.zeros(len(option_ids), dtype=np.int64)
+    if rows and len(question_ids):
+        row_index = np.searchsorted(attempt_ids, np.array(rows, dtype=np.int64))
+        cols = np.array(cols, dtype=np.int64)
+        col_index = np.searchsorted(question_ids, cols)
+        # Javob kalitida yo'q (o'chirilgan) savollar tashlanadi
+        known = (col_index < len(question_ids)) & (
+            question_ids[np.minimum(col_index, len(question_ids) - 1)] == cols
+        )
+        correct[row_index[known], col_index[known]] = np.array(correct_flags, dtype=np.float32)[known]
+
+        selected = np.array(selected, dtype=np.int64)
+        option_index = np.searchsorted(option_ids, selected)
+        valid = (option_index < len(option_ids)) & (
+            option_ids[np.minimum(option_index, len(option_ids) - 1)] == selected
+        )
+        option_counts = np.bincount(option_index[valid], minlength=len(option_ids))
+
+    return attempt_ids, question_ids, correct, option_ids, option_counts
+
+
+def analyze(quiz):
+    """Savollar tahlilini hisoblash (kesh ishlatilmaydi)"""
+    answer_key = quiz.get_answer_key()
+    attempt_ids, question_ids, correct, option_ids, option_counts = load_response_matrix(quiz)
+    n_attempts, n_questions = correct.shape
+
+    questions = {int(qid): {'p_value': None, 'discrimination': None, 'options': {}} for qid in question_ids}
+    kr20 = None
+
+    if n_attempts:
+        p_values = correct.mean(axis=0)
+        totals = correct.sum(axis=1)
+
+        # Point-biserial: savol va qolgan savollar yig'indisi korrelyatsiyasi
+        rest = totals[:, None] - correct
+        covariance = (correct * rest).mean(axis=0) - p_values * rest.mean(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discrimination = covariance / (np.sqrt(p_values * (1 - p_values)) * rest.std(axis=0))
+
+        # KR-20
+        total_variance = totals.var()
+        if n_questions > 1 and total_variance > 0:
+            kr20 = n_questions / (n_questions - 1) * (
+                1 - float((p_values * (1 - p_values)).sum()) / float(total_variance)
+            )
+
+        for index, qid in enumerate(question_ids):
+            questions[int(qid)]['p_value'] = _round(p_values[index])
+            questions[int(qid)]['discrimination'] = _round(discrimination[index])
+
+    for index, oid in enumerate(option_ids):
+        option = answer_key.options[int(oid)]
+        count = int(option_counts[index])
+        questions[option.question_id]['options'][int(oid)] = {
+            'count': count,
+            'share': _round(count / n_attempts) if n_attempts else None,
+            'is_correct': option.is_correct,
+        }
+
+    return {
+        'quiz_id': quiz.pk,
+        'version': quiz.content_version,
+        'attempts': n_attempts,
+        'kr20': _round(kr20),
+        'questions': questions,
+    }
+
+
+def get_item_analysis(quiz, compute=True):
+    """
+    Keshlangan savollar tahlili (faqat standart testlar, NumPy kerak)
+
+    compute=False - faqat keshdan (ro'yxat sahifalari matritsani hisoblamaydi)
+    Qaytaradi: analyze() natijasi yoki None
+    """
+    if not NUMPY_AVAILABLE or not quiz.is_standard():
+        return None
+
+    key = _cache_key(quiz)
+    analysis = cache.get(key)
+    if analysis is None and compute:
+        analysis = analyze(quiz)
+        cache.set(key, analysis, getattr(settings, 'ITEM_ANALYSIS_CACHE_TIMEOUT', 60 * 60))
+    return analysis
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from main.models import PsychologicalResult, ScaleResultFact
+
+
+class Command(BaseCommand):
+    help = "Psixologik analitika jadvalini (ScaleResultFact) mavjud natijalardan to'ldirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quiz',
+            type=int,
+            help="Faqat shu test (ID)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Bitta guruhdagi natijalar soni",
+        )
+
+    def handle(self, *args, **options):
+        result_ids = PsychologicalResult.objects.order_by('pk').values_list('pk', flat=True)
+        if options['quiz']:
+            result_ids = result_ids.filter(attempt__quiz_id=options['quiz'])
+        result_ids = list(result_ids)
+
+        batch_size = options['batch_size']
+        rows = 0
+        for i in range(0, len(result_ids), batch_size):
+            rows += ScaleResultFact.refresh(result_ids[i:i + batch_size])
+            self.stdout.write(f"[{min(i + batch_size, len(result_ids))}/{len(result_ids)}]")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result_ids)} ta natija bo'yicha {rows} ta analitika qatori yozildi"
+        ))
@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from main import psych_stats
+from main.models import PsychologicalResult, Quiz
+from main.stats_cache import metrics
+from main.stats_cube import get_cube
+from student.models import Student, StudentGroup
+
+
+class Command(BaseCommand):
+    help = "Psixologik statistika ma'lumot to'plamlari so'rovlar soni va tezligini filtrlar kesimida o'lchash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help="Har bir filtr necha marta o'lchanadi (eng tezi olinadi)",
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=5,
+            help="Har bir filtr turidan nechta qiymat",
+        )
+        parser.add_argument(
+            '--cube',
+            action='store_true',
+            help="Grafik ma'lumotlarini bazadan emas, xotiradagi kubdan o'lchash (main.stats_cube)",
+        )
+
+    def _cases(self, limit):
+        yield {}
+        for quiz_id in Quiz.objects.filter(quiz_type='psychological').values_list('pk', flat=True)[:limit]:
+            yield {'quiz': quiz_id}
+        faculties = Student.objects.exclude(faculty='').values_list('faculty', flat=True).distinct().order_by('faculty')
+        for faculty in faculties[:limit]:
+            yield {'faculty': faculty}
+        for group_id in StudentGroup.objects.values_list('pk', flat=True)[:limit]:
+            yield {'group': group_id}
+
+    def _measure(self, params, source):
+        """Barcha ma'lumot to'plamlari keshsiz (sahifa to'liq yuklanish narxi)"""
+        filters = psych_stats.StatsFilters.from_query(params)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for name in psych_stats.DATASETS:
+                psych_stats.dataset(name, filters, source=None if name == 'recent' else source)
+            elapsed = time.perf_counter() - started
+        return len(queries.captured_queries), elapsed
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Psixologik natijalar: {PsychologicalResult.objects.count()}")
+
+        source = None
+        if options['cube']:
+            started = time.perf_counter()
+            source = get_cube()
+            if source is None:
+                self.stdout.write(self.style.ERROR("NumPy o'rnatilmagan"))
+                return
+            self.stdout.write(
+                f"Kub: {len(source)} qator, yuklash {(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+
+        query_counts = set()
+        for params in self._cases(options['limit']):
+            runs = [self._measure(params, source) for _ in range(max(options['repeat'], 1))]
+            queries = runs[0][0]
+            query_counts.add(queries)
+            label = ', '.join(f'{key}={value}' for key, value in params.items()) or 'filtrsiz'
+            self.stdout.write(
+                f"  {label:<40} {queries:>4} so'rov  {min(elapsed for _, elapsed in runs) * 1000:>8.1f} ms"
+            )
+
+        if len(query_counts) == 1:
+            self.stdout.write(self.style.SUCCESS(f"So'rovlar soni o'zgarmas: {query_counts.pop()}"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"So'rovlar soni filtrga bog'liq: {sorted(query_counts)}"
+            ))
+        self.stdout.write("Sahifa keshi: " + ', '.join(f'{key}={value}' for key, value in metrics().items()))
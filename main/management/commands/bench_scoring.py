@@ -0,0 +1,109 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from main.models import QuizAttempt, Result
+
+
+FIELDS = [
+    'total_questions', 'correct_answers', 'wrong_answers', 'unanswered',
+    'total_score', 'max_score', 'percentage', 'passed',
+]
+
+TRANSACTION_SQL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+
+def legacy_result_fields(attempt):
+    """Eski Result.calculate_result algoritmi (faqat solishtirish uchun)"""
+    responses = attempt.responses.select_related('question')
+    total_questions = attempt.quiz.questions.count()
+    correct_answers = responses.filter(is_correct=True).count()
+    wrong_answers = responses.filter(
+        is_correct=False,
+        selected_option__isnull=False
+    ).count()
+    unanswered = total_questions - responses.count()
+    total_score = sum(r.question.score for r in responses.filter(is_correct=True))
+    max_score = sum(q.score for q in attempt.quiz.questions.all())
+    percentage = (total_score / max_score * 100) if max_score > 0 else 0
+    return {
+        'total_questions': total_questions,
+        'correct_answers': correct_answers,
+        'wrong_answers': wrong_answers,
+        'unanswered': unanswered,
+        'total_score': total_score,
+        'max_score': max_score,
+        'percentage': Decimal(str(round(percentage, 2))),
+        'passed': percentage >= attempt.quiz.passing_score,
+    }
+
+
+class Command(BaseCommand):
+    help = "Standart test baholashining so'rovlar soni va tezligini o'lchash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quiz',
+            type=int,
+            help="Faqat shu test urinishlari",
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help="O'lchanadigan urinishlar soni",
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Natijani eski algoritm bilan solishtirish",
+        )
+
+    def handle(self, *args, **options):
+        attempts = QuizAttempt.objects.filter(
+            quiz__quiz_type='standard',
+            status__in=['completed', 'expired'],
+        ).select_related('quiz').order_by('-pk')
+        if options['quiz']:
+            attempts = attempts.filter(quiz_id=options['quiz'])
+        attempts = list(attempts[:options['limit']])
+
+        if not attempts:
+            self.stdout.write("Yakunlangan standart urinishlar topilmadi")
+            return
+
+        query_counts = []
+        mismatches = 0
+        elapsed = 0
+        for attempt in attempts:
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as ctx:
+                result = Result.calculate_result(attempt)
+            elapsed += time.perf_counter() - started
+            # BEGIN/COMMIT/SAVEPOINT hisobga olinmaydi
+            query_counts.append(sum(
+                1 for query in ctx.captured_queries
+                if not query['sql'].startswith(TRANSACTION_SQL)
+            ))
+
+            if options['verify']:
+                expected = legacy_result_fields(attempt)
+                result.refresh_from_db()
+                actual = {field: getattr(result, field) for field in FIELDS}
+                if actual != expected:
+                    mismatches += 1
+                    self.stdout.write(self.style.ERROR(
+                        f"Urinish #{attempt.pk}: {actual} != {expected}"
+                    ))
+
+        self.stdout.write(
+            f"Urinishlar: {len(attempts)}\n"
+            f"So'rovlar (bitta baholash): min={min(query_counts)}, max={max(query_counts)}\n"
+            f"O'rtacha vaqt: {elapsed / len(attempts) * 1000:.2f} ms"
+        )
+        if options['verify']:
+            style = self.style.ERROR if mismatches else self.style.SUCCESS
+            self.stdout.write(style(f"Farqlar: {mismatches}"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import Quiz
+from main.scale_analytics import NUMPY_AVAILABLE, compute_quiz_statistics
+
+
+class Command(BaseCommand):
+    help = "Psixologik shkalalar ishonchliligi (Cronbach alfa) va norma jadvallarini hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quiz',
+            type=int,
+            help="Faqat shu test (aks holda barcha faol psixologik testlar)",
+        )
+
+    def handle(self, *args, **options):
+        if not NUMPY_AVAILABLE:
+            raise CommandError("numpy o'rnatilmagan! pip install numpy")
+
+        quizzes = Quiz.objects.filter(quiz_type='psychological')
+        if options['quiz']:
+            quizzes = quizzes.filter(pk=options['quiz'])
+        else:
+            quizzes = quizzes.filter(is_active=True)
+
+        for quiz in quizzes:
+            scales, norms = compute_quiz_statistics(quiz)
+            self.stdout.write(f"{quiz.title}: {scales} ta shkala, {norms} ta norma jadvali")
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.expiry import expire_overdue
+
+
+class Command(BaseCommand):
+    help = "Vaqti tugagan faol urinishlarni yakunlash va baholash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'QUIZ_EXPIRY_BATCH_SIZE', 200),
+            help="Bitta tranzaksiyadagi urinishlar soni",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="To'xtatilguncha har --interval soniyada ishlash",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'QUIZ_EXPIRY_INTERVAL', 30),
+            help="Tsikllar orasidagi pauza (soniya)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_overdue(options['batch_size'])
+            if expired:
+                self.stdout.write(f"{expired} ta urinish yakunlandi")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.answer_buffer import flush_dirty
+
+
+class Command(BaseCommand):
+    help = "Avtosaqlash buferidagi javoblarni UserResponse jadvaliga ko'chirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="To'xtatilguncha har --interval soniyada ishlash",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'QUIZ_ANSWER_FLUSH_INTERVAL', 3),
+            help="Tsikllar orasidagi pauza (soniya)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            attempts, saved = flush_dirty()
+            if attempts:
+                self.stdout.write(f"{attempts} ta urinish, {saved} ta javob saqlandi")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
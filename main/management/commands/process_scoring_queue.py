@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.scoring_queue import process_pending, reconcile
+
+
+class Command(BaseCommand):
+    help = "Baholash navbatidagi yakunlangan urinishlarni guruhlab baholash"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'QUIZ_SCORING_BATCH_SIZE', 200),
+            help="Bitta guruhdagi urinishlar soni",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="To'xtatilguncha har --interval soniyada ishlash",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'QUIZ_SCORING_INTERVAL', 1),
+            help="Tsikllar orasidagi pauza (soniya)",
+        )
+        parser.add_argument(
+            '--reconcile-after',
+            type=int,
+            default=getattr(settings, 'QUIZ_SCORING_RECONCILE_AFTER', 60),
+            help="Shuncha soniyadan beri natijasiz urinishlarni navbatsiz baholash",
+        )
+
+    def handle(self, *args, **options):
+        last_reconcile = 0
+        while True:
+            scored = process_pending(options['batch_size'])
+            if scored:
+                self.stdout.write(f"{scored} ta urinish baholandi")
+
+            if time.monotonic() - last_reconcile >= options['reconcile_after']:
+                recovered = reconcile(options['batch_size'], options['reconcile_after'])
+                if recovered:
+                    self.stdout.write(f"{recovered} ta natijasiz urinish baholandi")
+                last_reconcile = time.monotonic()
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from main.models import StudentStats
+from student.models import Student
+
+
+class Command(BaseCommand):
+    help = "Talabalar statistikasini (StudentStats) urinishlar va natijalardan qayta qurish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student',
+            type=int,
+            help="Faqat shu talaba (ID)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Bitta guruhdagi talabalar soni",
+        )
+
+    def handle(self, *args, **options):
+        student_ids = Student.objects.order_by('pk').values_list('pk', flat=True)
+        if options['student']:
+            student_ids = student_ids.filter(pk=options['student'])
+        student_ids = list(student_ids)
+
+        batch_size = options['batch_size']
+        for i in range(0, len(student_ids), batch_size):
+            StudentStats.rebuild(student_ids[i:i + batch_size])
+            self.stdout.write(f"[{min(i + batch_size, len(student_ids))}/{len(student_ids)}]")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(student_ids)} ta talaba statistikasi qayta qurildi"))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import Quiz
+from main.rescoring import rescore_quiz
+
+
+class Command(BaseCommand):
+    help = "Testning barcha yakunlangan urinishlarini joriy javob kaliti bo'yicha qayta baholash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int, help="Test ID")
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Bitta tranzaksiyadagi urinishlar soni",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Parallel jarayonlar soni",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Hech narsa saqlamasdan farqlarni ko'rsatish",
+        )
+        parser.add_argument(
+            '--show-diffs',
+            type=int,
+            default=20,
+            help="Ko'rsatiladigan farqlar soni (dry-run)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz_id'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"Test #{options['quiz_id']} topilmadi")
+
+        def progress(stats, done, total):
+            self.stdout.write(
+                f"[{done}/{total}] javoblar: {stats['responses_changed']}, "
+                f"natijalar: {stats['results_changed']} o'zgardi"
+            )
+
+        totals = rescore_quiz(
+            quiz.pk,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+
+        if options['dry_run']:
+            for attempt_id, before, after in totals['diffs'][:options['show_diffs']]:
+                self.stdout.write(f"Urinish #{attempt_id}: {before} -> {after}")
+            if len(totals['diffs']) > options['show_diffs']:
+                self.stdout.write(f"... va yana {len(totals['diffs']) - options['show_diffs']} ta")
+
+        verb = "o'zgaradi (dry-run)" if options['dry_run'] else "o'zgardi"
+        self.stdout.write(self.style.SUCCESS(
+            f"{quiz.title}: {totals['attempts']} ta urinish, "
+            f"{totals['responses_changed']} ta javob va {totals['results_changed']} ta natija {verb}"
+        ))
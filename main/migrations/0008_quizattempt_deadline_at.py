@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_deadline(apps, schema_editor):
+    """Mavjud urinishlar uchun tugash muddatini hisoblash"""
+    Quiz = apps.get_model('main', 'Quiz')
+    QuizAttempt = apps.get_model('main', 'QuizAttempt')
+    for quiz_id, time_limit in Quiz.objects.values_list('id', 'time_limit'):
+        QuizAttempt.objects.filter(quiz_id=quiz_id).update(
+            deadline_at=F('started_at') + timedelta(minutes=time_limit)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_quizattempt_in_progress_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='deadline_at',
+            field=models.DateTimeField(null=True, verbose_name='Tugash muddati'),
+        ),
+        migrations.RunPython(fill_deadline, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='deadline_at',
+            field=models.DateTimeField(verbose_name='Tugash muddati'),
+        ),
+        migrations.RemoveIndex(
+            model_name='quizattempt',
+            name='attempt_in_progress_idx',
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(condition=models.Q(('status', 'in_progress')), fields=['deadline_at'], name='attempt_active_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_quizattempt_deadline_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScaleStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('respondents', models.IntegerField(default=0, verbose_name='Respondentlar')),
+                ('cronbach_alpha', models.FloatField(blank=True, null=True, verbose_name='Cronbach alfa')),
+                ('item_total', models.JSONField(default=dict, verbose_name='Savol-umumiy korrelyatsiya')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Hisoblangan')),
+                ('scale', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='main.psychologicalscale', verbose_name='Shkala')),
+            ],
+            options={
+                'verbose_name': 'Shkala statistikasi',
+                'verbose_name_plural': 'Shkala statistikalari',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScaleNorm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cohort_type', models.CharField(choices=[('all', 'Barcha'), ('faculty', 'Fakultet'), ('level', 'Kurs'), ('gender', 'Jins')], max_length=20, verbose_name='Kogorta turi')),
+                ('cohort_value', models.CharField(blank=True, max_length=255, verbose_name='Kogorta')),
+                ('size', models.IntegerField(verbose_name='Hajmi')),
+                ('mean', models.FloatField(verbose_name="O'rtacha")),
+                ('std', models.FloatField(verbose_name="Standart og'ish")),
+                ('min_score', models.IntegerField(verbose_name='Minimal ball')),
+                ('percentiles', models.JSONField(default=list, verbose_name='Persentillar')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Hisoblangan')),
+                ('scale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='norms', to='main.psychologicalscale', verbose_name='Shkala')),
+            ],
+            options={
+                'verbose_name': 'Shkala normasi',
+                'verbose_name_plural': 'Shkala normalari',
+                'unique_together': {('scale', 'cohort_type', 'cohort_value')},
+            },
+        ),
+    ]
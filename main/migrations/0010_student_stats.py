@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_scale_statistics_norms'),
+        ('student', '0004_alter_student_phone_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_attempts', models.IntegerField(default=0, verbose_name='Urinishlar')),
+                ('completed_attempts', models.IntegerField(default=0, verbose_name='Yakunlangan')),
+                ('expired_attempts', models.IntegerField(default=0, verbose_name='Vaqti tugagan')),
+                ('standard_results_count', models.IntegerField(default=0, verbose_name='Standart natijalar')),
+                ('standard_passed_count', models.IntegerField(default=0, verbose_name="O'tgan")),
+                ('standard_percentage_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Foizlar yig'indisi")),
+                ('psychological_results_count', models.IntegerField(default=0, verbose_name='Psixologik natijalar')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan')),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_stats', to='student.student', verbose_name='Talaba')),
+            ],
+            options={
+                'verbose_name': 'Talaba statistikasi',
+                'verbose_name_plural': 'Talabalar statistikasi',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_student_stats'),
+        ('student', '0004_alter_student_phone_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScaleResultFact',
+            fields=[
+                ('scale_result', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fact', serialize=False, to='main.psychologicalscaleresult', verbose_name='Shkala natijasi')),
+                ('color', models.CharField(blank=True, max_length=50, verbose_name='Rang')),
+                ('score', models.IntegerField(verbose_name='Ball')),
+                ('faculty', models.CharField(blank=True, max_length=255, verbose_name='Fakultet')),
+                ('level', models.CharField(blank=True, max_length=255, verbose_name='Kurs')),
+                ('gender', models.CharField(blank=True, max_length=56, verbose_name='Jinsi')),
+                ('month', models.DateField(verbose_name='Oy')),
+                ('created_at', models.DateTimeField(verbose_name='Natija vaqti')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='main.psychologicalcategory', verbose_name='Kategoriya')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='student.studentgroup', verbose_name='Guruh')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.quiz', verbose_name='Test')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.psychologicalresult', verbose_name='Natija')),
+                ('scale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.psychologicalscale', verbose_name='Shkala')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student.student', verbose_name='Talaba')),
+            ],
+            options={
+                'verbose_name': 'Shkala natijasi (analitika)',
+                'verbose_name_plural': 'Shkala natijalari (analitika)',
+                'indexes': [models.Index(fields=['quiz', 'month'], name='scale_fact_quiz_month_idx'), models.Index(fields=['faculty'], name='scale_fact_faculty_idx'), models.Index(fields=['level'], name='scale_fact_level_idx'), models.Index(fields=['created_at'], name='scale_fact_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_scale_result_fact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='score_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Baholash versiyasi'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+BATCH_SIZE = 2000
+
+
+def backfill_scale_facts(apps, schema_editor):
+    """Mavjud shkala natijalaridan analitika qatorlari (bor qatorlar tashlanadi)"""
+    PsychologicalScaleResult = apps.get_model('main', 'PsychologicalScaleResult')
+    ScaleResultFact = apps.get_model('main', 'ScaleResultFact')
+
+    rows = PsychologicalScaleResult.objects.filter(fact__isnull=True).order_by('pk').values_list(
+        'pk', 'result_id', 'scale_id', 'category_id', 'category__color', 'total_score',
+        'result__created_at', 'result__attempt__quiz_id', 'result__attempt__student_id',
+        'result__attempt__student__faculty', 'result__attempt__student__level',
+        'result__attempt__student__gender', 'result__attempt__student__group_id',
+    )
+    facts = []
+    for (scale_result_id, result_id, scale_id, category_id, color, score, created_at, quiz_id,
+            student_id, faculty, level, gender, group_id) in rows.iterator(chunk_size=BATCH_SIZE):
+        facts.append(ScaleResultFact(
+            scale_result_id=scale_result_id,
+            result_id=result_id,
+            student_id=student_id,
+            quiz_id=quiz_id,
+            scale_id=scale_id,
+            category_id=category_id,
+            color=color or '',
+            score=score,
+            faculty=faculty or '',
+            level=level or '',
+            gender=gender or '',
+            group_id=group_id,
+            month=timezone.localtime(created_at).date().replace(day=1),
+            created_at=created_at,
+        ))
+        if len(facts) >= BATCH_SIZE:
+            ScaleResultFact.objects.bulk_create(facts, ignore_conflicts=True)
+            facts = []
+    if facts:
+        ScaleResultFact.objects.bulk_create(facts, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_quizattempt_score_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_scale_facts, migrations.RunPython.noop),
+    ]
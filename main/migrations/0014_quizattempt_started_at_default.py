@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_backfill_scale_facts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Boshlangan'),
+        ),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import F
 from django.utils import timezone
 from student.models import Student
+from datetime import timedelta
 import random
 
 
@@ -35,6 +38,7 @@ class Quiz(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
     attempt_limit = models.IntegerField(default=1, validators=[MinValueValidator(1)], verbose_name="Urinishlar soni")
+    content_version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Kontent versiyasi")
 
     class Meta:
         verbose_name = "Test"
@@ -45,13 +49,18 @@ class Quiz(models.Model):
         quiz_type_icon = "🧠" if self.quiz_type == 'psychological' else "📝"
         return f"{quiz_type_icon} {self.title}"
 
+    def get_answer_key(self):
+        """Keshlangan javob kaliti (main.answer_key)"""
+        from main.answer_key import get_answer_key
+        return get_answer_key(self)
+
     def get_total_questions(self):
         """Jami savollar soni"""
-        return self.questions.count()
+        return self.get_answer_key().total_questions
 
     def get_total_score(self):
         """Maksimal ball"""
-        return sum(q.score for q in self.questions.all())
+        return self.get_answer_key().max_score
     
     def is_psychological(self):
         """Psixologik testmi?"""
@@ -61,10 +70,8 @@ class Quiz(models.Model):
         """Standart testmi?"""
         return self.quiz_type == 'standard'
     def can_attempt(self, student):
-        """Talaba bu testni urinishlar soni"""
+        """Talaba bu testni urinishlar soni (bazadan - keshlangan xarita faqat ko'rsatish uchun)"""
         student_attempts = QuizAttempt.objects.filter(student=student, quiz=self).count()
-        print(student_attempts, self.attempt_limit)
-        print(student_attempts < self.attempt_limit)
         return student_attempts < self.attempt_limit
 
 
@@ -103,6 +110,22 @@ class PsychologicalScale(models.Model):
     def __str__(self):
         return f"{self.quiz.title} - {self.name}"
 
+    def get_category_problems(self):
+        """Kategoriya oraliqlaridagi kesishish va bo'shliqlar (admin uchun)"""
+        from main.category_lookup import CategoryLookup
+
+        categories = list(self.categories.all())
+        intervals = [(c.min_score, c.max_score, c.pk) for c in categories]
+        problems = [
+            f"Kesishish: {categories[i]} va {categories[j]}"
+            for i, j in CategoryLookup.overlaps(intervals)
+        ]
+        problems += [
+            f"Bo'shliq: {start}-{end} ball hech bir kategoriyaga tushmaydi"
+            for start, end in CategoryLookup.gaps(intervals)
+        ]
+        return problems
+
 
 class PsychologicalCategory(models.Model):
     """
@@ -141,6 +164,12 @@ class PsychologicalCategory(models.Model):
     def __str__(self):
         return f"{self.name} ({self.min_score}-{self.max_score})"
     
+    def clean(self):
+        from django.core.exceptions import ValidationError
+
+        if self.min_score is not None and self.max_score is not None and self.min_score > self.max_score:
+            raise ValidationError("Minimal ball maksimal balldan katta bo'lishi mumkin emas")
+
     def matches_score(self, score):
         """Ball bu kategoriyaga mos keladimi?"""
         return self.min_score <= score <= self.max_score
@@ -352,10 +381,16 @@ class QuizAttempt(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts', verbose_name="Test")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress', verbose_name="Holat")
     
-    started_at = models.DateTimeField(auto_now_add=True, verbose_name="Boshlangan")
+    started_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Boshlangan")
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugatilgan")
     
     time_taken = models.IntegerField(null=True, blank=True, help_text="Soniyalarda", verbose_name="Sarflangan vaqt")
+
+    # Boshlanish vaqti + vaqt chegarasi (+ talabaga berilgan qo'shimcha vaqt)
+    deadline_at = models.DateTimeField(verbose_name="Tugash muddati")
+
+    # Har baholashda oshadi - natija sahifasi snapshoti kaliti (main.result_page)
+    score_version = models.PositiveIntegerField(default=0, editable=False, verbose_name="Baholash versiyasi")
     
     class Meta:
         verbose_name = "Test urinishi"
@@ -368,53 +403,109 @@ class QuizAttempt(models.Model):
                 name='unique_active_attempt'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['deadline_at'],
+                condition=models.Q(status='in_progress'),
+                name='attempt_active_deadline_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student.student_name} - {self.quiz.title} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        """Yangi urinish uchun tugash muddatini belgilash"""
+        if self.deadline_at is None:
+            # Muddat aynan saqlanadigan boshlanish vaqtidan (time_limit soniyalari to'liq)
+            if self.started_at is None:
+                self.started_at = timezone.now()
+            self.deadline_at = self.started_at + timedelta(minutes=self.quiz.time_limit)
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            StudentStats.increment(self.student_id, total_attempts=1)
+
     def is_time_expired(self):
         """Vaqt tugaganmi tekshirish"""
         if self.status != 'in_progress':
             return False
-        elapsed = (timezone.now() - self.started_at).total_seconds() / 60
-        return elapsed > self.quiz.time_limit
+        return timezone.now() > self.deadline_at
 
     def get_remaining_time(self):
         """Qolgan vaqt (soniyalarda)"""
         if self.status != 'in_progress':
             return 0
-        elapsed = (timezone.now() - self.started_at).total_seconds()
-        total_seconds = self.quiz.time_limit * 60
-        remaining = total_seconds - elapsed
+        remaining = (self.deadline_at - timezone.now()).total_seconds()
         return max(0, int(remaining))
+
+    def extend_deadline(self, minutes):
+        """Talabaga qo'shimcha vaqt berish"""
+        QuizAttempt.objects.filter(pk=self.pk, status='in_progress').update(
+            deadline_at=F('deadline_at') + timedelta(minutes=minutes)
+        )
+        self.refresh_from_db(fields=['deadline_at'])
+
+    def has_result(self):
+        """Natija hisoblanganmi? (baholash navbatda bo'lishi mumkin)"""
+        if self.quiz.is_standard():
+            return Result.objects.filter(attempt=self).exists()
+        return PsychologicalResult.objects.filter(attempt=self).exists()
+
+    def get_time_limit_seconds(self):
+        """Urinish uchun ajratilgan umumiy vaqt (qo'shimcha vaqt bilan)"""
+        return int((self.deadline_at - self.started_at).total_seconds())
     
+    def _finish(self, status):
+        """
+        in_progress -> status o'tishi faqat bir marta
+
+        Qator bloklanadi va holat shartli UPDATE bilan o'zgartiriladi - eski
+        obyekt, ikki marta yuborilgan forma yoki supurgich (main.expiry)
+        hisoblagich va baholashni takrorlamaydi. Qaytaradi: o'tish bajarildimi
+        """
+        from main.answer_buffer import flush_attempts
+        from main.quiz_status import invalidate_quiz_status
+        from main.scoring_queue import enqueue_scoring
+
+        with transaction.atomic():
+            # Bufer o'qilishidan oldin qator bloklanadi (flush_dirty ham shu qulfni oladi)
+            list(QuizAttempt.objects.select_for_update().filter(pk=self.pk).values_list('pk', flat=True))
+            completed_at = timezone.now()
+            if status == 'expired':
+                time_taken = self.get_time_limit_seconds()
+            else:
+                time_taken = int((completed_at - self.started_at).total_seconds())
+            updated = QuizAttempt.objects.filter(pk=self.pk, status='in_progress').update(
+                status=status,
+                completed_at=completed_at,
+                time_taken=time_taken,
+            )
+            if not updated:
+                self.refresh_from_db(fields=['status', 'completed_at', 'time_taken'])
+                return False
+
+            # Buferdagi javoblar baholashdan oldin saqlanadi
+            flush_attempts([self])
+
+            self.status = status
+            self.completed_at = completed_at
+            self.time_taken = time_taken
+            StudentStats.increment(self.student_id, **{f'{status}_attempts': 1})
+            invalidate_quiz_status([self.student_id])
+
+            # Natija fon jarayonida hisoblanadi (main.scoring_queue) - commitdan
+            # keyin, aks holda worker urinishni hali in_progress holatida ko'radi
+            transaction.on_commit(lambda: enqueue_scoring([self]))
+        return True
+
     def complete_attempt(self):
         """Testni tugatish va natijani hisoblash"""
-        if self.status == 'in_progress':
-            self.status = 'completed'
-            self.completed_at = timezone.now()
-            self.time_taken = int((self.completed_at - self.started_at).total_seconds())
-            self.save()
-            
-            # Natijani hisoblash
-            if self.quiz.is_standard():
-                Result.calculate_result(self)
-            else:
-                PsychologicalResult.calculate_result(self)
-    
+        return self._finish('completed')
+
     def expire_attempt(self):
         """Vaqt tugaganda testni yakunlash"""
-        if self.status == 'in_progress':
-            self.status = 'expired'
-            self.completed_at = timezone.now()
-            self.time_taken = self.quiz.time_limit * 60
-            self.save()
-            
-            # Natijani hisoblash
-            if self.quiz.is_standard():
-                Result.calculate_result(self)
-            else:
-                PsychologicalResult.calculate_result(self)
+        return self._finish('expired')
 
 
 class UserResponse(models.Model):
@@ -471,17 +562,96 @@ class UserResponse(models.Model):
 
     def save(self, *args, **kwargs):
         """Javobni tekshirish"""
-        if self.selected_option:
-            if self.attempt.quiz.is_standard():
-                # Standart test
-                self.is_correct = self.selected_option.is_correct
-                self.earned_score = self.question.score if self.is_correct else 0
+        if self.selected_option_id:
+            quiz = self.attempt.quiz
+            option = quiz.get_answer_key().lookup(self.question_id, self.selected_option_id)
+            if option is None:
+                # Kalitda yo'q (masalan, boshqa savolning varianti) - bazadan o'qish
+                option = (
+                    self.selected_option.is_correct,
+                    self.question.score,
+                    self.selected_option.psychological_score,
+                )
             else:
-                # Psixologik test
-                self.is_correct = False  # Psixologik testda to'g'ri/noto'g'ri yo'q
-                self.earned_score = self.selected_option.psychological_score
-        
+                option = (option.is_correct, option.score, option.psychological_score)
+            self.is_correct, self.earned_score = self.evaluate(quiz.is_standard(), *option)
+
         super().save(*args, **kwargs)
+
+    @staticmethod
+    def evaluate(is_standard, option_is_correct, question_score, psychological_score):
+        """Tanlangan variant bo'yicha (is_correct, earned_score) ni hisoblash"""
+        if is_standard:
+            # Standart test
+            return option_is_correct, question_score if option_is_correct else 0
+        # Psixologik test - to'g'ri/noto'g'ri yo'q
+        return False, psychological_score
+
+    @classmethod
+    def build_rows(cls, attempt, answers):
+        """
+        Javoblarni javob kaliti bo'yicha tekshirib, saqlanmagan obyektlarga aylantirish
+
+        answers: {question_id: option_id}
+        Qaytaradi: (obyektlar ro'yxati, rad etilganlar soni)
+        """
+        pairs = {}
+        rejected = 0
+        for question_id, option_id in answers.items():
+            try:
+                pairs[int(question_id)] = int(option_id)
+            except (TypeError, ValueError):
+                rejected += 1
+
+        if not pairs:
+            return [], rejected
+
+        # (savol, variant) juftliklari keshlangan javob kaliti bo'yicha tekshiriladi
+        answer_key = attempt.quiz.get_answer_key()
+
+        is_standard = attempt.quiz.is_standard()
+        rows = []
+        for question_id, option_id in pairs.items():
+            option = answer_key.lookup(question_id, option_id)
+            if option is None:
+                rejected += 1
+                continue
+
+            is_correct, earned_score = cls.evaluate(
+                is_standard, option.is_correct, option.score, option.psychological_score
+            )
+            rows.append(cls(
+                attempt=attempt,
+                question_id=question_id,
+                selected_option_id=option_id,
+                is_correct=is_correct,
+                earned_score=earned_score,
+            ))
+
+        return rows, rejected
+
+    @classmethod
+    def bulk_upsert(cls, rows):
+        """INSERT ... ON CONFLICT (attempt, question) DO UPDATE - bitta so'rov"""
+        if rows:
+            cls.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['attempt', 'question'],
+                update_fields=['selected_option', 'is_correct', 'earned_score'],
+            )
+
+    @classmethod
+    def bulk_save(cls, attempt, answers):
+        """
+        Bir nechta javobni tekshirish va bitta upsert bilan saqlash
+
+        answers: {question_id: option_id}
+        Qaytaradi: (saqlangan, rad etilgan) javoblar soni
+        """
+        rows, rejected = cls.build_rows(attempt, answers)
+        cls.bulk_upsert(rows)
+        return len(rows), rejected
     
     def clean(self):
         """Validatsiya"""
@@ -531,39 +701,14 @@ class Result(models.Model):
 
     @classmethod
     def calculate_result(cls, attempt):
-        """Standart test natijasini hisoblash"""
-        responses = attempt.responses.select_related('question')
-        total_questions = attempt.quiz.get_total_questions()
-        correct_answers = responses.filter(is_correct=True).count()
-        wrong_answers = responses.filter(
-            is_correct=False, 
-            selected_option__isnull=False
-        ).count()
-        unanswered = total_questions - responses.count()
-
-        # Ball hisoblash
-        total_score = sum(
-            r.question.score for r in responses.filter(is_correct=True)
-        )
-        max_score = attempt.quiz.get_total_score()
-        percentage = (total_score / max_score * 100) if max_score > 0 else 0
-        passed = percentage >= attempt.quiz.passing_score
-
-        # Natijani saqlash
-        result, created = cls.objects.update_or_create(
-            attempt=attempt,
-            defaults={
-                'total_questions': total_questions,
-                'correct_answers': correct_answers,
-                'wrong_answers': wrong_answers,
-                'unanswered': unanswered,
-                'total_score': total_score,
-                'max_score': max_score,
-                'percentage': round(percentage, 2),
-                'passed': passed,
-            }
-        )
-        return result
+        """
+        Standart test natijasini hisoblash
+
+        Javoblar bitta so'rov bilan olinadi, ballar javob kalitidan
+        hisoblanadi va natija bitta upsert bilan saqlanadi (main.scoring).
+        """
+        from main.scoring import score_standard_attempts
+        return score_standard_attempts([attempt])[0]
     
     def get_grade(self):
         """Baho olish (5-bahollik tizim)"""
@@ -603,52 +748,14 @@ class PsychologicalResult(models.Model):
     
     @classmethod
     def calculate_result(cls, attempt):
-        """Psixologik test natijasini hisoblash"""
-        responses = attempt.responses.select_related('question', 'question__psychological_scale')
-        total_questions = attempt.quiz.get_total_questions()
-        answered = responses.count()
-        unanswered = total_questions - answered
-        
-        # Asosiy natija
-        result, created = cls.objects.update_or_create(
-            attempt=attempt,
-            defaults={
-                'total_questions': total_questions,
-                'answered_questions': answered,
-                'unanswered': unanswered,
-            }
-        )
-        
-        # Har bir shkala bo'yicha ballni hisoblash
-        scales = attempt.quiz.psychological_scales.all()
-        
-        for scale in scales:
-            # Shu shkalaga tegishli javoblar
-            scale_responses = responses.filter(
-                question__psychological_scale=scale
-            )
-            
-            # Umumiy ball
-            total_score = sum(r.earned_score for r in scale_responses)
-            
-            # Kategoriyani aniqlash
-            category = None
-            for cat in scale.categories.all():
-                if cat.matches_score(total_score):
-                    category = cat
-                    break
-            
-            # Shkala natijasini saqlash
-            PsychologicalScaleResult.objects.update_or_create(
-                result=result,
-                scale=scale,
-                defaults={
-                    'total_score': total_score,
-                    'category': category,
-                }
-            )
-        
-        return result
+        """
+        Psixologik test natijasini hisoblash
+
+        Shkala ballari bitta GROUP BY bilan, barcha shkala natijalari bitta
+        upsert bilan yoziladi (main.scoring).
+        """
+        from main.scoring import score_psychological_attempts
+        return score_psychological_attempts([attempt])[0]
 
 
 class PsychologicalScaleResult(models.Model):
@@ -685,4 +792,397 @@ class PsychologicalScaleResult(models.Model):
         unique_together = ['result', 'scale']
     
     def __str__(self):
-        return f"{self.scale.name}: {self.total_score} ball"
\ No newline at end of file
+        return f"{self.scale.name}: {self.total_score} ball"
+
+class ScaleStatistics(models.Model):
+    """Shkala ishonchliligi (main.scale_analytics tomonidan hisoblanadi)"""
+
+    scale = models.OneToOneField(
+        PsychologicalScale,
+        on_delete=models.CASCADE,
+        related_name='statistics',
+        verbose_name="Shkala"
+    )
+
+    respondents = models.IntegerField(default=0, verbose_name="Respondentlar")
+    cronbach_alpha = models.FloatField(null=True, blank=True, verbose_name="Cronbach alfa")
+
+    # {question_id: tuzatilgan savol-umumiy ball korrelyatsiyasi}
+    item_total = models.JSONField(default=dict, verbose_name="Savol-umumiy korrelyatsiya")
+
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Hisoblangan")
+
+    class Meta:
+        verbose_name = "Shkala statistikasi"
+        verbose_name_plural = "Shkala statistikalari"
+
+    def __str__(self):
+        return f"{self.scale.name}: alfa={self.cronbach_alpha}"
+
+
+class ScaleNorm(models.Model):
+    """
+    Shkala bo'yicha norma jadvali (kogorta: barcha, fakultet, kurs, jins)
+
+    percentiles[i] - (min_score + i) ball uchun persentil rangi, shuning
+    uchun sahifada persentil bazaga murojaatsiz O(1) da topiladi.
+    """
+
+    COHORT_CHOICES = [
+        ('all', 'Barcha'),
+        ('faculty', 'Fakultet'),
+        ('level', 'Kurs'),
+        ('gender', 'Jins'),
+    ]
+
+    scale = models.ForeignKey(
+        PsychologicalScale,
+        on_delete=models.CASCADE,
+        related_name='norms',
+        verbose_name="Shkala"
+    )
+
+    cohort_type = models.CharField(max_length=20, choices=COHORT_CHOICES, verbose_name="Kogorta turi")
+    cohort_value = models.CharField(max_length=255, blank=True, verbose_name="Kogorta")
+
+    size = models.IntegerField(verbose_name="Hajmi")
+    mean = models.FloatField(verbose_name="O'rtacha")
+    std = models.FloatField(verbose_name="Standart og'ish")
+    min_score = models.IntegerField(verbose_name="Minimal ball")
+    percentiles = models.JSONField(default=list, verbose_name="Persentillar")
+
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Hisoblangan")
+
+    class Meta:
+        verbose_name = "Shkala normasi"
+        verbose_name_plural = "Shkala normalari"
+        unique_together = ['scale', 'cohort_type', 'cohort_value']
+
+    def __str__(self):
+        return f"{self.scale.name} - {self.get_cohort_type_display()}: {self.cohort_value or '-'}"
+
+    def percentile(self, score):
+        """Ball uchun persentil rangi (0-100)"""
+        if not self.percentiles:
+            return None
+        if score < self.min_score:
+            return 0.0
+        index = score - self.min_score
+        if index >= len(self.percentiles):
+            return 100.0
+        return self.percentiles[index]
+
+    def t_score(self, score):
+        """T-ball: 50 + 10 * z"""
+        if not self.std:
+            return None
+        return round(50 + 10 * (score - self.mean) / self.std, 1)
+
+
+class StudentStats(models.Model):
+    """
+    Talaba bo'yicha umumiy hisoblagichlar (dashboard, profil, statistika)
+
+    Urinish hisoblagichlari urinish yaratilganda/yakunlanganda oshiriladi,
+    natija hisoblagichlari baholashdan keyin shu talaba uchun qayta
+    yig'iladi (main.scoring). To'liq qayta qurish:
+    `manage.py rebuild_student_stats`.
+    """
+
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='quiz_stats',
+        verbose_name="Talaba"
+    )
+
+    total_attempts = models.IntegerField(default=0, verbose_name="Urinishlar")
+    completed_attempts = models.IntegerField(default=0, verbose_name="Yakunlangan")
+    expired_attempts = models.IntegerField(default=0, verbose_name="Vaqti tugagan")
+
+    standard_results_count = models.IntegerField(default=0, verbose_name="Standart natijalar")
+    standard_passed_count = models.IntegerField(default=0, verbose_name="O'tgan")
+    standard_percentage_sum = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Foizlar yig'indisi"
+    )
+    psychological_results_count = models.IntegerField(default=0, verbose_name="Psixologik natijalar")
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    # Baholashdan keyin qayta yig'iladigan maydonlar
+    RESULT_FIELDS = (
+        'standard_results_count', 'standard_passed_count',
+        'standard_percentage_sum', 'psychological_results_count',
+    )
+
+    class Meta:
+        verbose_name = "Talaba statistikasi"
+        verbose_name_plural = "Talabalar statistikasi"
+
+    def __str__(self):
+        return f"{self.student.student_name}: {self.total_attempts} urinish"
+
+    @property
+    def standard_failed_count(self):
+        return self.standard_results_count - self.standard_passed_count
+
+    @property
+    def average_percentage(self):
+        """O'rtacha foiz (faqat standart testlar)"""
+        if not self.standard_results_count:
+            return 0
+        return round(self.standard_percentage_sum / self.standard_results_count, 2)
+
+    @classmethod
+    def for_student(cls, student):
+        """Talaba statistikasi - bitta indeksli so'rov (yo'q bo'lsa quriladi)"""
+        stats = cls.objects.filter(student=student).first()
+        if stats is None:
+            cls.rebuild([student.pk])
+            stats = cls.objects.get(student=student)
+        return stats
+
+    @classmethod
+    def increment(cls, student_id, **deltas):
+        """Urinish hisoblagichlarini oshirish (qator yo'q bo'lsa to'liq quriladi)"""
+        updated = cls.objects.filter(student_id=student_id).update(
+            **{field: F(field) + value for field, value in deltas.items()}
+        )
+        if not updated:
+            cls.rebuild([student_id])
+
+    @classmethod
+    def _result_fields(cls, student_ids):
+        """Natija hisoblagichlari - ikkita GROUP BY so'rovi"""
+        from django.db.models import Count, Q, Sum
+
+        fields = {
+            student_id: {
+                'standard_results_count': 0,
+                'standard_passed_count': 0,
+                'standard_percentage_sum': 0,
+                'psychological_results_count': 0,
+            }
+            for student_id in student_ids
+        }
+        for row in Result.objects.filter(attempt__student_id__in=student_ids).values(
+            'attempt__student_id'
+        ).annotate(
+            count=Count('id'),
+            passed_count=Count('id', filter=Q(passed=True)),
+            percentage_sum=Sum('percentage'),
+        ).order_by():
+            fields[row['attempt__student_id']].update(
+                standard_results_count=row['count'],
+                standard_passed_count=row['passed_count'],
+                standard_percentage_sum=row['percentage_sum'] or 0,
+            )
+        for student_id, count in PsychologicalResult.objects.filter(
+            attempt__student_id__in=student_ids
+        ).values('attempt__student_id').annotate(count=Count('id')).values_list(
+            'attempt__student_id', 'count'
+        ).order_by():
+            fields[student_id]['psychological_results_count'] = count
+        return fields
+
+    @classmethod
+    def refresh_results(cls, student_ids):
+        """Baholashdan keyin natija hisoblagichlarini yangilash"""
+        student_ids = set(student_ids)
+        if not student_ids:
+            return
+        existing = set(
+            cls.objects.filter(student_id__in=student_ids).values_list('student_id', flat=True)
+        )
+        if student_ids - existing:
+            cls.rebuild(student_ids - existing)
+        if not existing:
+            return
+
+        cls.objects.bulk_create(
+            [
+                cls(student_id=student_id, **fields)
+                for student_id, fields in cls._result_fields(existing).items()
+            ],
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=[*cls.RESULT_FIELDS, 'updated_at'],
+        )
+
+    @classmethod
+    def rebuild(cls, student_ids):
+        """Berilgan talabalar statistikasini to'liq qayta qurish"""
+        from django.db.models import Count, Q
+
+        student_ids = list(student_ids)
+        fields = cls._result_fields(student_ids)
+        for field in fields.values():
+            field.update(total_attempts=0, completed_attempts=0, expired_attempts=0)
+
+        for row in QuizAttempt.objects.filter(student_id__in=student_ids).values(
+            'student_id'
+        ).annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            expired=Count('id', filter=Q(status='expired')),
+        ).order_by():
+            fields[row['student_id']].update(
+                total_attempts=row['total'],
+                completed_attempts=row['completed'],
+                expired_attempts=row['expired'],
+            )
+
+        cls.objects.bulk_create(
+            [cls(student_id=student_id, **values) for student_id, values in fields.items()],
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=[
+                'total_attempts', 'completed_attempts', 'expired_attempts',
+                *cls.RESULT_FIELDS, 'updated_at',
+            ],
+        )
+
+
+class ScaleResultFact(models.Model):
+    """
+    Psixologik analitika uchun denormallashtirilgan jadval
+
+    Har bir shkala natijasi uchun bitta qator: test, shkala, rang, ball,
+    talaba kesimlari (fakultet, kurs, guruh, jins) va oy. Admin statistikasi,
+    rang filtri va eksportlar JOIN siz shu jadvaldan o'qiydi. Baholashda
+    (main.scoring) yangilanadi, talaba/kategoriya o'zgarsa signal orqali
+    to'g'rilanadi. To'liq qayta to'ldirish: `manage.py backfill_scale_facts`.
+    """
+
+    scale_result = models.OneToOneField(
+        PsychologicalScaleResult,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fact',
+        verbose_name="Shkala natijasi"
+    )
+    result = models.ForeignKey(PsychologicalResult, on_delete=models.CASCADE, verbose_name="Natija")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name="Talaba")
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, verbose_name="Test")
+    scale = models.ForeignKey(PsychologicalScale, on_delete=models.CASCADE, verbose_name="Shkala")
+    category = models.ForeignKey(
+        PsychologicalCategory,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Kategoriya"
+    )
+
+    # Kategoriya yo'q bo'lsa bo'sh
+    color = models.CharField(max_length=50, blank=True, verbose_name="Rang")
+    score = models.IntegerField(verbose_name="Ball")
+
+    faculty = models.CharField(max_length=255, blank=True, verbose_name="Fakultet")
+    level = models.CharField(max_length=255, blank=True, verbose_name="Kurs")
+    gender = models.CharField(max_length=56, blank=True, verbose_name="Jinsi")
+    group = models.ForeignKey(
+        'student.StudentGroup',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Guruh"
+    )
+
+    # Natija oyining birinchi kuni (mahalliy vaqt)
+    month = models.DateField(verbose_name="Oy")
+    created_at = models.DateTimeField(verbose_name="Natija vaqti")
+
+    # Upsert da qayta yoziladigan maydonlar
+    FIELDS = (
+        'student', 'quiz', 'scale', 'category', 'color', 'score',
+        'faculty', 'level', 'gender', 'group', 'month', 'created_at',
+    )
+
+    class Meta:
+        verbose_name = "Shkala natijasi (analitika)"
+        verbose_name_plural = "Shkala natijalari (analitika)"
+        indexes = [
+            models.Index(fields=['quiz', 'month'], name='scale_fact_quiz_month_idx'),
+            models.Index(fields=['faculty'], name='scale_fact_faculty_idx'),
+            models.Index(fields=['level'], name='scale_fact_level_idx'),
+            models.Index(fields=['created_at'], name='scale_fact_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scale_id}: {self.score} ({self.color or '-'})"
+
+    @classmethod
+    def refresh(cls, result_ids):
+        """Berilgan natijalar qatorlarini qayta yozish - bitta so'rov va bitta upsert"""
+        from main.stats_cache import bump_generation
+        from main.stats_cube import invalidate_cube
+
+        result_ids = list(result_ids)
+        if not result_ids:
+            return 0
+
+        # Qayta baholash - mavjud qatorlar o'zgaradi
+        existed = cls.objects.filter(result_id__in=result_ids).exists()
+        facts = []
+        for row in PsychologicalScaleResult.objects.filter(result_id__in=result_ids).values(
+            'pk', 'result_id', 'scale_id', 'category_id', 'category__color', 'total_score',
+            'result__created_at', 'result__attempt__quiz_id', 'result__attempt__student_id',
+            'result__attempt__student__faculty', 'result__attempt__student__level',
+            'result__attempt__student__gender', 'result__attempt__student__group_id',
+        ).order_by():
+            created_at = row['result__created_at']
+            facts.append(cls(
+                scale_result_id=row['pk'],
+                result_id=row['result_id'],
+                student_id=row['result__attempt__student_id'],
+                quiz_id=row['result__attempt__quiz_id'],
+                scale_id=row['scale_id'],
+                category_id=row['category_id'],
+                color=row['category__color'] or '',
+                score=row['total_score'],
+                faculty=row['result__attempt__student__faculty'] or '',
+                level=row['result__attempt__student__level'] or '',
+                gender=row['result__attempt__student__gender'] or '',
+                group_id=row['result__attempt__student__group_id'],
+                month=timezone.localtime(created_at).date().replace(day=1),
+                created_at=created_at,
+            ))
+        if facts:
+            cls.objects.bulk_create(
+                facts,
+                update_conflicts=True,
+                unique_fields=['scale_result'],
+                update_fields=list(cls.FIELDS),
+            )
+        # Eski natijaning yangi qatorlari kubning yuqori belgisidan pastda qoladi
+        overlap_start = timezone.now() - timedelta(seconds=getattr(settings, 'PSYCH_CUBE_OVERLAP', 5 * 60))
+        if existed or any(fact.created_at < overlap_start for fact in facts):
+            invalidate_cube()
+        else:
+            transaction.on_commit(bump_generation)
+        return len(facts)
+
+    @classmethod
+    def sync_student(cls, student):
+        """Talaba kesimlari o'zgarganda uning qatorlarini yangilash"""
+        from main.stats_cube import invalidate_cube
+
+        updated = cls.objects.filter(student=student).exclude(
+            faculty=student.faculty or '',
+            level=student.level or '',
+            gender=student.gender or '',
+            group_id=student.group_id,
+        ).update(
+            faculty=student.faculty or '',
+            level=student.level or '',
+            gender=student.gender or '',
+            group_id=student.group_id,
+        )
+        if updated:
+            invalidate_cube()
+
+    @classmethod
+    def sync_category(cls, category, deleted=False):
+        """Kategoriya rangi o'zgarganda yoki o'chirilganda qatorlarni yangilash"""
+        color = '' if deleted else category.color
+        cls.objects.filter(category=category).exclude(color=color).update(color=color)
@@ -0,0 +1,348 @@
+"""
+Psixologik natijalar statistikasi (admin grafiklari)
+
+Har bir grafik seriyasi bazada GROUP BY bilan hisoblanadi - natijalar soni
+qancha bo'lishidan qat'i nazar so'rovlar soni o'zgarmas. Shkala agregatlari
+denormallashtirilgan ScaleResultFact jadvalidan JOIN siz o'qiladi, natijalar
+soni (jami va guruhlar) esa natijalar jadvalidan - shkala natijasi yo'q
+natijalar ham sanaladi:
+    - rang taqsimoti va oylar bo'yicha stacked bar (month, Asia/Tashkent)
+    - shkalalar bo'yicha o'rtacha ball va kategoriyalar taqsimoti
+    - fakultet va guruhlar kesimi
+    - so'nggi natijalar jadvali
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.db.models import Count, Min, Prefetch, Q, Sum
+from django.utils import timezone
+
+
+COLORS = ['green', 'yellow', 'orange', 'red']
+COLOR_LABELS = ['Yashil', 'Sariq', "To'q sariq", 'Qizil']
+COLOR_ICONS = {
+    'green': '🟢',
+    'yellow': '🟡',
+    'orange': '🟠',
+    'red': '🔴',
+}
+TIMELINE_MONTHS = 10
+RECENT_LIMIT = 30
+
+
+class StatsFilters(namedtuple('StatsFilters', ['quiz_id', 'faculty', 'level', 'group_id'])):
+    """Sahifa filtrlari (GET parametrlari, bo'sh qator - filtr yo'q)"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_query(cls, params):
+        # Raqam bo'lmagan ID filtri e'tiborsiz qoldiriladi
+        quiz_id, group_id = str(params.get('quiz', '')), str(params.get('group', ''))
+        return cls(
+            quiz_id if quiz_id.isdigit() else '',
+            params.get('faculty', ''),
+            params.get('level', ''),
+            group_id if group_id.isdigit() else '',
+        )
+
+    def lookups(self, prefix=''):
+        """PsychologicalResult (prefix='') yoki unga bog'liq model uchun filtrlar"""
+        lookups = {}
+        if self.quiz_id:
+            lookups[f'{prefix}attempt__quiz__id'] = self.quiz_id
+        if self.faculty:
+            lookups[f'{prefix}attempt__student__faculty'] = self.faculty
+        if self.level:
+            lookups[f'{prefix}attempt__student__level'] = self.level
+        if self.group_id:
+            lookups[f'{prefix}attempt__student__group__id'] = self.group_id
+        return lookups
+
+    def fact_lookups(self):
+        """ScaleResultFact uchun filtrlar (kesimlar jadvalning o'zida)"""
+        lookups = {}
+        if self.quiz_id:
+            lookups['quiz_id'] = self.quiz_id
+        if self.faculty:
+            lookups['faculty'] = self.faculty
+        if self.level:
+            lookups['level'] = self.level
+        if self.group_id:
+            lookups['group_id'] = self.group_id
+        return lookups
+
+
+def faculty_options():
+    from student.models import Student
+    return list(
+        Student.objects.values_list('faculty', flat=True)
+        .distinct().exclude(faculty__isnull=True).exclude(faculty='')
+    )
+
+
+def level_options():
+    from student.models import Student
+    return list(
+        Student.objects.values_list('level', flat=True)
+        .distinct().exclude(level__isnull=True).exclude(level='')
+        .order_by('level')
+    )
+
+
+def group_options():
+    from student.models import StudentGroup
+    return list(StudentGroup.objects.all())
+
+
+def filter_options():
+    """Filtr tanlovlari: (fakultetlar, kurslar, guruhlar)"""
+    return faculty_options(), level_options(), group_options()
+
+
+def _results(filters):
+    from main.models import PsychologicalResult
+    return PsychologicalResult.objects.filter(**filters.lookups())
+
+
+def _facts(filters):
+    from main.models import ScaleResultFact
+    return ScaleResultFact.objects.filter(**filters.fact_lookups())
+
+
+def _color_series(counts, keys):
+    return {color: [counts[key][color] for key in keys] for color in COLORS}
+
+
+def timeline_months(now=None):
+    """Grafikdagi oxirgi oylar boshi (mahalliy vaqt)"""
+    now = timezone.localtime(now)
+    return [
+        (now.replace(day=1) - timedelta(days=i * 30)).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        for i in range(TIMELINE_MONTHS - 1, -1, -1)
+    ]
+
+
+def total_results(filters):
+    """Filtrlangan natijalar soni"""
+    return _results(filters).count()
+
+
+def color_stats(filters, now=None):
+    """
+    Rang taqsimoti va oylar bo'yicha ranglar - bitta GROUP BY
+
+    Qaytaradi: (color_counts, months, timeline)
+        timeline - {rang: [oylar bo'yicha soni]}
+    """
+    now = now or timezone.now()
+    by_month = defaultdict(lambda: defaultdict(int))
+    color_counts = defaultdict(int)
+    for row in _facts(filters).filter(category__isnull=False).values('month', 'color').annotate(
+        count=Count('pk'),
+        # Grafik joriy vaqtgacha
+        until_now=Count('pk', filter=Q(created_at__lt=now)),
+    ).order_by():
+        by_month[row['month']][row['color']] += row['until_now']
+        color_counts[row['color']] += row['count']
+
+    months = timeline_months(now)
+    return color_counts, months, _color_series(by_month, [month.date() for month in months])
+
+
+def scale_stats(filters):
+    """Shkalalar bo'yicha o'rtacha ball va kategoriyalar taqsimoti - ikki so'rov"""
+    from main.models import PsychologicalScale
+
+    scales = PsychologicalScale.objects.filter(quiz__quiz_type='psychological')
+    if filters.quiz_id:
+        scales = scales.filter(quiz__id=filters.quiz_id)
+
+    categories = defaultdict(list)
+    for row in _facts(filters).values('scale_id', 'category__name', 'color').annotate(
+        count=Count('pk'),
+        score=Sum('score'),
+        category_order=Min('category__order'),
+    ).order_by():
+        categories[row['scale_id']].append(row)
+
+    stats = []
+    for scale_id, name in scales.order_by('-quiz__created_at', 'quiz_id', 'order', 'id').values_list('id', 'name'):
+        rows = categories.get(scale_id)
+        if not rows:
+            continue
+        total = sum(row['count'] for row in rows)
+        rows.sort(key=lambda row: (-row['count'], row['category_order'] is None, row['category_order'] or 0))
+        stats.append({
+            'scale_name': name,
+            'total_results': total,
+            'avg_score': round(sum(row['score'] for row in rows) / total, 1),
+            'category_stats': [
+                {
+                    'category_name': row['category__name'] or 'Nomalum',
+                    'color': row['color'] or 'none',
+                    'count': row['count'],
+                    'pct': round(row['count'] / total * 100, 1),
+                }
+                for row in rows
+            ],
+        })
+    return stats
+
+
+def faculty_stats(filters, faculties):
+    """Fakultetlar bo'yicha ranglar (rangli natijasi yo'q fakultet tushiriladi)"""
+    counts = defaultdict(lambda: defaultdict(int))
+    for row in _facts(filters).filter(category__isnull=False).values('faculty', 'color').annotate(
+        count=Count('pk'),
+    ).order_by():
+        counts[row['faculty']][row['color']] += row['count']
+
+    shown = [faculty for faculty in faculties if sum(counts[faculty].values())]
+    return {
+        'labels': [faculty[:15] + '…' if len(faculty) > 15 else faculty for faculty in shown],
+        **_color_series(counts, shown),
+    }
+
+
+def group_stats(filters, groups):
+    """Guruhlar bo'yicha natijalar soni"""
+    counts = dict(
+        _results(filters).values('attempt__student__group').annotate(count=Count('pk'))
+        .order_by().values_list('attempt__student__group', 'count')
+    )
+    shown = [group for group in groups if counts.get(group.pk)]
+    return {
+        'labels': [group.group_name[:12] for group in shown],
+        'values': [counts[group.pk] for group in shown],
+    }
+
+
+class DatabaseSource:
+    """
+    Bazadan hisoblovchi manba - main.stats_cube.StatsCube bilan bir xil
+    interfeys (total_results, color_stats, scale_stats, faculty_stats, group_stats)
+    """
+
+    total_results = staticmethod(total_results)
+    color_stats = staticmethod(color_stats)
+    scale_stats = staticmethod(scale_stats)
+    faculty_stats = staticmethod(faculty_stats)
+    group_stats = staticmethod(group_stats)
+
+
+DATABASE_SOURCE = DatabaseSource()
+
+
+def _percentages(color_counts):
+    total = sum(color_counts.values()) or 1
+    return {color: round(color_counts[color] / total * 100, 1) for color in COLORS}
+
+
+def color_dataset(filters, source, now=None):
+    """Xulosa kartalari va rang taqsimoti"""
+    color_counts, _, _ = source.color_stats(filters, now)
+    percentages = _percentages(color_counts)
+    return {
+        'total_results': source.total_results(filters),
+        'color_counts': {color: color_counts[color] for color in COLORS},
+        'color_percentages': percentages,
+        'color_chart': {
+            'labels': COLOR_LABELS,
+            'values': [color_counts[color] for color in COLORS],
+            'percentages': [percentages[color] for color in COLORS],
+        },
+    }
+
+
+def timeline_dataset(filters, source, now=None):
+    """Oylar bo'yicha ranglar"""
+    _, months, timeline = source.color_stats(filters, now)
+    return {'timeline_chart': {'labels': [month.strftime('%b %Y') for month in months], **timeline}}
+
+
+def scale_dataset(filters, source, now=None):
+    """Shkalalar grafigi va kartalari"""
+    scales = source.scale_stats(filters)
+    return {
+        'scale_stats': scales,
+        'scale_chart': {
+            'labels': [stat['scale_name'][:25] for stat in scales],
+            'avg_scores': [stat['avg_score'] for stat in scales],
+        },
+    }
+
+
+def faculty_dataset(filters, source, now=None):
+    return {'faculty_chart': source.faculty_stats(filters, faculty_options())}
+
+
+def group_dataset(filters, source, now=None):
+    return {'group_chart': source.group_stats(filters, group_options())}
+
+
+def recent_results(filters, limit=RECENT_LIMIT):
+    """So'nggi natijalar jadvali (rang teglari bilan) - ikki so'rov"""
+    from main.models import PsychologicalScaleResult
+
+    results = _results(filters).select_related(
+        'attempt__student__group',
+        'attempt__quiz',
+    ).prefetch_related(
+        Prefetch(
+            'scale_results',
+            queryset=PsychologicalScaleResult.objects.select_related('category').order_by('pk'),
+        )
+    ).order_by('-created_at')[:limit]
+
+    recent = []
+    for result in results:
+        student = result.attempt.student
+        group = student.group
+        tags = [
+            {
+                'color': scale_result.category.color,
+                'icon': COLOR_ICONS.get(scale_result.category.color, '⚪'),
+                'label': scale_result.category.name,
+            }
+            for scale_result in result.scale_results.all()
+            if scale_result.category
+        ]
+        recent.append({
+            'id': result.id,
+            'student_name': student.student_name or '-',
+            'faculty': student.faculty or '-',
+            'group_name': group.group_name if group else '-',
+            'quiz_title': result.attempt.quiz.title,
+            'color_tags': tags[:4],
+            'created_at': result.created_at.strftime('%d.%m.%Y %H:%M') if result.created_at else '-',
+        })
+    return recent
+
+
+def recent_dataset(filters, source, now=None):
+    """So'nggi natijalar (har doim bazadan)"""
+    return {'recent_results': recent_results(filters)}
+
+
+# Sahifa alohida yuklaydigan ma'lumot to'plamlari
+DATASETS = {
+    'color': color_dataset,
+    'timeline': timeline_dataset,
+    'scale': scale_dataset,
+    'faculty': faculty_dataset,
+    'group': group_dataset,
+    'recent': recent_dataset,
+}
+
+
+def dataset(name, filters, source=None, now=None):
+    """
+    Bitta ma'lumot to'plami (JSON ga tayyor)
+
+    source - DatabaseSource bilan bir xil interfeysli manba
+    (main.stats_cube.StatsCube), None bo'lsa baza (DATABASE_SOURCE).
+    """
+    return DATASETS[name](filters, source or DATABASE_SOURCE, now)
@@ -0,0 +1,34 @@
+"""
+Test topshirish sahifasi uchun oldindan render qilingan savollar
+
+Savollar va variantlar HTML qismi test kontent versiyasi bo'yicha bir marta
+render qilinib keshlanadi. Urinishga bog'liq qismlar (tanlangan javoblar,
+qolgan vaqt, urinish ID) sahifada alohida qo'shiladi.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+
+def _cache_key(quiz):
+    return f'quiz_payload:{quiz.pk}:{quiz.content_version}'
+
+
+def build_quiz_payload(quiz):
+    """Savollar va navigatsiya HTML qismlarini render qilish"""
+    questions = list(quiz.questions.prefetch_related('options').order_by('order'))
+    return {
+        'questions_html': render_to_string('partials/quiz_questions.html', {'questions': questions}),
+        'nav_html': render_to_string('partials/quiz_nav_dots.html', {'questions': questions}),
+        'total_questions': len(questions),
+    }
+
+
+def get_quiz_payload(quiz):
+    """Keshdan olish yoki render qilib keshga yozish"""
+    key = _cache_key(quiz)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_quiz_payload(quiz)
+        cache.set(key, payload, getattr(settings, 'QUIZ_PAYLOAD_CACHE_TIMEOUT', 60 * 60 * 24))
+    return payload
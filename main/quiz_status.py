@@ -0,0 +1,81 @@
+"""
+Talaba bo'yicha testlar holati xaritasi
+
+    quiz_id -> QuizStatus(oxirgi urinish, holati, urinishlar soni,
+                          eng yaxshi foiz, faol urinish, oxirgi natija)
+
+Xarita bitta window-function so'rovi bilan hisoblanadi va talaba bo'yicha
+keshlanadi. Urinish yaratilganda/yakunlanganda yoki natija yozilganda kesh
+o'chiriladi (commitdan keyin; main.signals, main.scoring, main.expiry).
+Test ro'yxatlari sahifadagi testlar sonidan qat'i nazar o'zgarmas
+so'rovlar soni bilan ishlaydi.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, When, Window
+from django.db.models.functions import RowNumber
+
+
+# Shablonlardagi quiz.student_attempt.result.percentage uchun
+LatestResult = namedtuple('LatestResult', ['percentage', 'passed'])
+
+
+class QuizStatus(namedtuple('QuizStatus', [
+    'id', 'status', 'attempt_count', 'best_percentage', 'in_progress_attempt_id', 'result',
+])):
+    """Bitta test bo'yicha holat (id, status - oxirgi urinishniki)"""
+
+    __slots__ = ()
+
+
+def _cache_key(student_id):
+    return f'quiz_status:{student_id}'
+
+
+def build_quiz_status_map(student_id):
+    """Holat xaritasini bazadan hisoblash (bitta so'rov)"""
+    from main.models import QuizAttempt
+
+    partition = [F('quiz_id')]
+    rows = QuizAttempt.objects.filter(student_id=student_id).annotate(
+        row_number=Window(RowNumber(), partition_by=partition, order_by=[F('started_at').desc(), F('id').desc()]),
+        attempt_count=Window(Count('id'), partition_by=partition),
+        best_percentage=Window(Max('result__percentage'), partition_by=partition),
+        in_progress_attempt_id=Window(
+            Max(Case(When(status='in_progress', then=F('id')))),
+            partition_by=partition,
+        ),
+    ).filter(row_number=1).values_list(
+        'quiz_id', 'id', 'status', 'attempt_count', 'best_percentage',
+        'in_progress_attempt_id', 'result__percentage', 'result__passed',
+    )
+
+    return {
+        quiz_id: QuizStatus(
+            attempt_id, status, attempt_count, best_percentage, in_progress_attempt_id,
+            LatestResult(percentage, passed) if percentage is not None else None,
+        )
+        for (
+            quiz_id, attempt_id, status, attempt_count, best_percentage,
+            in_progress_attempt_id, percentage, passed,
+        ) in rows
+    }
+
+
+def get_quiz_status_map(student):
+    """Keshlangan holat xaritasi"""
+    key = _cache_key(student.pk)
+    status_map = cache.get(key)
+    if status_map is None:
+        status_map = build_quiz_status_map(student.pk)
+        cache.set(key, status_map, getattr(settings, 'QUIZ_STATUS_CACHE_TIMEOUT', 60 * 60))
+    return status_map
+
+
+def invalidate_quiz_status(student_ids):
+    """Talabalar holat xaritasini commitdan keyin keshdan o'chirish (bekor qilingan tranzaksiya keshga tegmaydi)"""
+    keys = [_cache_key(student_id) for student_id in set(student_ids)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,149 @@
+"""
+Test bo'yicha yakunlangan urinishlarni qayta baholash
+
+Admin savol/variant yoki kategoriya oralig'ini tuzatgandan keyin eski
+natijalar eskirib qoladi. Urinishlar bo'laklarga (chunk) bo'linadi, har bir
+bo'lak uchun:
+    1. javoblar joriy javob kalitidan qayta hisoblanadi (bulk_update)
+    2. natijalar set-based yo'l bilan qayta yoziladi (main.scoring)
+Bo'laklar ixtiyoriy ravishda jarayonlar hovuzida parallel ishlaydi.
+dry_run rejimida bo'lak tranzaksiyasi bekor qilinadi, faqat farqlar qaytadi.
+"""
+from django.db import transaction
+
+
+def _result_snapshot(quiz, attempt_ids):
+    """Urinishlar natijalarining solishtirish uchun ixcham ko'rinishi"""
+    from main.models import Result, PsychologicalScaleResult
+
+    if quiz.is_standard():
+        return {
+            attempt_id: (correct_answers, total_score, str(percentage), passed)
+            for attempt_id, correct_answers, total_score, percentage, passed in Result.objects.filter(
+                attempt_id__in=attempt_ids
+            ).values_list('attempt_id', 'correct_answers', 'total_score', 'percentage', 'passed')
+        }
+
+    snapshot = {}
+    for attempt_id, scale_id, total_score, category_id in PsychologicalScaleResult.objects.filter(
+        result__attempt_id__in=attempt_ids
+    ).values_list('result__attempt_id', 'scale_id', 'total_score', 'category_id'):
+        snapshot.setdefault(attempt_id, {})[scale_id] = (total_score, category_id)
+    return snapshot
+
+
+def rescore_chunk(quiz_id, attempt_ids, dry_run=False):
+    """
+    Bitta bo'lakni qayta baholash
+
+    Qaytaradi: {'attempts', 'responses_changed', 'results_changed', 'diffs'}
+    """
+    from main.models import Quiz, QuizAttempt, UserResponse
+    from main.scoring import score_attempts
+
+    quiz = Quiz.objects.get(pk=quiz_id)
+    answer_key = quiz.get_answer_key()
+    is_standard = quiz.is_standard()
+
+    with transaction.atomic():
+        attempts = list(
+            QuizAttempt.objects.filter(pk__in=attempt_ids).select_related('quiz')
+        )
+        before = _result_snapshot(quiz, attempt_ids)
+
+        changed = []
+        for response in UserResponse.objects.filter(
+            attempt_id__in=attempt_ids,
+            selected_option__isnull=False,
+        ).only('id', 'question_id', 'selected_option_id', 'is_correct', 'earned_score'):
+            option = answer_key.lookup(response.question_id, response.selected_option_id)
+            if option is None:
+                continue
+            is_correct, earned_score = UserResponse.evaluate(
+                is_standard, option.is_correct, option.score, option.psychological_score
+            )
+            if (is_correct, earned_score) != (response.is_correct, response.earned_score):
+                response.is_correct = is_correct
+                response.earned_score = earned_score
+                changed.append(response)
+        UserResponse.objects.bulk_update(changed, ['is_correct', 'earned_score'], batch_size=1000)
+
+        score_attempts(attempts)
+        after = _result_snapshot(quiz, attempt_ids)
+
+        diffs = [
+            (attempt_id, before.get(attempt_id), after.get(attempt_id))
+            for attempt_id in sorted(after)
+            if before.get(attempt_id) != after.get(attempt_id)
+        ]
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return {
+        'attempts': len(attempts),
+        'responses_changed': len(changed),
+        'results_changed': len(diffs),
+        'diffs': diffs,
+    }
+
+
+def _rescore_chunk_args(args):
+    return rescore_chunk(*args)
+
+
+def _init_worker():
+    import django
+    from django.db import connections
+
+    django.setup()
+    # Ota jarayondan meros qolgan ulanishlar ishlatilmaydi
+    connections.close_all()
+
+
+def finished_attempt_ids(quiz_id):
+    from main.models import QuizAttempt
+
+    return list(
+        QuizAttempt.objects.filter(
+            quiz_id=quiz_id,
+            status__in=['completed', 'expired'],
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def rescore_quiz(quiz_id, chunk_size=1000, workers=1, dry_run=False, progress=None):
+    """
+    Testning barcha yakunlangan urinishlarini qayta baholash
+
+    progress(chunk_stats, done, total) - har bir bo'lakdan keyin chaqiriladi
+    Qaytaradi: umumiy statistika (diffs - barcha farqlar ro'yxati)
+    """
+    attempt_ids = finished_attempt_ids(quiz_id)
+    chunks = [
+        (quiz_id, attempt_ids[i:i + chunk_size], dry_run)
+        for i in range(0, len(attempt_ids), chunk_size)
+    ]
+
+    totals = {'attempts': 0, 'responses_changed': 0, 'results_changed': 0, 'diffs': []}
+
+    def collect(stats):
+        for key in ('attempts', 'responses_changed', 'results_changed'):
+            totals[key] += stats[key]
+        totals['diffs'].extend(stats['diffs'])
+        if progress:
+            progress(stats, totals['attempts'], len(attempt_ids))
+
+    if workers > 1 and len(chunks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from django.db import connections
+
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for stats in pool.map(_rescore_chunk_args, chunks):
+                collect(stats)
+    else:
+        for chunk in chunks:
+            collect(rescore_chunk(*chunk))
+
+    return totals
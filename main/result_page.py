@@ -0,0 +1,54 @@
+"""
+Yakunlangan urinishlar natija sahifasi snapshoti
+
+Yakunlangan urinish natijasi o'zgarmaydi: sahifa bir marta render qilinib
+urinish ID, test kontent versiyasi va urinishning baholash versiyasi
+(QuizAttempt.score_version) bo'yicha keshlanadi va kuchli ETag bilan beriladi
+(If-None-Match -> 304). Qayta baholash (main.scoring) versiyani bazada
+oshiradi - kalit barcha worker'lar uchun bir vaqtda o'zgaradi, commitdan oldin
+eski natija bilan yozilgan snapshot yangi kalit ostida qo'llanilmaydi.
+Eski snapshot commitdan keyin o'chiriladi.
+"""
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+
+ResultSnapshot = namedtuple('ResultSnapshot', ['etag', 'content'])
+
+
+def _cache_key(attempt):
+    return f'result_page:{attempt.pk}:{attempt.quiz.content_version}:{attempt.score_version}'
+
+
+def get_result_snapshot(attempt):
+    """Keshdagi snapshot yoki None"""
+    return cache.get(_cache_key(attempt))
+
+
+def store_result_snapshot(attempt, content):
+    """Render qilingan sahifani keshga yozish"""
+    snapshot = ResultSnapshot(f'"{hashlib.sha256(content).hexdigest()[:32]}"', content)
+    cache.set(
+        _cache_key(attempt),
+        snapshot,
+        getattr(settings, 'RESULT_PAGE_CACHE_TIMEOUT', 60 * 60 * 24 * 7),
+    )
+    return snapshot
+
+
+def invalidate_result_pages(attempts):
+    """Qayta baholangan urinishlar: baholash versiyasi oshiriladi, eski snapshotlar commitdan keyin o'chiriladi"""
+    from main.models import QuizAttempt
+
+    stale_keys = [_cache_key(attempt) for attempt in attempts]
+    QuizAttempt.objects.filter(pk__in=[attempt.pk for attempt in attempts]).update(
+        score_version=F('score_version') + 1
+    )
+    for attempt in attempts:
+        attempt.score_version += 1
+    transaction.on_commit(lambda: cache.delete_many(stale_keys))
@@ -0,0 +1,156 @@
+"""
+Psixologik shkalalar ishonchliligi va normalari
+
+Har bir psixologik test uchun (NumPy):
+    - Cronbach alfa va tuzatilgan savol-umumiy ball korrelyatsiyalari
+      (urinishlar x savollar ballari matritsasidan)
+    - kogortalar (barcha, fakultet, kurs, jins) bo'yicha norma jadvallari:
+      har bir ball uchun persentil rangi, o'rtacha va standart og'ish
+Natijalar ScaleStatistics va ScaleNorm jadvallariga yoziladi
+(`manage.py compute_scale_norms`), sahifalar faqat tayyor massivni o'qiydi.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+FINISHED_STATUSES = ['completed', 'expired']
+
+# Norma jadvali kogortalari: cohort_type -> Student maydoni
+COHORT_FIELDS = {
+    'faculty': 'faculty',
+    'level': 'level',
+    'gender': 'gender',
+}
+
+
+def _float(value, digits=4):
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def cronbach_alpha(matrix):
+    """matrix - (respondentlar x savollar) ballar"""
+    n_items = matrix.shape[1]
+    if n_items < 2 or matrix.shape[0] < 2:
+        return None
+    total_variance = matrix.sum(axis=1).var(ddof=1)
+    if total_variance == 0:
+        return None
+    return n_items / (n_items - 1) * (1 - matrix.var(axis=0, ddof=1).sum() / total_variance)
+
+
+def item_total_correlations(matrix):
+    """Har bir savol va qolgan savollar yig'indisi korrelyatsiyasi"""
+    totals = matrix.sum(axis=1)
+    rest = totals[:, None] - matrix
+    covariance = (matrix * rest).mean(axis=0) - matrix.mean(axis=0) * rest.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return covariance / (matrix.std(axis=0) * rest.std(axis=0))
+
+
+def norm_table(scores):
+    """
+    Ballar massividan norma jadvali
+
+    Persentil rangi: (kichik ballar soni + teng ballar sonining yarmi) / n * 100
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    min_score = int(scores.min())
+    counts = np.bincount(scores - min_score)
+    below = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    percentiles = (below + counts / 2) / len(scores) * 100
+    return {
+        'size': len(scores),
+        'mean': float(scores.mean()),
+        'std': float(scores.std()),
+        'min_score': min_score,
+        'percentiles': [round(float(value), 1) for value in percentiles],
+    }
+
+
+def compute_quiz_statistics(quiz):
+    """Test shkalalari uchun ishonchlilik va normalarni hisoblab saqlash"""
+    from main.models import UserResponse, PsychologicalScaleResult, ScaleStatistics, ScaleNorm
+
+    answer_key = quiz.get_answer_key()
+    scale_questions = defaultdict(list)
+    for question_id, (_, scale_id) in sorted(answer_key.questions.items()):
+        if scale_id is not None:
+            scale_questions[scale_id].append(question_id)
+
+    # Javoblar matritsasi (javobsiz savol - 0 ball, baholashdagidek)
+    question_ids = np.array(sorted(answer_key.questions), dtype=np.int64)
+    attempts = []
+    questions = []
+    scores = []
+    for attempt_id, question_id, earned_score in UserResponse.objects.filter(
+        attempt__quiz=quiz,
+        attempt__status__in=FINISHED_STATUSES,
+    ).values_list('attempt_id', 'question_id', 'earned_score').order_by().iterator(chunk_size=10000):
+        attempts.append(attempt_id)
+        questions.append(question_id)
+        scores.append(earned_score)
+
+    attempt_ids, row_index = np.unique(np.array(attempts, dtype=np.int64), return_inverse=True)
+    matrix = np.zeros((len(attempt_ids), len(question_ids)), dtype=np.float64)
+    if attempts:
+        matrix[row_index, np.searchsorted(question_ids, np.array(questions, dtype=np.int64))] = scores
+
+    statistics = []
+    for scale_id in answer_key.scales:
+        columns = np.searchsorted(question_ids, np.array(scale_questions[scale_id], dtype=np.int64))
+        sub = matrix[:, columns]
+        correlations = item_total_correlations(sub) if len(sub) else []
+        statistics.append(ScaleStatistics(
+            scale_id=scale_id,
+            respondents=len(sub),
+            cronbach_alpha=_float(cronbach_alpha(sub)),
+            item_total={
+                str(question_id): _float(correlation)
+                for question_id, correlation in zip(scale_questions[scale_id], correlations)
+            },
+        ))
+
+    # Normalar - saqlangan shkala natijalaridan
+    cohort_scores = defaultdict(list)
+    for row in PsychologicalScaleResult.objects.filter(
+        result__attempt__quiz=quiz,
+        result__attempt__status__in=FINISHED_STATUSES,
+    ).values_list(
+        'scale_id', 'total_score',
+        *[f'result__attempt__student__{field}' for field in COHORT_FIELDS.values()]
+    ).iterator(chunk_size=10000):
+        scale_id, total_score = row[0], row[1]
+        cohort_scores[(scale_id, 'all', '')].append(total_score)
+        for cohort_type, value in zip(COHORT_FIELDS, row[2:]):
+            cohort_scores[(scale_id, cohort_type, value or '')].append(total_score)
+
+    min_size = getattr(settings, 'SCALE_NORM_MIN_COHORT', 20)
+    norms = [
+        ScaleNorm(scale_id=scale_id, cohort_type=cohort_type, cohort_value=value, **norm_table(values))
+        for (scale_id, cohort_type, value), values in cohort_scores.items()
+        if len(values) >= min_size
+    ]
+
+    with transaction.atomic():
+        ScaleStatistics.objects.bulk_create(
+            statistics,
+            update_conflicts=True,
+            unique_fields=['scale'],
+            update_fields=['respondents', 'cronbach_alpha', 'item_total', 'computed_at'],
+        )
+        # Kichrayib qolgan kogortalar normasi o'chiriladi
+        ScaleNorm.objects.filter(scale__quiz=quiz).delete()
+        ScaleNorm.objects.bulk_create(norms)
+
+    return len(statistics), len(norms)
+
@@ -0,0 +1,161 @@
+"""
+Urinishlarni baholash
+
+Standart test natijasi javob kalitidan (savol ballari va maksimal ball
+oldindan hisoblangan) va urinish javoblaridan hisoblanadi. Bitta yoki
+bir nechta urinish uchun so'rovlar soni o'zgarmas: bitta javoblar
+so'rovi va bitta upsert (`manage.py bench_scoring` bilan tekshiriladi).
+Psixologik testlarda shkalalar soni ham so'rovlar soniga ta'sir qilmaydi.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from main.quiz_status import invalidate_quiz_status
+from main.result_page import invalidate_result_pages
+
+
+def standard_result_fields(attempt, answer_key, responses):
+    """
+    Result maydonlarini javoblar va javob kalitidan hisoblash
+
+    responses - (question_id, is_correct, selected_option_id) kortejlari
+    """
+    total_questions = answer_key.total_questions
+    correct_answers = 0
+    wrong_answers = 0
+    total_score = 0
+    for question_id, is_correct, selected_option_id in responses:
+        if is_correct:
+            correct_answers += 1
+            question = answer_key.questions.get(question_id)
+            if question:
+                total_score += question[0]
+        elif selected_option_id is not None:
+            wrong_answers += 1
+
+    max_score = answer_key.max_score
+    percentage = (total_score / max_score * 100) if max_score > 0 else 0
+    return {
+        'total_questions': total_questions,
+        'correct_answers': correct_answers,
+        'wrong_answers': wrong_answers,
+        'unanswered': total_questions - len(responses),
+        'total_score': total_score,
+        'max_score': max_score,
+        'percentage': Decimal(str(round(percentage, 2))),
+        'passed': percentage >= attempt.quiz.passing_score,
+    }
+
+
+def score_standard_attempts(attempts):
+    """Standart test urinishlarini bitta so'rov + bitta upsert bilan baholash"""
+    from main.models import UserResponse, Result, StudentStats
+
+    if not attempts:
+        return []
+
+    responses = defaultdict(list)
+    for attempt_id, question_id, is_correct, selected_option_id in UserResponse.objects.filter(
+        attempt__in=attempts
+    ).values_list('attempt_id', 'question_id', 'is_correct', 'selected_option_id'):
+        responses[attempt_id].append((question_id, is_correct, selected_option_id))
+
+    results = [
+        Result(
+            attempt=attempt,
+            **standard_result_fields(attempt, attempt.quiz.get_answer_key(), responses[attempt.pk])
+        )
+        for attempt in attempts
+    ]
+
+    fields = [
+        'total_questions', 'correct_answers', 'wrong_answers', 'unanswered',
+        'total_score', 'max_score', 'percentage', 'passed',
+    ]
+    Result.objects.bulk_create(
+        results,
+        update_conflicts=True,
+        unique_fields=['attempt'],
+        update_fields=fields,
+    )
+    StudentStats.refresh_results(attempt.student_id for attempt in attempts)
+    invalidate_quiz_status(attempt.student_id for attempt in attempts)
+    invalidate_result_pages(attempts)
+    return results
+
+
+def score_psychological_attempts(attempts):
+    """
+    Psixologik test urinishlarini shkalalar sonidan qat'i nazar baholash
+
+    Shkala ballari bitta GROUP BY so'rovi bilan olinadi, kategoriya javob
+    kalitidagi oraliqlar jadvalidan aniqlanadi, natijalar va shkala
+    natijalari ikkita upsert bilan yoziladi, analitika jadvali
+    (ScaleResultFact) shu natijalar uchun qayta yoziladi.
+    """
+    from django.db.models import Count, Sum
+    from main.models import (
+        UserResponse, PsychologicalResult, PsychologicalScaleResult, ScaleResultFact, StudentStats,
+    )
+
+    if not attempts:
+        return []
+
+    answered = defaultdict(int)
+    scale_totals = defaultdict(dict)
+    for row in UserResponse.objects.filter(attempt__in=attempts).values(
+        'attempt_id', 'question__psychological_scale_id'
+    ).annotate(
+        count=Count('id'),
+        total=Sum('earned_score'),
+    ).order_by():
+        answered[row['attempt_id']] += row['count']
+        if row['question__psychological_scale_id'] is not None:
+            scale_totals[row['attempt_id']][row['question__psychological_scale_id']] = row['total']
+
+    results = []
+    for attempt in attempts:
+        total_questions = attempt.quiz.get_answer_key().total_questions
+        results.append(PsychologicalResult(
+            attempt=attempt,
+            total_questions=total_questions,
+            answered_questions=answered[attempt.pk],
+            unanswered=total_questions - answered[attempt.pk],
+        ))
+    PsychologicalResult.objects.bulk_create(
+        results,
+        update_conflicts=True,
+        unique_fields=['attempt'],
+        update_fields=['total_questions', 'answered_questions', 'unanswered'],
+    )
+
+    scale_results = []
+    for result in results:
+        answer_key = result.attempt.quiz.get_answer_key()
+        totals = scale_totals[result.attempt_id]
+        for scale_id in answer_key.scales:
+            total_score = totals.get(scale_id, 0)
+            scale_results.append(PsychologicalScaleResult(
+                result_id=result.pk,
+                scale_id=scale_id,
+                total_score=total_score,
+                category_id=answer_key.resolve_category(scale_id, total_score),
+            ))
+    if scale_results:
+        PsychologicalScaleResult.objects.bulk_create(
+            scale_results,
+            update_conflicts=True,
+            unique_fields=['result', 'scale'],
+            update_fields=['total_score', 'category'],
+        )
+    ScaleResultFact.refresh(result.pk for result in results)
+    StudentStats.refresh_results(attempt.student_id for attempt in attempts)
+    invalidate_quiz_status(attempt.student_id for attempt in attempts)
+    invalidate_result_pages(attempts)
+    return results
+
+
+def score_attempts(attempts):
+    """Urinishlarni test turiga qarab baholash (quiz select_related bo'lishi kerak)"""
+    score_standard_attempts([attempt for attempt in attempts if attempt.quiz.is_standard()])
+    score_psychological_attempts([attempt for attempt in attempts if attempt.quiz.is_psychological()])
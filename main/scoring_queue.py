@@ -0,0 +1,133 @@
+"""
+Baholash navbati
+
+Test yakunlanganda natija so'rov ichida hisoblanmaydi: urinish navbatga
+qo'yiladi va fon jarayoni (`manage.py process_scoring_queue`) navbatdagi
+urinishlarni guruh-guruh qilib set-based yo'l bilan baholaydi.
+
+Navbat Redis to'plamida saqlanadi. Redis sozlanmagan bo'lsa (testlar,
+lokal ishga tushirish) urinish darhol shu jarayonda baholanadi.
+Navbatdan yo'qolgan urinishlar (masalan, worker to'xtab qolsa) natijasiz
+yakunlangan urinishlar sifatida bazadan topilib qayta baholanadi.
+"""
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+FINISHED_STATUSES = ['completed', 'expired']
+
+
+class LocalScoringQueue:
+    """Navbatsiz - urinish shu jarayonda darhol baholanadi"""
+
+    def enqueue(self, attempts):
+        from main.scoring import score_attempts
+        score_attempts(attempts)
+
+    def claim(self, limit):
+        return []
+
+    def depth(self):
+        return 0
+
+
+class RedisScoringQueue:
+    """Redis to'plami - barcha app node'lari va worker'lar uchun umumiy"""
+
+    PENDING_KEY = 'quiz:scoring:pending'
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def enqueue(self, attempts):
+        self.client.sadd(self.PENDING_KEY, *[attempt.pk for attempt in attempts])
+
+    def claim(self, limit):
+        # SPOP atomar - bitta urinishni ikki worker olmaydi
+        return [int(attempt_id) for attempt_id in self.client.spop(self.PENDING_KEY, limit) or []]
+
+    def depth(self):
+        return self.client.scard(self.PENDING_KEY)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_scoring_queue():
+    """Sozlamalarga qarab navbat obyektini qaytarish"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                url = getattr(settings, 'QUIZ_SCORING_QUEUE_URL', '')
+                _queue = RedisScoringQueue(url) if url else LocalScoringQueue()
+    return _queue
+
+
+def enqueue_scoring(attempts):
+    """Yakunlangan urinishlarni baholash navbatiga qo'yish"""
+    if attempts:
+        get_scoring_queue().enqueue(attempts)
+
+
+def _score_ids(attempt_ids):
+    from main.models import QuizAttempt
+    from main.scoring import score_attempts
+
+    attempts = list(
+        QuizAttempt.objects.filter(
+            pk__in=attempt_ids,
+            status__in=FINISHED_STATUSES,
+        ).select_related('quiz')
+    )
+    score_attempts(attempts)
+    return len(attempts)
+
+
+def process_pending(batch_size=200):
+    """
+    Navbatdagi urinishlarni guruhlab baholash
+
+    Qaytaradi: baholangan urinishlar soni
+    """
+    queue = get_scoring_queue()
+    total = 0
+    while True:
+        attempt_ids = queue.claim(batch_size)
+        if not attempt_ids:
+            return total
+        total += _score_ids(attempt_ids)
+
+
+def unscored_attempts(older_than=None):
+    """Natijasi yo'q yakunlangan urinishlar"""
+    from main.models import QuizAttempt
+
+    attempts = QuizAttempt.objects.filter(status__in=FINISHED_STATUSES).filter(
+        Q(quiz__quiz_type='standard', result__isnull=True)
+        | Q(quiz__quiz_type='psychological', psychological_result__isnull=True)
+    )
+    if older_than is not None:
+        attempts = attempts.filter(completed_at__lt=timezone.now() - timedelta(seconds=older_than))
+    return attempts
+
+
+def reconcile(batch_size=200, older_than=60):
+    """
+    Navbatdan yo'qolgan urinishlarni baholash
+
+    older_than - yaqinda yakunlangan (hali navbatda bo'lishi mumkin) urinishlar
+    o'tkazib yuboriladi. Qaytaradi: baholangan urinishlar soni
+    """
+    attempt_ids = list(unscored_attempts(older_than).order_by('pk').values_list('pk', flat=True))
+    total = 0
+    for i in range(0, len(attempt_ids), batch_size):
+        total += _score_ids(attempt_ids[i:i + batch_size])
+    return total
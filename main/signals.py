@@ -0,0 +1,98 @@
+"""
+Model signallari - test kontenti o'zgarganda versiyani oshirish,
+urinish/natija o'zgarganda talaba holat xaritasini eskirtirish,
+urinish/natija o'chirilganda talaba hisoblagichlarini qayta qurish,
+talaba/kategoriya o'zgarganda analitika jadvalini to'g'rilash
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .answer_key import bump_quiz_version
+from .models import (
+    Question, Option, PsychologicalScale, PsychologicalCategory,
+    QuizAttempt, Result, PsychologicalResult, ScaleResultFact, StudentStats,
+)
+from .quiz_status import invalidate_quiz_status
+from .stats_cube import invalidate_cube
+from student.models import Student
+
+
+def _quiz_id_for(instance):
+    """O'zgargan obyekt qaysi testga tegishli"""
+    if isinstance(instance, (Question, PsychologicalScale)):
+        return instance.quiz_id
+    if isinstance(instance, Option):
+        return Question.objects.filter(pk=instance.question_id).values_list('quiz_id', flat=True).first()
+    if isinstance(instance, PsychologicalCategory):
+        return PsychologicalScale.objects.filter(pk=instance.scale_id).values_list('quiz_id', flat=True).first()
+    return None
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Option)
+@receiver(post_save, sender=PsychologicalScale)
+@receiver(post_save, sender=PsychologicalCategory)
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Option)
+@receiver(post_delete, sender=PsychologicalScale)
+@receiver(post_delete, sender=PsychologicalCategory)
+def quiz_content_changed(sender, instance, **kwargs):
+    """Kontent o'zgardi - javob kaliti va keshlangan sahifalar eskiradi"""
+    bump_quiz_version(_quiz_id_for(instance))
+    if isinstance(instance, (PsychologicalScale, PsychologicalCategory)):
+        invalidate_cube()
+
+
+@receiver(post_save, sender=QuizAttempt)
+@receiver(post_delete, sender=QuizAttempt)
+def quiz_attempt_changed(sender, instance, **kwargs):
+    """Urinish yaratildi/yakunlandi/o'chirildi"""
+    invalidate_quiz_status([instance.student_id])
+
+
+def _rebuild_student_stats(student_id):
+    """
+    Hisoblagichlar faqat oshiriladi - o'chirishdan keyin talaba statistikasi
+    bazadan qayta quriladi (commitdan keyin, talaba ham o'chirilgan bo'lsa - yo'q)
+    """
+    def rebuild():
+        StudentStats.rebuild(Student.objects.filter(pk=student_id).values_list('pk', flat=True))
+    transaction.on_commit(rebuild)
+
+
+@receiver(post_delete, sender=QuizAttempt)
+def quiz_attempt_deleted(sender, instance, **kwargs):
+    _rebuild_student_stats(instance.student_id)
+
+
+@receiver(post_delete, sender=Result)
+@receiver(post_delete, sender=PsychologicalResult)
+def result_deleted(sender, instance, **kwargs):
+    """Natija o'chirildi (yozish main.scoring da bulk upsert bilan)"""
+    student_id = QuizAttempt.objects.filter(pk=instance.attempt_id).values_list('student_id', flat=True).first()
+    if student_id:
+        invalidate_quiz_status([student_id])
+        _rebuild_student_stats(student_id)
+    if isinstance(instance, PsychologicalResult):
+        invalidate_cube()
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, created, **kwargs):
+    """Fakultet/kurs/guruh/jins analitika qatorlarida ham yangilanadi"""
+    if not created:
+        ScaleResultFact.sync_student(instance)
+
+
+@receiver(post_save, sender=PsychologicalCategory)
+def category_changed(sender, instance, created, **kwargs):
+    """Kategoriya rangi analitika qatorlarida ham yangilanadi"""
+    if not created:
+        ScaleResultFact.sync_category(instance)
+
+
+@receiver(pre_delete, sender=PsychologicalCategory)
+def category_deleted(sender, instance, **kwargs):
+    """O'chirilgan kategoriya qatorlari rangsiz qoladi (SET_NULL)"""
+    ScaleResultFact.sync_category(instance, deleted=True)
@@ -0,0 +1,118 @@
+"""
+Psixologik statistika sahifasi keshi (stale-while-revalidate)
+
+Sahifa ma'lumotlari to'plam nomi va normallashtirilgan filtrlar bo'yicha
+keshlanadi. Yozuv SOFT_TIMEOUT dan eskirsa yoki yangi natija yozilib avlod
+(generation) raqami oshsa, faqat bitta worker (cache.add qulfi) qayta
+hisoblaydi, qolganlari shu vaqtda eski qiymatni oladi. Kesh bo'sh bo'lsa qulfni
+ololmagan so'rovlar qisqa vaqt hisoblangan qiymatni kutadi.
+Hisoblagichlar: metrics().
+"""
+import hashlib
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+GENERATION_KEY = 'psych_stats:generation'
+METRICS = ('hit', 'stale', 'miss', 'refresh', 'wait')
+
+# Qulfni ololmagan so'rov kesh bo'sh bo'lsa shu oraliqda tekshiradi
+WAIT_STEP = 0.1
+
+CacheEntry = namedtuple('CacheEntry', ['generation', 'computed_at', 'value'])
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _cache_key(parts):
+    digest = hashlib.sha1('\x1f'.join(map(str, parts)).encode()).hexdigest()
+    return f'psych_stats:data:{digest}'
+
+
+def _record(metric):
+    key = f'psych_stats:metrics:{metric}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def metrics():
+    """Hit/stale/miss/refresh/wait hisoblagichlari"""
+    values = cache.get_many([f'psych_stats:metrics:{metric}' for metric in METRICS])
+    return {metric: values.get(f'psych_stats:metrics:{metric}', 0) for metric in METRICS}
+
+
+def current_generation():
+    return cache.get(GENERATION_KEY, 0)
+
+
+def bump_generation():
+    """Yangi natijalar yozildi - keshdagi sahifalar eskiradi"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def _compute(key, generation, compute):
+    value = compute()
+    cache.set(
+        key,
+        CacheEntry(generation, time.time(), value),
+        _setting('PSYCH_STATS_CACHE_TIMEOUT', 60 * 60),
+    )
+    return value
+
+
+def get_or_compute(parts, compute):
+    """
+    Keshdagi yoki hisoblangan qiymat: (value, holat)
+    parts - kalit qismlari (to'plam nomi, filtrlar), holat - METRICS dan biri
+    """
+    key = _cache_key(parts)
+    generation = current_generation()
+    entry = cache.get(key)
+    if (entry is not None and entry.generation == generation
+            and time.time() - entry.computed_at < _setting('PSYCH_STATS_CACHE_SOFT_TIMEOUT', 60)):
+        _record('hit')
+        return entry.value, 'hit'
+
+    lock_key = f'{key}:lock'
+    lock_timeout = _setting('PSYCH_STATS_CACHE_LOCK_TIMEOUT', 30)
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, lock_timeout):
+        try:
+            value = _compute(key, generation, compute)
+        finally:
+            # Qulf muddati o'tib boshqa worker olgan bo'lsa o'chirilmaydi
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+        status = 'miss' if entry is None else 'refresh'
+        _record(status)
+        return value, status
+
+    if entry is not None:
+        _record('stale')
+        return entry.value, 'stale'
+
+    # Kesh bo'sh, boshqa worker hisoblayapti
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            _record('wait')
+            return entry.value, 'wait'
+        if cache.get(lock_key) is None:
+            break
+
+    _record('miss')
+    return _compute(key, generation, compute), 'miss'
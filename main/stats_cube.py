@@ -0,0 +1,434 @@
+"""
+Psixologik statistika uchun xotiradagi ustunli kub (NumPy)
+
+ScaleResultFact qatorlari jarayon xotirasida ustunlar (massivlar) sifatida
+saqlanadi, matnli kesimlar (fakultet, kurs) lug'at bilan kodlanadi. Har
+qanday filtr kombinatsiyasi mantiqiy maska va `bincount` bilan bazaga
+murojaatsiz hisoblanadi; metodlar main.psych_stats.DatabaseSource bilan
+bir xil interfeysga ega va bir xil natija qaytaradi.
+
+Shkala natijasi yo'q natijalar (shkalasiz testlar) natijalar soni uchun
+shkalasiz, rangsiz qator sifatida qo'shiladi.
+
+Kub bir marta to'liq yuklanadi, keyin `created_at` yuqori belgisidan
+(OVERLAP oynasi bilan) yangi qatorlar qo'shiladi. Mavjud qatorlar
+o'zgarganda (qayta baholash, talaba/kategoriya/shkala o'zgarishi,
+o'chirish) commitdan keyin keshdagi davr raqami oshiriladi va kub qayta
+yuklanadi. So'rovlar va yangilash kub qulfi ostida (thread'li worker'lar).
+"""
+import functools
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from main.psych_stats import COLORS, timeline_months
+from main.stats_cache import bump_generation
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+EPOCH_KEY = 'stats_cube:epoch'
+
+# Rang kodi: COLORS indeksi, kategoriyasiz qator - NO_COLOR
+NO_COLOR = len(COLORS)
+
+# Filtr kombinatsiyalari bo'yicha eslab qolinadigan bincount natijalari
+COUNTS_CACHE_SIZE = 256
+
+# Yuklanadigan ustunlar: (ScaleResultFact maydoni, dtype). Shkala, kategoriya,
+# guruh, fakultet va kurs zich kodlar sifatida saqlanadi (bincount uchun)
+COLUMNS = (
+    ('scale_result_id', 'int64'),
+    ('result_id', 'int64'),
+    ('quiz_id', 'int64'),
+    ('scale_id', 'int32'),
+    ('category_id', 'int32'),
+    ('color', 'int8'),
+    ('score', 'int64'),
+    ('faculty', 'int32'),
+    ('level', 'int32'),
+    ('group_id', 'int32'),
+    ('month', 'int32'),
+    ('created_at', 'float64'),
+)
+
+
+def _bump_epoch():
+    bump_generation()
+    try:
+        cache.incr(EPOCH_KEY)
+    except ValueError:
+        cache.set(EPOCH_KEY, 1, None)
+
+
+def invalidate_cube():
+    """
+    Mavjud qatorlar o'zgardi - barcha jarayonlardagi kub qayta yuklanadi,
+    keshlangan statistika sahifalari ham eskiradi (main.stats_cache).
+    Commitdan keyin - aks holda boshqa jarayon kubni eski qatorlardan yuklaydi.
+    """
+    transaction.on_commit(_bump_epoch)
+
+
+def _locked(method):
+    """Kub metodlari jarayon ichida ketma-ket (refresh ustunlarni almashtiradi)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _month_code(value):
+    return value.year * 12 + value.month - 1
+
+
+class _Dictionary:
+    """Kesim qiymatlarini zich kodlash (bo'sh qator va None ham qiymat)"""
+
+    def __init__(self, *values):
+        self.codes = {}
+        self.values = []
+        for value in values:
+            self.encode(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class StatsCube:
+    """Xotiradagi faktlar jadvali va unga so'rovlar"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.epoch = cache.get(EPOCH_KEY)
+        self.checked_at = time.monotonic()
+        self.high_water = None
+        self.faculties = _Dictionary()
+        self.levels = _Dictionary()
+        self.scale_codes = _Dictionary()
+        # 0 - kategoriyasiz / guruhsiz
+        self.category_codes = _Dictionary(None)
+        self.group_codes = _Dictionary(None)
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+        # Natijaning birinchi qatori - natijalar soni uchun
+        self.first = np.empty(0, dtype=bool)
+        self.scales = {}
+        self.categories = {}
+        self.keys = {}
+        self.month_base = 0
+        self._selection = (None, None)
+        self._counts = {}
+        self._append(self._fetch(), timezone.now())
+
+    def __len__(self):
+        return len(self.first)
+
+    # ==================== YUKLASH ====================
+
+    def _fetch(self, since=None):
+        from main.models import PsychologicalResult, ScaleResultFact
+
+        facts = ScaleResultFact.objects.all()
+        orphans = PsychologicalResult.objects.filter(scale_results__isnull=True)
+        if since is not None:
+            facts = facts.filter(created_at__gte=since)
+            orphans = orphans.filter(created_at__gte=since)
+        rows = list(facts.order_by('result_id', 'scale_result_id').values_list(
+            *[name for name, _ in COLUMNS]
+        ))
+        # Shkalasiz natija: scale_result_id o'rniga -result_id (takrorlanmas)
+        for result_id, quiz_id, faculty, level, group_id, created_at in orphans.order_by('pk').values_list(
+            'pk', 'attempt__quiz_id', 'attempt__student__faculty', 'attempt__student__level',
+            'attempt__student__group_id', 'created_at',
+        ):
+            rows.append((
+                -result_id, result_id, quiz_id, None, None, '', 0, faculty or '', level or '',
+                group_id, timezone.localtime(created_at).date().replace(day=1), created_at,
+            ))
+        return rows
+
+    def _append(self, rows, fetched_at):
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        color_codes = {color: code for code, color in enumerate(COLORS)}
+        encoded = {name: [] for name, _ in COLUMNS}
+        for (scale_result_id, result_id, quiz_id, scale_id, category_id, color, score,
+                faculty, level, group_id, month, created_at) in rows:
+            encoded['scale_result_id'].append(scale_result_id)
+            encoded['result_id'].append(result_id)
+            encoded['quiz_id'].append(quiz_id)
+            encoded['scale_id'].append(self.scale_codes.encode(scale_id))
+            encoded['category_id'].append(self.category_codes.encode(category_id))
+            encoded['color'].append(color_codes.get(color, NO_COLOR) if category_id else NO_COLOR)
+            encoded['score'].append(score)
+            encoded['faculty'].append(self.faculties.encode(faculty))
+            encoded['level'].append(self.levels.encode(level))
+            encoded['group_id'].append(self.group_codes.encode(group_id))
+            encoded['month'].append(_month_code(month))
+            encoded['created_at'].append(created_at.timestamp())
+
+        new = {name: np.array(encoded[name], dtype=dtype) for name, dtype in COLUMNS}
+        result_ids = new['result_id']
+        first = np.ones(len(result_ids), dtype=bool)
+        first[1:] = result_ids[1:] != result_ids[:-1]
+
+        for name, _ in COLUMNS:
+            self.columns[name] = np.concatenate([self.columns[name], new[name]])
+        self.first = np.concatenate([self.first, first])
+        self._build_keys()
+
+        # Kelajak sanali qatorlar belgini surib yubormasligi uchun
+        high_water = min(max(row[-1] for row in rows), fetched_at)
+        if self.high_water is None or high_water > self.high_water:
+            self.high_water = high_water
+        self._load_dimensions(
+            {row[3] for row in rows} - {None} - set(self.scales),
+            {row[4] for row in rows} - {None} - set(self.categories),
+        )
+        return len(rows)
+
+    def _build_keys(self):
+        """
+        Grafiklar uchun birlashtirilgan kalitlar (har biri bitta bincount):
+        oy x rang, fakultet x rang, shkala x kategoriya, guruh (natijaning
+        birinchi qatori, qolganlari oxirgi katakka)
+        """
+        width = len(COLORS) + 1
+        colors = self.columns['color'].astype(np.int32)
+        self.month_base = int(self.columns['month'].min()) if len(self) else 0
+        self.latest = float(self.columns['created_at'].max()) if len(self) else 0.0
+        self.keys = {
+            'month_color': (self.columns['month'] - self.month_base) * width + colors,
+            'faculty_color': self.columns['faculty'] * width + colors,
+            'scale_category': self.columns['scale_id'] * len(self.category_codes) + self.columns['category_id'],
+            'result_group': np.where(self.first, self.columns['group_id'], len(self.group_codes)).astype(np.int32),
+        }
+        self._selection = (None, None)
+        self._counts = {}
+
+    def _load_dimensions(self, scale_ids, category_ids):
+        """Shkala va kategoriya nomlari/tartibi (faqat yangi kodlar uchun)"""
+        from main.models import PsychologicalCategory, PsychologicalScale
+
+        if scale_ids:
+            for scale_id, name, quiz_id, quiz_created_at, order in PsychologicalScale.objects.filter(
+                pk__in=scale_ids
+            ).values_list('id', 'name', 'quiz_id', 'quiz__created_at', 'order'):
+                # psych_stats.scale_stats tartibi: -quiz__created_at, quiz_id, order, id
+                self.scales[scale_id] = (name, (-quiz_created_at.timestamp(), quiz_id, order, scale_id))
+
+        if category_ids:
+            for category_id, name, color, order in PsychologicalCategory.objects.filter(
+                pk__in=category_ids
+            ).values_list('id', 'name', 'color', 'order'):
+                self.categories[category_id] = (name, color, order)
+
+    @_locked
+    def refresh(self):
+        """Yuqori belgidan keyingi qatorlarni qo'shish (takrorlanganlar tashlanadi)"""
+        self.checked_at = time.monotonic()
+        fetched_at = timezone.now()
+        if self.high_water is None:
+            return self._append(self._fetch(), fetched_at)
+
+        since = self.high_water - timedelta(seconds=getattr(settings, 'PSYCH_CUBE_OVERLAP', 5 * 60))
+        rows = list(self._fetch(since))
+        if not rows:
+            return 0
+        recent = self.columns['created_at'] >= since.timestamp()
+        known = set(self.columns['scale_result_id'][recent].tolist())
+        return self._append((row for row in rows if row[0] not in known), fetched_at)
+
+    # ==================== SO'ROVLAR ====================
+
+    def _select(self, filters):
+        """
+        Filtrlangan qatorlar: (maska, indekslar), filtrsiz - (None, None)
+        Oxirgi filtr uchun eslab qolinadi - sahifa grafiklari bitta tanlovdan.
+        """
+        if not any(filters):
+            return None, None
+        if self._selection[0] == filters:
+            return self._selection[1]
+
+        mask = np.ones(len(self), dtype=bool)
+        if filters.quiz_id:
+            mask &= self.columns['quiz_id'] == int(filters.quiz_id)
+        group_id = int(filters.group_id) if filters.group_id else None
+        for name, dictionary, value in (
+            ('faculty', self.faculties, filters.faculty),
+            ('level', self.levels, filters.level),
+            ('group_id', self.group_codes, group_id),
+        ):
+            if value:
+                code = dictionary.codes.get(value)
+                if code is None:
+                    mask[:] = False
+                    break
+                mask &= self.columns[name] == code
+
+        selection = (mask, np.flatnonzero(mask))
+        self._selection = (filters, selection)
+        return selection
+
+    def _count(self, key, filters, size, weights=None):
+        """Filtrlangan qatorlar bo'yicha bincount (kub o'zgarguncha eslab qolinadi)"""
+        cache_key = (filters, key, weights)
+        if cache_key in self._counts:
+            return self._counts[cache_key]
+
+        values = self.keys[key]
+        weights = self.columns[weights] if weights else None
+        _, index = self._select(filters)
+        if index is not None:
+            values = values[index]
+            if weights is not None:
+                weights = weights[index]
+        if len(self._counts) >= COUNTS_CACHE_SIZE:
+            self._counts.clear()
+        counts = self._counts[cache_key] = np.bincount(values, weights=weights, minlength=size)
+        return counts
+
+    @_locked
+    def total_results(self, filters):
+        counts = self._count('result_group', filters, len(self.group_codes) + 1)
+        return int(counts[:-1].sum())
+
+    @_locked
+    def color_stats(self, filters, now=None):
+        now = now or timezone.now()
+        width = len(COLORS) + 1
+        span = int(self.keys['month_color'].max()) // width + 1 if len(self) else 0
+        by_month = self._count('month_color', filters, span * width).reshape(span, width)
+
+        color_totals = by_month.sum(axis=0)
+        color_counts = defaultdict(int, {
+            color: int(color_totals[code]) for code, color in enumerate(COLORS) if color_totals[code]
+        })
+
+        # Grafik joriy vaqtgacha - kelajak sanali qatorlar (odatda yo'q) ayiriladi
+        future = []
+        if self.latest >= now.timestamp():
+            future = np.flatnonzero(self.columns['created_at'] >= now.timestamp())
+            mask, _ = self._select(filters)
+            if mask is not None:
+                future = future[mask[future]]
+        if len(future):
+            by_month = by_month - np.bincount(
+                self.keys['month_color'][future], minlength=span * width
+            ).reshape(span, width)
+
+        months = timeline_months(now)
+        offsets = [_month_code(month) - self.month_base for month in months]
+        timeline = {
+            color: [int(by_month[offset, code]) if 0 <= offset < span else 0 for offset in offsets]
+            for code, color in enumerate(COLORS)
+        }
+        return color_counts, months, timeline
+
+    @_locked
+    def scale_stats(self, filters):
+        width = len(self.category_codes)
+        size = len(self.scale_codes) * width
+        # (shkala, kategoriya) juftliklari bo'yicha soni va ball yig'indisi
+        counts = self._count('scale_category', filters, size).reshape(-1, width)
+        sums = self._count('scale_category', filters, size, weights='score').reshape(-1, width)
+
+        stats = []
+        shown = [
+            code for code in range(len(self.scale_codes))
+            if self.scale_codes.values[code] is not None and counts[code].any()
+        ]
+        for scale_code in sorted(shown, key=lambda code: self.scales[self.scale_codes.values[code]][1]):
+            categories = []
+            for category_code in np.flatnonzero(counts[scale_code]).tolist():
+                name, color, order = self.categories.get(
+                    self.category_codes.values[category_code], (None, None, None)
+                )
+                categories.append((int(counts[scale_code, category_code]), name, color, order))
+            total = int(counts[scale_code].sum())
+            categories.sort(key=lambda row: (-row[0], row[3] is None, row[3] or 0))
+            stats.append({
+                'scale_name': self.scales[self.scale_codes.values[scale_code]][0],
+                'total_results': total,
+                'avg_score': round(float(sums[scale_code].sum()) / total, 1),
+                'category_stats': [
+                    {
+                        'category_name': name or 'Nomalum',
+                        'color': color or 'none',
+                        'count': count,
+                        'pct': round(count / total * 100, 1),
+                    }
+                    for count, name, color, _ in categories
+                ],
+            })
+        return stats
+
+    @_locked
+    def faculty_stats(self, filters, faculties):
+        width = len(COLORS) + 1
+        counts = self._count(
+            'faculty_color', filters, len(self.faculties) * width
+        ).reshape(-1, width)[:, :len(COLORS)]
+
+        def faculty_counts(faculty):
+            code = self.faculties.codes.get(faculty)
+            return counts[code] if code is not None else np.zeros(len(COLORS), dtype=np.int64)
+
+        shown = [faculty for faculty in faculties if faculty_counts(faculty).sum()]
+        return {
+            'labels': [faculty[:15] + '…' if len(faculty) > 15 else faculty for faculty in shown],
+            **{
+                color: [int(faculty_counts(faculty)[code]) for faculty in shown]
+                for code, color in enumerate(COLORS)
+            },
+        }
+
+    @_locked
+    def group_stats(self, filters, groups):
+        counts = dict(zip(
+            self.group_codes.values,
+            self._count('result_group', filters, len(self.group_codes) + 1).tolist(),
+        ))
+        shown = [group for group in groups if counts.get(group.pk)]
+        return {
+            'labels': [group.group_name[:12] for group in shown],
+            'values': [counts[group.pk] for group in shown],
+        }
+
+
+_cube = None
+_lock = threading.Lock()
+
+
+def get_cube():
+    """Jarayondagi kub (kerak bo'lsa yuklanadi yoki yangilanadi), NumPy yo'q bo'lsa None"""
+    global _cube
+    if not NUMPY_AVAILABLE:
+        return None
+    with _lock:
+        if _cube is None or _cube.epoch != cache.get(EPOCH_KEY):
+            _cube = StatsCube()
+        elif time.monotonic() - _cube.checked_at >= getattr(settings, 'PSYCH_CUBE_REFRESH_INTERVAL', 10):
+            _cube.refresh()
+        return _cube
@@ -1,3 +1,1965 @@
-from django.test import TestCase
+"""
+main ilovasi testlari
 
-# Create your tests here.
+So'rovlar byudjeti (query budget): sintetik ma'lumotlar generatori bazani
+realistik hajmda to'ldiradi, so'ng main.urls va student.urls dagi har bir
+sahifa hamda main/student admin ro'yxatlari (changelist) uchun:
+    - SQL so'rovlar soni byudjetdan oshmasligi
+    - bajarilish vaqti byudjetdan oshmasligi
+tekshiriladi. Har bir sahifa avval bir marta isitiladi (kesh to'ladi),
+keyin o'lchanadi - byudjet barqaror holat uchun.
+
+QUERY_BUDGET_REPORT berilsa natijalar JSON hisobotga yoziladi (commitlar
+bo'yicha taqqoslash uchun):
+
+    QUERY_BUDGET_REPORT=reports/query_budget.json python manage.py test main
+
+QUERY_BUDGET_TIME_FACTOR - sekin CI mashinalari uchun vaqt byudjeti koeffitsienti.
+
+Baholash: standart va psixologik testlarning set-based yo'li eski (obyektma-obyekt)
+algoritm natijalari bilan solishtiriladi, kategoriya jadvali (CategoryLookup) esa
+oraliqlar bo'yicha to'g'ridan-to'g'ri birinchi moslik bilan.
+
+Psixometrika: savollar tahlili va shkala statistikasi qo'lda hisoblangan kichik
+matritsalar bilan tekshiriladi (NumPy bo'lmasa o'tkazib yuboriladi).
+
+Supurgich (main.expiry): muddati o'tgan urinishlar yakunlanadi, baholanadi va
+hisoblagichlar bir marta oshiriladi; SKIP LOCKED faqat PostgreSQL da tekshiriladi.
+
+Javoblar buferi (main.answer_buffer): Redis o'rniga xotiradagi hash bilan
+avtosaqlash -> flush -> baholash zanjiri.
+
+Javoblarni saqlash (UserResponse.bulk_save): forma javoblari bitta upsert
+bilan yoziladi, boshqa savol yoki testning varianti rad etiladi.
+
+Kutish zali (main.admission): limitdan oshgan talaba kutish sahifasini oladi,
+keyingi oynada holat endpointi uni qabul qiladi, urinish yaratilmasa ham navbat
+raqami bo'shatiladi.
+
+Kontent versiyasi (main.signals): savol, variant yoki kategoriya saqlansa yoki
+o'chirilsa Quiz.content_version oshadi va eski javob kaliti hamda test
+sahifasining keshlangan savollar qismi ishlatilmaydi.
+
+Test sahifasi (QuizDetailView): eng yaxshi natija holat xaritasi natija
+borligini ko'rsatgandagina bazadan olinadi.
+
+Qayta baholash (main.rescoring): javob kaliti tuzatilgandan keyin dry-run faqat
+farqlarni qaytaradi, haqiqiy ishga tushirish javob, natija va versiyani yangilaydi.
+
+Baholash navbati (main.scoring_queue): yakunlash navbatga qo'yadi, natija
+sahifasi natija tayyor bo'lguncha "hisoblanmoqda" holatida.
+
+Psixologik statistika: GROUP BY to'plamlari natijalar ustidan obyektma-obyekt
+hisoblangan eski sahifa konteksti bilan, xotiradagi kub esa bazadagi yo'l bilan
+filtrlar kombinatsiyalari bo'yicha solishtiriladi.
+"""
+import io
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+import unittest
+from collections import namedtuple
+from datetime import timedelta
+
+import openpyxl
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from main import urls as main_urls
+from main.category_lookup import CategoryLookup
+from main.item_analysis import NUMPY_AVAILABLE
+from main.models import (
+    Quiz, Question, Option, QuizAttempt, UserResponse,
+    PsychologicalScale, PsychologicalCategory, StudentStats,
+    Result, PsychologicalResult,
+)
+from student import urls as student_urls
+from student.models import Student, StudentGroup
+from UserSession.models import UserSession
+
+
+# Hisobot faqat yo'l berilganda yoziladi
+REPORT_PATH = os.getenv('QUERY_BUDGET_REPORT', '')
+TIME_FACTOR = float(os.getenv('QUERY_BUDGET_TIME_FACTOR', '1'))
+
+# Standart vaqt byudjeti (ms)
+DEFAULT_TIME_BUDGET = 1500
+
+
+# ==================== SINTETIK MA'LUMOTLAR ====================
+
+SyntheticData = namedtuple('SyntheticData', [
+    'admin', 'student', 'standard_quiz', 'psychological_quiz', 'result_attempt', 'counts',
+])
+
+FACULTIES = ['Iqtisodiyot', 'Moliya', 'Buxgalteriya hisobi', 'Menejment']
+LEVELS = ['1-kurs', '2-kurs', '3-kurs', '4-kurs']
+GENDERS = ['Erkak', 'Ayol']
+COLORS = ['green', 'yellow', 'orange', 'red']
+
+
+def _build_student(index, group=None, gender=GENDERS[0]):
+    return Student(
+        student_name=f'Talaba {index}', student_id_number=f'{300000 + index}', hemis_id=str(index),
+        email=f'talaba{index}@example.com', passport_number=f'AA{index:07d}', birth_date='2004-01-01',
+        studentStatus="O'qimoqda", paymentForm='Grant', avg_gpa='4.0',
+        education_type='Bakalavr', semester='1',
+        faculty=group.group_faculty if group else FACULTIES[0],
+        level=group.group_level if group else LEVELS[0],
+        gender=gender, group=group,
+    )
+
+
+def _create_standard_quiz(author, index, questions):
+    quiz = Quiz.objects.create(
+        title=f'Standart test {index}', created_by=author, attempt_limit=3,
+    )
+    question_objs = Question.objects.bulk_create([
+        Question(quiz=quiz, question_text=f'Savol {index}.{i}', score=1 + i % 3, order=i)
+        for i in range(questions)
+    ])
+    Option.objects.bulk_create([
+        Option(question=question, option_text=f'Variant {j}', is_correct=(j == 0), order=j)
+        for question in question_objs
+        for j in range(4)
+    ])
+    return quiz
+
+
+def _create_psychological_quiz(author, index, questions, scales=3):
+    quiz = Quiz.objects.create(
+        title=f'Psixologik test {index}', created_by=author,
+        quiz_type='psychological', attempt_limit=3,
+    )
+    per_scale = max(questions // scales, 1)
+    max_score = per_scale * 3
+    step = max_score // len(COLORS) + 1
+    for s in range(scales):
+        scale = PsychologicalScale.objects.create(quiz=quiz, name=f'Shkala {index}.{s}', order=s)
+        PsychologicalCategory.objects.bulk_create([
+            PsychologicalCategory(
+                scale=scale, name=color, color=color, order=c,
+                min_score=c * step, max_score=min((c + 1) * step - 1, max_score),
+            )
+            for c, color in enumerate(COLORS)
+        ])
+        question_objs = Question.objects.bulk_create([
+            Question(
+                quiz=quiz, psychological_scale=scale,
+                question_text=f'Savol {index}.{s}.{i}', order=s * per_scale + i,
+            )
+            for i in range(per_scale)
+        ])
+        Option.objects.bulk_create([
+            Option(question=question, option_text=f'Variant {j}', psychological_score=j, order=j)
+            for question in question_objs
+            for j in range(4)
+        ])
+    return quiz
+
+
+def seed_synthetic_data(students=60, standard_quizzes=3, psychological_quizzes=2, questions=12, seed=2024):
+    """
+    Realistik sintetik ma'lumotlar
+
+    Talabalar fakultet/kurs/jins bo'yicha taqsimlangan, har bir testga 0-2
+    urinish (yakunlangan/muddati o'tgan/davom etayotgan), javoblarning bir
+    qismi tashlab ketilgan, urinishlar bir necha oyga yoyilgan.
+    Birinchi talaba barcha testlarni ikki martadan topshirgan - o'lchanadigan
+    talaba (N+1 bo'lsa byudjet albatta oshadi).
+    """
+    from main.scoring import score_attempts
+    from main.scale_analytics import NUMPY_AVAILABLE, compute_quiz_statistics
+
+    rng = random.Random(seed)
+    author = User.objects.create_superuser('budget_admin', 'admin@example.com', 'budget')
+
+    groups = [
+        StudentGroup.objects.create(
+            group_code=f'G{f}{l}', group_name=f'{faculty[:3].upper()}-{l + 1}',
+            group_faculty=faculty, group_level=level, group_year='2024',
+            education_form='Kunduzgi', education_lang="O'zbek",
+        )
+        for f, faculty in enumerate(FACULTIES)
+        for l, level in enumerate(LEVELS)
+    ]
+    student_objs = Student.objects.bulk_create([
+        _build_student(i, group, rng.choice(GENDERS))
+        for i, group in enumerate(rng.choice(groups) for _ in range(students))
+    ])
+
+    quizzes = [_create_standard_quiz(author, i, questions) for i in range(standard_quizzes)]
+    quizzes += [_create_psychological_quiz(author, i, questions) for i in range(psychological_quizzes)]
+
+    now = timezone.now()
+    attempts = []
+    for n, student in enumerate(student_objs):
+        for quiz in quizzes:
+            count = 2 if n == 0 else rng.choice([0, 0, 1, 1, 2])
+            for k in range(count):
+                started_at = now - timedelta(days=rng.randint(1, 180), minutes=rng.randint(0, 600))
+                active = n != 0 and k == count - 1 and rng.random() < 0.1
+                status = 'in_progress' if active else rng.choice(['completed'] * 9 + ['expired'])
+                if active:
+                    started_at = now
+                attempts.append(QuizAttempt(
+                    student=student, quiz=quiz, status=status,
+                    deadline_at=started_at + timedelta(minutes=quiz.time_limit),
+                    completed_at=None if active else started_at + timedelta(minutes=rng.randint(3, 25)),
+                ))
+                attempts[-1].seed_started_at = started_at
+    QuizAttempt.objects.bulk_create(attempts)
+    for attempt in attempts:
+        attempt.started_at = attempt.seed_started_at
+        if attempt.completed_at:
+            attempt.time_taken = int((attempt.completed_at - attempt.started_at).total_seconds())
+    QuizAttempt.objects.bulk_update(attempts, ['started_at', 'time_taken'], batch_size=500)
+
+    # Javoblar - javob kaliti bo'yicha tekshirilgan qatorlar
+    responses = []
+    for attempt in attempts:
+        answer_key = attempt.quiz.get_answer_key()
+        options_by_question = {}
+        for option_id, option in answer_key.options.items():
+            options_by_question.setdefault(option.question_id, []).append(option_id)
+        answers = {
+            question_id: rng.choice(option_ids)
+            for question_id, option_ids in options_by_question.items()
+            if rng.random() < 0.9
+        }
+        rows, _ = UserResponse.build_rows(attempt, answers)
+        responses.extend(rows)
+    UserResponse.objects.bulk_create(responses, batch_size=2000)
+
+    finished = [attempt for attempt in attempts if attempt.status != 'in_progress']
+    score_attempts(finished)
+    StudentStats.rebuild(student.pk for student in student_objs)
+
+    if NUMPY_AVAILABLE:
+        with override_settings(SCALE_NORM_MIN_COHORT=5):
+            for quiz in quizzes:
+                if quiz.is_psychological():
+                    compute_quiz_statistics(quiz)
+
+    student = student_objs[0]
+    return SyntheticData(
+        admin=author,
+        student=student,
+        standard_quiz=quizzes[0],
+        psychological_quiz=quizzes[standard_quizzes],
+        result_attempt=next(
+            attempt for attempt in attempts
+            if attempt.student_id == student.pk and attempt.status != 'in_progress'
+        ),
+        counts={
+            'students': len(student_objs),
+            'quizzes': len(quizzes),
+            'attempts': len(attempts),
+            'responses': len(responses),
+        },
+    )
+
+
+# ==================== BYUDJETLAR ====================
+
+# url nomi -> (mijoz, metod, kwargs, so'rovlar byudjeti, vaqt byudjeti ms yoki None)
+# Mijozlar: 'student' - tizimga kirgan talaba, 'admin' - xodim, 'anonymous'.
+# kwargs - SyntheticData maydonlaridan olinadigan pk lar ('=' bilan boshlansa - qiymatning o'zi).
+# Tartib muhim: logout oxirida (sessiyani o'chiradi).
+VIEW_BUDGETS = {
+    'home': ('anonymous', 'get', {}, 3, None),
+    'dashboard': ('student', 'get', {}, 11, None),
+    'profile': ('student', 'get', {}, 6, None),
+    'statistics': ('student', 'get', {}, 7, None),
+    'results': ('student', 'get', {}, 8, None),
+    'psychological_results': ('student', 'get', {}, 7, None),
+    'quiz_list': ('student', 'get', {}, 5, None),
+    'quiz_detail': ('student', 'get', {'pk': 'standard_quiz'}, 4, None),
+    'psychological_tests': ('student', 'get', {}, 5, None),
+    'quiz_take': ('student', 'get', {'pk': 'psychological_quiz'}, 7, None),
+    'quiz_autosave': ('student', 'post', {'pk': 'psychological_quiz'}, 4, None),
+    'quiz_admission_status': ('student', 'get', {'pk': 'psychological_quiz'}, 3, None),
+    'quiz_result': ('student', 'get', {'attempt_id': 'result_attempt'}, 3, None),
+    'admin_psychological_stats': ('admin', 'get', {}, 8, None),
+    'admin_psychological_stats_dataset': ('admin', 'get', {'dataset': '=color'}, 10, None),
+    'admin_admission_stats': ('admin', 'get', {}, 3, None),
+    'admin_item_analysis': ('admin', 'get', {'pk': 'standard_quiz'}, 3, None),
+    'login': ('anonymous', 'get', {}, 1, None),
+    'oauth_callback': ('anonymous', 'get', {}, 1, None),
+    'logout': ('student', 'get', {}, 7, None),
+}
+
+# O'lchanmaydigan sahifalar (sabab bilan)
+EXCLUDED_VIEWS = {
+    'one_code': "tashqi OneID serveriga so'rov yuboradi",
+}
+
+# OAuth sozlamalari bo'lmasa 500 qaytaradi - holat kodi tekshirilmaydi
+CONFIG_DEPENDENT_VIEWS = {'login'}
+
+# Admin ro'yxatlari: model nomi -> so'rovlar byudjeti
+ADMIN_CHANGELIST_BUDGETS = {
+    'student': 12,
+    'quiz': 8,
+    'quizattempt': 10,
+    'result': 10,
+    'psychologicalresult': 13,
+}
+DEFAULT_ADMIN_CHANGELIST_BUDGET = 10
+
+# Admin Excel eksportlari: model nomi -> (action, so'rovlar byudjeti)
+# Byudjet natijalar soniga bog'liq emas (bo'laklar bitta kursordan o'qiladi)
+ADMIN_EXPORT_BUDGETS = {
+    'result': ('export_results_excel', 12),
+    'psychologicalresult': ('export_psychological_excel', 14),
+}
+
+
+def _clear_caches():
+    """Kesh va jarayon ichidagi javob kalitlari (test bazasida pk lar qayta ishlatiladi)"""
+    from main.answer_key import _local_keys, _local_lock
+
+    cache.clear()
+    with _local_lock:
+        _local_keys.clear()
+
+
+def _student_client(student):
+    """Tizimga kirgan talaba mijozi (OneID sessiyasi bazada)"""
+    user_session = UserSession.objects.create(
+        student=student,
+        session_key=f'budget-{student.pk}',
+        access_token='budget',
+        expires_at=timezone.now() + timedelta(days=1),
+    )
+    client = Client()
+    session = client.session
+    session['student_id'] = str(student.pk)
+    session['user_session_id'] = user_session.pk
+    session.save()
+    return client
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5, cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class QueryBudgetTests(TestCase):
+    """Har bir sahifa uchun so'rovlar soni va vaqt byudjeti"""
+
+    report = []
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_synthetic_data()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.report or not REPORT_PATH:
+            return
+        directory = os.path.dirname(REPORT_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(REPORT_PATH, 'w', encoding='utf-8') as report_file:
+            json.dump({
+                'generated_at': timezone.now().isoformat(),
+                'commit': _git_commit(),
+                'database': connection.vendor,
+                'dataset': cls.data.counts,
+                'views': cls.report,
+            }, report_file, ensure_ascii=False, indent=2)
+
+    def setUp(self):
+        _clear_caches()
+        self.clients = {
+            'anonymous': Client(),
+            'student': _student_client(self.data.student),
+            'admin': Client(),
+        }
+        self.clients['admin'].force_login(self.data.admin)
+
+    def _request(self, client, method, url):
+        if method == 'post':
+            option_id, option = next(iter(self.data.psychological_quiz.get_answer_key().options.items()))
+            return client.post(
+                url,
+                data=json.dumps({'answers': {str(option.question_id): option_id}}),
+                content_type='application/json',
+            )
+        return client.get(url)
+
+    def _measure(self, name, url, client, method, query_budget, time_budget):
+        # Isitish - keshlar to'ladi, faol urinish yaratiladi va h.k.
+        if name != 'logout':
+            self._request(client, method, url)
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self._request(client, method, url)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        time_budget = (time_budget or DEFAULT_TIME_BUDGET) * TIME_FACTOR
+        entry = {
+            'view': name,
+            'url': url,
+            'method': method.upper(),
+            'status': response.status_code,
+            'queries': len(queries.captured_queries),
+            'query_budget': query_budget,
+            'wall_ms': round(elapsed_ms, 1),
+            'time_budget_ms': time_budget,
+        }
+        entry['ok'] = entry['queries'] <= query_budget and elapsed_ms <= time_budget
+        self.report.append(entry)
+        return entry, queries
+
+    def _assert_budget(self, entry, queries):
+        if entry['view'] not in CONFIG_DEPENDENT_VIEWS:
+            self.assertLess(entry['status'], 500, entry)
+        self.assertLessEqual(
+            entry['queries'], entry['query_budget'],
+            f"{entry['view']}: {entry['queries']} so'rov (byudjet {entry['query_budget']})\n"
+            + '\n'.join(query['sql'][:200] for query in queries.captured_queries)
+        )
+        self.assertLessEqual(
+            entry['wall_ms'], entry['time_budget_ms'],
+            f"{entry['view']}: {entry['wall_ms']} ms (byudjet {entry['time_budget_ms']} ms)"
+        )
+
+    def test_every_url_has_budget(self):
+        """Yangi sahifa byudjetsiz qo'shilmasin"""
+        names = {
+            pattern.name
+            for pattern in main_urls.urlpatterns + student_urls.urlpatterns
+            if getattr(pattern, 'name', None)
+        }
+        self.assertEqual(names - set(VIEW_BUDGETS) - set(EXCLUDED_VIEWS), set())
+
+    def test_view_query_budgets(self):
+        for name, (client_name, method, kwargs, query_budget, time_budget) in VIEW_BUDGETS.items():
+            url = reverse(name, kwargs={
+                key: value[1:] if value.startswith('=') else getattr(self.data, value).pk
+                for key, value in kwargs.items()
+            })
+            entry, queries = self._measure(
+                name, url, self.clients[client_name], method, query_budget, time_budget,
+            )
+            with self.subTest(view=name):
+                self._assert_budget(entry, queries)
+
+    def test_result_page_not_modified(self):
+        """Yakunlangan natija sahifasi - snapshot va ETag bo'yicha 304"""
+        client = self.clients['student']
+        url = reverse('quiz_result', kwargs={'attempt_id': self.data.result_attempt.pk})
+        etag = client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertLessEqual(len(queries.captured_queries), 3)
+
+    def test_result_page_rescore_changes_snapshot_key(self):
+        """Qayta baholash snapshot kalitini bazadagi versiya bilan o'zgartiradi (commitdan oldin ham)"""
+        from main.result_page import get_result_snapshot
+        from main.scoring import score_attempts
+
+        client = self.clients['student']
+        url = reverse('quiz_result', kwargs={'attempt_id': self.data.result_attempt.pk})
+        client.get(url)
+        attempt = QuizAttempt.objects.select_related('quiz').get(pk=self.data.result_attempt.pk)
+        self.assertIsNotNone(get_result_snapshot(attempt))
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            score_attempts([attempt])
+        attempt = QuizAttempt.objects.select_related('quiz').get(pk=attempt.pk)
+        self.assertIsNone(get_result_snapshot(attempt))
+        self.assertTrue(callbacks)
+
+    def test_student_stats_rebuilt_after_delete(self):
+        """Urinish/natija o'chirilganda hisoblagichlar bazadagi soniga qaytadi"""
+        attempt = self.data.result_attempt
+        with self.captureOnCommitCallbacks(execute=True):
+            attempt.delete()
+
+        stats = StudentStats.objects.get(student=self.data.student)
+        attempts = QuizAttempt.objects.filter(student=self.data.student)
+        self.assertEqual(stats.total_attempts, attempts.count())
+        self.assertEqual(stats.completed_attempts, attempts.filter(status='completed').count())
+        self.assertEqual(stats.standard_results_count, Result.objects.filter(attempt__in=attempts).count())
+        self.assertEqual(
+            stats.psychological_results_count,
+            PsychologicalResult.objects.filter(attempt__in=attempts).count(),
+        )
+
+    def test_admin_excel_export_budgets(self):
+        for model_name, (action, query_budget) in ADMIN_EXPORT_BUDGETS.items():
+            model = next(model for model in admin.site._registry if model._meta.model_name == model_name)
+            url = reverse(f'admin:main_{model_name}_changelist')
+            selected = list(model.objects.values_list('pk', flat=True))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.clients['admin'].post(url, {
+                    'action': action,
+                    admin.helpers.ACTION_CHECKBOX_NAME: selected,
+                })
+                content = b''.join(response.streaming_content)
+            with self.subTest(export=model_name):
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    len(queries.captured_queries), query_budget,
+                    '\n'.join(query['sql'][:200] for query in queries.captured_queries)
+                )
+                sheet = openpyxl.load_workbook(io.BytesIO(content), read_only=True).active
+                self.assertEqual(sum(1 for _ in sheet.iter_rows()), len(selected) + 1)
+
+    def test_admin_changelist_budgets(self):
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label not in ('main', 'student'):
+                continue
+            model_name = model._meta.model_name
+            url = reverse(f'admin:{model._meta.app_label}_{model_name}_changelist')
+            entry, queries = self._measure(
+                f'admin:{model_name}', url, self.clients['admin'], 'get',
+                ADMIN_CHANGELIST_BUDGETS.get(model_name, DEFAULT_ADMIN_CHANGELIST_BUDGET), None,
+            )
+            with self.subTest(changelist=model_name):
+                self._assert_budget(entry, queries)
+
+
+# ==================== BAHOLASH ====================
+
+def _finished_attempt(student, quiz, answers=None, skipped=()):
+    """Yakunlangan urinish: answers {savol: variant}, skipped - variantsiz javob qatorlari"""
+    now = timezone.now()
+    attempt = QuizAttempt.objects.create(
+        student=student, quiz=quiz, status='completed', deadline_at=now, completed_at=now,
+    )
+    rows, _ = UserResponse.build_rows(attempt, answers or {})
+    rows += [UserResponse(attempt=attempt, question=question) for question in skipped]
+    UserResponse.objects.bulk_create(rows)
+    return attempt
+
+
+class StandardScoringTests(TestCase):
+    """Standart test: set-based baholash eski Result.calculate_result bilan bir xil"""
+
+    RESULT_FIELDS = [
+        'total_questions', 'correct_answers', 'wrong_answers', 'unanswered',
+        'total_score', 'max_score', 'percentage', 'passed',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_superuser('scoring_admin', 'scoring@example.com', 'scoring')
+        cls.quiz = _create_standard_quiz(author, 0, 5)
+        cls.questions = list(cls.quiz.questions.order_by('order'))
+        # Oxirgi savolda ikkita to'g'ri variant
+        second = cls.questions[-1].options.get(order=1)
+        second.is_correct = True
+        second.save()
+        cls.student = _build_student(0)
+        cls.student.save()
+
+    def setUp(self):
+        _clear_caches()
+
+    def _option(self, question, order):
+        return question.options.get(order=order).pk
+
+    def _assert_matches_legacy(self, attempt):
+        from main.management.commands.bench_scoring import legacy_result_fields
+        from main.scoring import score_attempts
+
+        attempt = QuizAttempt.objects.select_related('quiz').get(pk=attempt.pk)
+        expected = legacy_result_fields(attempt)
+        score_attempts([attempt])
+        result = Result.objects.get(attempt=attempt)
+        self.assertEqual({field: getattr(result, field) for field in self.RESULT_FIELDS}, expected)
+        return result
+
+    def test_all_correct(self):
+        attempt = _finished_attempt(self.student, self.quiz, {
+            question.pk: self._option(question, 0) for question in self.questions
+        })
+        result = self._assert_matches_legacy(attempt)
+        self.assertEqual(result.correct_answers, len(self.questions))
+        self.assertEqual(result.percentage, 100)
+
+    def test_all_incorrect(self):
+        attempt = _finished_attempt(self.student, self.quiz, {
+            question.pk: self._option(question, 3) for question in self.questions
+        })
+        result = self._assert_matches_legacy(attempt)
+        self.assertEqual(result.wrong_answers, len(self.questions))
+        self.assertEqual(result.total_score, 0)
+
+    def test_unanswered(self):
+        for skipped in ([], self.questions[:2]):
+            with self.subTest(skipped=len(skipped)):
+                attempt = _finished_attempt(self.student, self.quiz, skipped=skipped)
+                result = self._assert_matches_legacy(attempt)
+                self.assertEqual(result.unanswered, len(self.questions) - len(skipped))
+                self.assertFalse(result.passed)
+
+    def test_multi_answer_question(self):
+        question = self.questions[-1]
+        for order in (0, 1, 2):
+            with self.subTest(option=order):
+                attempt = _finished_attempt(self.student, self.quiz, {
+                    question.pk: self._option(question, order),
+                })
+                result = self._assert_matches_legacy(attempt)
+                self.assertEqual(result.correct_answers, int(order < 2))
+
+    def test_mixed(self):
+        first, second, third = self.questions[:3]
+        attempt = _finished_attempt(
+            self.student, self.quiz,
+            {first.pk: self._option(first, 0), second.pk: self._option(second, 2)},
+            skipped=[third],
+        )
+        result = self._assert_matches_legacy(attempt)
+        self.assertEqual(
+            (result.correct_answers, result.wrong_answers, result.unanswered),
+            (1, 1, len(self.questions) - 3),
+        )
+
+
+def _legacy_scale_results(attempt):
+    """Eski PsychologicalResult.calculate_result: shkala va kategoriyalar obyektma-obyekt"""
+    responses = attempt.responses.all()
+    scales = {}
+    for scale in attempt.quiz.psychological_scales.all():
+        total_score = sum(r.earned_score for r in responses.filter(question__psychological_scale=scale))
+        category = None
+        for cat in scale.categories.all():
+            if cat.matches_score(total_score):
+                category = cat
+                break
+        scales[scale.pk] = (total_score, category.pk if category else None)
+    return responses.count(), scales
+
+
+class PsychologicalScoringTests(TestCase):
+    """Psixologik test: shkala ballari va kategoriyalar eski algoritm bilan bir xil"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_superuser('psych_admin', 'psych@example.com', 'psych')
+        # 3 shkala x 3 savol, kategoriyalar: 0-2, 3-5, 6-8, 9-9
+        cls.quiz = _create_psychological_quiz(author, 0, 9)
+        first, second, third = cls.quiz.psychological_scales.order_by('order')
+        # Kesishgan oraliq - tartib bo'yicha birinchisi yutadi
+        PsychologicalCategory.objects.create(scale=first, name='keng', min_score=2, max_score=7, order=1)
+        PsychologicalCategory.objects.create(scale=first, name='old', min_score=0, max_score=9, order=-1)
+        # Bo'shliq - 3-5 ballar kategoriyasiz
+        second.categories.filter(min_score=3).delete()
+        cls.questions = list(cls.quiz.questions.order_by('order'))
+        cls.students = Student.objects.bulk_create([_build_student(i) for i in range(3)])
+
+    def setUp(self):
+        _clear_caches()
+
+    def _answers(self, rng):
+        answer_key = self.quiz.get_answer_key()
+        options = {}
+        for option_id, option in answer_key.options.items():
+            options.setdefault(option.question_id, []).append(option_id)
+        return {
+            question_id: rng.choice(option_ids)
+            for question_id, option_ids in options.items()
+            if rng.random() < 0.8
+        }
+
+    def _scored(self, attempts):
+        from main.models import PsychologicalScaleResult
+        from main.scoring import score_attempts
+
+        attempts = list(QuizAttempt.objects.filter(pk__in=[a.pk for a in attempts]).select_related('quiz'))
+        expected = {attempt.pk: _legacy_scale_results(attempt) for attempt in attempts}
+        score_attempts(attempts)
+        actual = {}
+        for result in PsychologicalResult.objects.filter(attempt__in=attempts):
+            actual[result.attempt_id] = (result.answered_questions, {
+                scale_id: (total_score, category_id)
+                for scale_id, total_score, category_id in PsychologicalScaleResult.objects.filter(
+                    result=result
+                ).values_list('scale_id', 'total_score', 'category_id')
+            })
+        return expected, actual
+
+    def test_batch_matches_legacy(self):
+        rng = random.Random(7)
+        attempts = [
+            _finished_attempt(self.students[i % len(self.students)], self.quiz, self._answers(rng))
+            for i in range(30)
+        ]
+        expected, actual = self._scored(attempts)
+        self.assertEqual(actual, expected)
+
+    def test_every_score_matches_legacy(self):
+        """Har bir shkalada 0..9 ballarning barchasi (bo'shliq va kesishmalar bilan)"""
+        attempts = []
+        for total in range(10):
+            answers = {}
+            for scale_questions in (self.questions[0:3], self.questions[3:6], self.questions[6:9]):
+                remaining = total
+                for question in scale_questions:
+                    points = min(remaining, 3)
+                    answers[question.pk] = question.options.get(psychological_score=points).pk
+                    remaining -= points
+            attempts.append(_finished_attempt(self.students[0], self.quiz, answers))
+        expected, actual = self._scored(attempts)
+        self.assertEqual(actual, expected)
+        # Bo'shliqdagi ballar kategoriyasiz qoladi
+        categories = {category for _, scales in actual.values() for _, category in scales.values()}
+        self.assertIn(None, categories)
+
+    def test_unanswered(self):
+        attempt = _finished_attempt(self.students[1], self.quiz)
+        expected, actual = self._scored([attempt])
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual[attempt.pk][0], 0)
+
+
+# ==================== KATEGORIYA JADVALI ====================
+
+def _first_match(intervals, score):
+    """Eski qidiruv: tartib bo'yicha birinchi mos kategoriya"""
+    return next((cid for min_score, max_score, cid in intervals if min_score <= score <= max_score), None)
+
+
+class CategoryLookupTests(SimpleTestCase):
+    """CategoryLookup.resolve - massiv va bisect rejimlarida birinchi moslik"""
+
+    CASES = {
+        'ketma-ket': [(0, 4, 1), (5, 9, 2), (10, 20, 3)],
+        'kesishgan': [(0, 10, 1), (5, 15, 2), (3, 3, 3), (12, 30, 4)],
+        'ichma-ich': [(10, 12, 1), (0, 30, 2), (11, 11, 3)],
+        "bo'shliqli": [(0, 2, 1), (6, 8, 2), (15, 15, 3)],
+        'manfiy': [(-10, -1, 1), (0, 0, 2), (1, 5, 3)],
+        "noto'g'ri": [(5, 1, 1), (0, 3, 2), (4, 4, 3)],
+        "bo'sh": [],
+    }
+
+    def _assert_first_match(self, intervals, lookup, scores):
+        for score in scores:
+            self.assertEqual(lookup.resolve(score), _first_match(intervals, score), score)
+
+    def _scores(self, intervals, scale=1):
+        # Har bir chegara va uning qo'shnilari, jadval tashqarisi ham
+        bounds = {bound for interval in intervals for bound in interval[:2]} | {0}
+        return sorted({bound + delta * scale for bound in bounds for delta in (-1, 0, 1)})
+
+    def test_dense(self):
+        for name, intervals in self.CASES.items():
+            with self.subTest(case=name):
+                lookup = CategoryLookup(intervals)
+                if intervals:
+                    self.assertIsNotNone(lookup.table)
+                self._assert_first_match(intervals, lookup, range(-15, 35))
+
+    def test_bisect(self):
+        scale = CategoryLookup.DENSE_LIMIT
+        for name, intervals in self.CASES.items():
+            with self.subTest(case=name):
+                # Keng diapazon - massiv tuzilmaydi
+                wide = [
+                    (min_score * scale, max_score * scale + scale - 1, cid)
+                    for min_score, max_score, cid in intervals
+                ]
+                lookup = CategoryLookup(wide)
+                self.assertIsNone(lookup.table)
+                self._assert_first_match(wide, lookup, self._scores(wide, scale) + self._scores(wide))
+
+    def test_dense_limit_boundary(self):
+        limit = CategoryLookup.DENSE_LIMIT
+        self.assertIsNotNone(CategoryLookup([(0, limit - 1, 1)]).table)
+        lookup = CategoryLookup([(0, limit, 1)])
+        self.assertIsNone(lookup.table)
+        self._assert_first_match([(0, limit, 1)], lookup, [-1, 0, limit, limit + 1])
+
+    def test_gaps_and_overlaps(self):
+        intervals = self.CASES['kesishgan'] + [(40, 41, 5)]
+        self.assertEqual(CategoryLookup.gaps(intervals), [(31, 39)])
+        self.assertEqual(CategoryLookup.overlaps(intervals), [(0, 1), (0, 2), (1, 3)])
+
+
+# ==================== PSIXOMETRIKA ====================
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy o'rnatilmagan")
+class ItemAnalysisTests(TestCase):
+    """KR-20, p-value va point-biserial qo'lda hisoblangan qiymatlar bilan"""
+
+    # urinishlar x savollar: 1 - to'g'ri, 0 - noto'g'ri variant, None - javobsiz
+    MATRIX = [
+        [1, 1, 1],
+        [1, 1, 0],
+        [1, 0, 0],
+        [1, 0, None],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_superuser('items_admin', 'items@example.com', 'items')
+        cls.quiz = _create_standard_quiz(author, 0, 3)
+        cls.questions = list(cls.quiz.questions.order_by('order'))
+        cls.student = _build_student(0)
+        cls.student.save()
+
+    def setUp(self):
+        _clear_caches()
+
+    def _attempts(self, matrix):
+        for row in matrix:
+            _finished_attempt(self.student, self.quiz, {
+                question.pk: question.options.get(order=0 if value else 1).pk
+                for question, value in zip(self.questions, row)
+                if value is not None
+            })
+
+    def test_hand_computed(self):
+        from main.item_analysis import analyze
+
+        self._attempts(self.MATRIX)
+        # Yakunlanmagan urinish hisobga olinmaydi
+        QuizAttempt.objects.create(student=self.student, quiz=self.quiz, deadline_at=timezone.now())
+        analysis = analyze(self.quiz)
+        first, second, third = (analysis['questions'][question.pk] for question in self.questions)
+
+        self.assertEqual(analysis['attempts'], 4)
+        # totals = [3, 2, 1, 1]: var = 0.6875, sum(pq) = 0 + 0.25 + 0.1875
+        self.assertEqual(analysis['kr20'], round(1.5 * (1 - 0.4375 / 0.6875), 4))
+        self.assertEqual([first['p_value'], second['p_value'], third['p_value']], [1.0, 0.5, 0.25])
+        # Hamma to'g'ri topgan savol - dispersiya nol, farqlash aniqlanmaydi
+        self.assertIsNone(first['discrimination'])
+        # x = [1, 1, 0, 0], qolgan ball = [2, 1, 1, 1]: r = 0.125 / (0.5 * sqrt(0.1875))
+        self.assertEqual(second['discrimination'], 0.5774)
+        self.assertEqual(third['discrimination'], 0.5774)
+
+        options = third['options']
+        self.assertEqual(options[self.questions[2].options.get(order=0).pk]['count'], 1)
+        self.assertEqual(options[self.questions[2].options.get(order=1).pk]['share'], 0.5)
+
+    def test_attempt_without_responses_is_a_row(self):
+        from main.item_analysis import analyze
+
+        self._attempts(self.MATRIX + [[None, None, None]])
+        analysis = analyze(self.quiz)
+        self.assertEqual(analysis['attempts'], 5)
+        self.assertEqual(analysis['questions'][self.questions[0].pk]['p_value'], 0.8)
+
+    def test_zero_variance(self):
+        from main.item_analysis import analyze
+
+        self._attempts([[1, 0, 1]] * 3)
+        analysis = analyze(self.quiz)
+        self.assertIsNone(analysis['kr20'])
+        for question in self.questions:
+            self.assertIsNone(analysis['questions'][question.pk]['discrimination'])
+
+    def test_no_attempts(self):
+        from main.item_analysis import analyze
+
+        analysis = analyze(self.quiz)
+        self.assertEqual(analysis['attempts'], 0)
+        self.assertIsNone(analysis['kr20'])
+        self.assertIsNone(analysis['questions'][self.questions[0].pk]['p_value'])
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy o'rnatilmagan")
+class ScaleAnalyticsTests(SimpleTestCase):
+    """Cronbach alfa, savol-umumiy ball korrelyatsiyasi va normalar"""
+
+    def test_cronbach_alpha(self):
+        import numpy as np
+        from main.scale_analytics import cronbach_alpha
+
+        # Savollar dispersiyasi 1 va 1/3, umumiy ball [3, 5, 6] dispersiyasi 7/3
+        matrix = np.array([[1, 2], [2, 3], [3, 3]], dtype=np.float64)
+        self.assertAlmostEqual(cronbach_alpha(matrix), 6 / 7)
+
+    def test_cronbach_alpha_undefined(self):
+        import numpy as np
+        from main.scale_analytics import cronbach_alpha
+
+        cases = {
+            'nol dispersiya': [[1, 1], [1, 1], [1, 1]],
+            'bitta savol': [[1], [2], [3]],
+            'bitta respondent': [[1, 2, 3]],
+        }
+        for name, matrix in cases.items():
+            with self.subTest(case=name):
+                self.assertIsNone(cronbach_alpha(np.array(matrix, dtype=np.float64)))
+
+    def test_item_total_correlations(self):
+        import numpy as np
+        from main.scale_analytics import _float, item_total_correlations
+
+        matrix = np.array([[1, 0, 0], [1, 1, 1], [1, 0, 1]], dtype=np.float64)
+        correlations = [_float(value) for value in item_total_correlations(matrix)]
+        # 1-savol o'zgarmas - korrelyatsiya aniqlanmaydi
+        self.assertIsNone(correlations[0])
+        # x = [0, 1, 0], qolgan ball = [1, 2, 2]: cov = 1/9, std = sqrt(2)/3 ikkalasida
+        self.assertEqual(correlations[1], 0.5)
+
+    def test_norm_table(self):
+        from main.scale_analytics import norm_table
+
+        norm = norm_table([4, 2, 1, 2])
+        self.assertEqual(norm['size'], 4)
+        self.assertEqual(norm['min_score'], 1)
+        self.assertEqual(norm['mean'], 2.25)
+        self.assertAlmostEqual(norm['std'], 1.1875 ** 0.5)
+        # (kichiklar + tenglar / 2) / n: 1 -> 0.5/4, 2 -> 2/4, 3 -> 3/4, 4 -> 3.5/4
+        self.assertEqual(norm['percentiles'], [12.5, 50.0, 75.0, 87.5])
+
+    def test_norm_table_single_score(self):
+        from main.scale_analytics import norm_table
+
+        norm = norm_table([5, 5, 5])
+        self.assertEqual((norm['min_score'], norm['std'], norm['percentiles']), (5, 0.0, [50.0]))
+
+
+# ==================== SUPURGICH ====================
+
+def _active_attempt(student, quiz, overdue=True, answers=None):
+    """Faol urinish: overdue - muddati bir daqiqa oldin tugagan"""
+    attempt = QuizAttempt.objects.create(
+        student=student, quiz=quiz,
+        deadline_at=timezone.now() + timedelta(minutes=-1 if overdue else 10),
+    )
+    UserResponse.objects.bulk_create(UserResponse.build_rows(attempt, answers or {})[0])
+    return attempt
+
+
+class ExpirySweeperTests(TestCase):
+    """expire_batch / expire_overdue: holat, baholash, hisoblagichlar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_superuser('expiry_admin', 'expiry@example.com', 'expiry')
+        cls.quiz = _create_standard_quiz(author, 0, 4)
+        cls.questions = list(cls.quiz.questions.order_by('order'))
+        cls.students = Student.objects.bulk_create([_build_student(i) for i in range(4)])
+
+    def setUp(self):
+        _clear_caches()
+
+    def _expired_counter(self, student):
+        return StudentStats.objects.get(student=student).expired_attempts
+
+    def test_expires_and_scores_overdue_attempts(self):
+        from main.expiry import expire_overdue
+
+        correct = {question.pk: question.options.get(order=0).pk for question in self.questions[:3]}
+        # Talaba bitta testda faqat bitta faol urinishga ega bo'ladi
+        overdue = [
+            _active_attempt(self.students[0], self.quiz, answers=correct),
+            _active_attempt(self.students[1], self.quiz),
+            _active_attempt(self.students[2], self.quiz),
+        ]
+        active = _active_attempt(self.students[3], self.quiz, overdue=False)
+        completed = _finished_attempt(self.students[0], self.quiz)
+        StudentStats.rebuild(student.pk for student in self.students)
+        before = [self._expired_counter(student) for student in self.students]
+
+        self.assertEqual(expire_overdue(batch_size=2), len(overdue))
+
+        for attempt in overdue:
+            attempt.refresh_from_db()
+            self.assertEqual(attempt.status, 'expired')
+            self.assertIsNotNone(attempt.completed_at)
+            self.assertEqual(attempt.time_taken, attempt.get_time_limit_seconds())
+        self.assertEqual(QuizAttempt.objects.get(pk=active.pk).status, 'in_progress')
+        self.assertEqual(QuizAttempt.objects.get(pk=completed.pk).status, 'completed')
+
+        result = Result.objects.get(attempt=overdue[0])
+        self.assertEqual((result.correct_answers, result.unanswered), (3, 1))
+        self.assertTrue(Result.objects.filter(attempt=overdue[1], correct_answers=0).exists())
+
+        after = [self._expired_counter(student) for student in self.students]
+        self.assertEqual([a - b for a, b in zip(after, before)], [1, 1, 1, 0])
+
+    def test_second_run_is_noop(self):
+        from main.expiry import expire_batch, expire_overdue
+
+        _active_attempt(self.students[0], self.quiz)
+        StudentStats.rebuild([self.students[0].pk])
+        self.assertEqual(expire_batch(), 1)
+        counter = self._expired_counter(self.students[0])
+        results = Result.objects.count()
+
+        self.assertEqual(expire_batch(), 0)
+        self.assertEqual(expire_overdue(), 0)
+        self.assertEqual(self._expired_counter(self.students[0]), counter)
+        self.assertEqual(Result.objects.count(), results)
+
+    def test_missing_stats_row_is_rebuilt(self):
+        from main.expiry import expire_batch
+
+        _active_attempt(self.students[1], self.quiz)
+        StudentStats.objects.filter(student=self.students[1]).delete()
+        expire_batch()
+        self.assertEqual(self._expired_counter(self.students[1]), 1)
+
+
+    def _scored_attempt_ids(self):
+        """score_attempts chaqiruvlarida baholangan urinishlar (takrorlar bilan)"""
+        from unittest import mock
+        from main import scoring
+
+        scored = []
+
+        def record(attempts):
+            scored.extend(attempt.pk for attempt in attempts)
+            return original(attempts)
+
+        original = scoring.score_attempts
+        return scored, mock.patch.object(scoring, 'score_attempts', side_effect=record)
+
+    def test_stale_instance_after_sweep(self):
+        """Supurgichdan keyin eski obyektda complete_attempt - hech narsa takrorlanmaydi"""
+        from main.expiry import expire_batch
+
+        stale = _active_attempt(self.students[0], self.quiz)
+        StudentStats.rebuild([self.students[0].pk])
+        scored, patch = self._scored_attempt_ids()
+        with patch, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_batch(), 1)
+            self.assertFalse(stale.complete_attempt())
+
+        self.assertEqual(stale.status, 'expired')
+        self.assertEqual(QuizAttempt.objects.get(pk=stale.pk).status, 'expired')
+        stats = StudentStats.objects.get(student=self.students[0])
+        self.assertEqual((stats.expired_attempts, stats.completed_attempts), (1, 0))
+        self.assertEqual(scored, [stale.pk])
+
+    def test_double_submit(self):
+        """Ikki marta yuborilgan "Yakunlash" - bitta o'tish, bitta baholash"""
+        attempt = _active_attempt(self.students[1], self.quiz, overdue=False)
+        StudentStats.rebuild([self.students[1].pk])
+        first, second = (QuizAttempt.objects.select_related('quiz').get(pk=attempt.pk) for _ in range(2))
+        scored, patch = self._scored_attempt_ids()
+        with patch, self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(first.complete_attempt())
+            self.assertFalse(second.complete_attempt())
+
+        self.assertEqual(StudentStats.objects.get(student=self.students[1]).completed_attempts, 1)
+        self.assertEqual(scored, [attempt.pk])
+        self.assertEqual(Result.objects.filter(attempt=attempt).count(), 1)
+
+    def test_expired_time_taken_is_full_limit(self):
+        """30 daqiqalik test muddati o'tsa time_taken aynan 1800"""
+        from main.expiry import expire_batch
+
+        self.quiz.time_limit = 30
+        self.quiz.save()
+        swept = QuizAttempt.objects.create(student=self.students[0], quiz=self.quiz)
+        on_page = QuizAttempt.objects.create(student=self.students[1], quiz=self.quiz)
+        # Boshlanish va muddat birga orqaga suriladi - ajratilgan vaqt o'zgarmaydi
+        QuizAttempt.objects.filter(pk__in=[swept.pk, on_page.pk]).update(
+            started_at=F('started_at') - timedelta(minutes=31),
+            deadline_at=F('deadline_at') - timedelta(minutes=31),
+        )
+
+        on_page = QuizAttempt.objects.select_related('quiz').get(pk=on_page.pk)
+        self.assertTrue(on_page.expire_attempt())
+        self.assertEqual(expire_batch(), 1)
+        self.assertEqual(
+            list(QuizAttempt.objects.filter(pk__in=[swept.pk, on_page.pk]).values_list('time_taken', flat=True)),
+            [1800, 1800],
+        )
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'SKIP LOCKED faqat PostgreSQL da')
+class ExpirySkipLockedTests(TransactionTestCase):
+    """Boshqa tranzaksiya qulflagan urinish o'tkazib yuboriladi va keyin bir marta yakunlanadi"""
+
+    def test_locked_attempt_is_skipped(self):
+        from main.expiry import expire_batch
+
+        author = User.objects.create_superuser('lock_admin', 'lock@example.com', 'lock')
+        quiz = _create_standard_quiz(author, 0, 2)
+        students = Student.objects.bulk_create([_build_student(i) for i in range(2)])
+        locked, free = (_active_attempt(student, quiz) for student in students)
+        StudentStats.rebuild(student.pk for student in students)
+
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            with transaction.atomic():
+                QuizAttempt.objects.select_for_update().get(pk=locked.pk)
+                acquired.set()
+                release.wait(10)
+            connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            self.assertTrue(acquired.wait(10))
+            self.assertEqual(expire_batch(), 1)
+            self.assertEqual(QuizAttempt.objects.get(pk=free.pk).status, 'expired')
+            self.assertEqual(QuizAttempt.objects.get(pk=locked.pk).status, 'in_progress')
+        finally:
+            release.set()
+            holder.join()
+
+        self.assertEqual(expire_batch(), 1)
+        self.assertEqual(expire_batch(), 0)
+        self.assertEqual(
+            list(StudentStats.objects.order_by('student__hemis_id').values_list('expired_attempts', flat=True)),
+            [1, 1],
+        )
+
+
+# ==================== PSIXOLOGIK STATISTIKA ====================
+
+def _baseline_psych_stats(filters, now):
+    """
+    Eski statistika sahifasi konteksti - natijalar obyektma-obyekt aylanadi
+
+    Ataylab qilingan farqlar: oylar mahalliy vaqtda, teng sonli kategoriyalar
+    kategoriya tartibi bo'yicha.
+    """
+    from main import psych_stats
+    from main.models import PsychologicalScaleResult
+    from student.models import StudentGroup
+
+    results = list(
+        PsychologicalResult.objects.filter(**filters.lookups()).select_related(
+            'attempt__student__group', 'attempt__quiz',
+        ).prefetch_related('scale_results__category').order_by('-created_at')
+    )
+
+    def colors(items):
+        counts = dict.fromkeys(psych_stats.COLORS, 0)
+        for result in items:
+            for scale_result in result.scale_results.all():
+                if scale_result.category:
+                    counts[scale_result.category.color] += 1
+        return counts
+
+    color_counts = colors(results)
+    total_color = sum(color_counts.values()) or 1
+    percentages = {color: round(count / total_color * 100, 1) for color, count in color_counts.items()}
+
+    local_now = timezone.localtime(now)
+    months = []
+    for i in range(psych_stats.TIMELINE_MONTHS - 1, -1, -1):
+        month_start = (local_now.replace(day=1) - timedelta(days=i * 30)).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        month_end = local_now if i == 0 else (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        months.append((month_start, month_end))
+    timeline = [colors(r for r in results if start <= r.created_at < end) for start, end in months]
+
+    scale_stats = []
+    quiz_ids = {result.attempt.quiz_id for result in results}
+    scales = PsychologicalScale.objects.filter(quiz__quiz_type='psychological', quiz_id__in=quiz_ids)
+    scales = sorted(
+        scales.select_related('quiz'),
+        key=lambda scale: (-scale.quiz.created_at.timestamp(), scale.quiz_id, scale.order, scale.pk),
+    )
+    for scale in scales:
+        scale_results = list(PsychologicalScaleResult.objects.filter(
+            scale=scale, result__in=[result.pk for result in results],
+        ).select_related('category'))
+        if not scale_results:
+            continue
+        categories = {}
+        for scale_result in scale_results:
+            category = scale_result.category
+            key = (category.name, category.color, category.order) if category else ('Nomalum', 'none', None)
+            categories[key] = categories.get(key, 0) + 1
+        ordered = sorted(categories.items(), key=lambda item: (-item[1], item[0][2] is None, item[0][2] or 0))
+        scale_stats.append({
+            'scale_name': scale.name,
+            'total_results': len(scale_results),
+            'avg_score': round(sum(sr.total_score for sr in scale_results) / len(scale_results), 1),
+            'category_stats': [
+                {
+                    'category_name': name,
+                    'color': color,
+                    'count': count,
+                    'pct': round(count / len(scale_results) * 100, 1),
+                }
+                for (name, color, _), count in ordered
+            ],
+        })
+
+    faculty_chart = {'labels': [], **{color: [] for color in psych_stats.COLORS}}
+    for faculty in psych_stats.faculty_options():
+        counts = colors(r for r in results if r.attempt.student.faculty == faculty)
+        if sum(counts.values()):
+            faculty_chart['labels'].append(faculty[:15] + '…' if len(faculty) > 15 else faculty)
+            for color in psych_stats.COLORS:
+                faculty_chart[color].append(counts[color])
+
+    group_chart = {'labels': [], 'values': []}
+    for group in StudentGroup.objects.all():
+        count = sum(1 for r in results if r.attempt.student.group_id == group.pk)
+        if count:
+            group_chart['labels'].append(group.group_name[:12])
+            group_chart['values'].append(count)
+
+    recent = []
+    for result in results[:psych_stats.RECENT_LIMIT]:
+        student = result.attempt.student
+        tags = [
+            {
+                'color': sr.category.color,
+                'icon': psych_stats.COLOR_ICONS.get(sr.category.color, '⚪'),
+                'label': sr.category.name,
+            }
+            for sr in sorted(result.scale_results.all(), key=lambda sr: sr.pk)
+            if sr.category
+        ]
+        recent.append({
+            'id': result.id,
+            'student_name': student.student_name or '-',
+            'faculty': student.faculty or '-',
+            'group_name': student.group.group_name if student.group else '-',
+            'quiz_title': result.attempt.quiz.title,
+            'color_tags': tags[:4],
+            'created_at': result.created_at.strftime('%d.%m.%Y %H:%M'),
+        })
+
+    return {
+        'color': {
+            'total_results': len(results),
+            'color_counts': color_counts,
+            'color_percentages': percentages,
+            'color_chart': {
+                'labels': psych_stats.COLOR_LABELS,
+                'values': [color_counts[color] for color in psych_stats.COLORS],
+                'percentages': [percentages[color] for color in psych_stats.COLORS],
+            },
+        },
+        'timeline': {'timeline_chart': {
+            'labels': [start.strftime('%b %Y') for start, _ in months],
+            **{color: [counts[color] for counts in timeline] for color in psych_stats.COLORS},
+        }},
+        'scale': {
+            'scale_stats': scale_stats,
+            'scale_chart': {
+                'labels': [stat['scale_name'][:25] for stat in scale_stats],
+                'avg_scores': [stat['avg_score'] for stat in scale_stats],
+            },
+        },
+        'faculty': {'faculty_chart': faculty_chart},
+        'group': {'group_chart': group_chart},
+        'recent': {'recent_results': recent},
+    }
+
+
+class PsychologicalStatsTests(TestCase):
+    """Statistika to'plamlari (main.psych_stats) eski sahifa konteksti bilan bir xil"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from main.models import PsychologicalScaleResult, ScaleResultFact
+
+        cls.data = seed_synthetic_data(students=40, questions=9)
+        rng = random.Random(11)
+        now = timezone.now()
+        results = list(PsychologicalResult.objects.order_by('pk'))
+        for result in results:
+            result.created_at = now - timedelta(days=rng.randint(0, 330), hours=rng.randint(0, 23))
+        PsychologicalResult.objects.bulk_update(results, ['created_at'])
+        # Kategoriyasiz shkala natijalari va shkala natijasi yo'q natija
+        PsychologicalScaleResult.objects.filter(
+            pk__in=list(PsychologicalScaleResult.objects.order_by('pk').values_list('pk', flat=True)[:7])
+        ).update(category=None)
+        PsychologicalScaleResult.objects.filter(result=results[-1]).delete()
+        ScaleResultFact.refresh(result.pk for result in results)
+
+        group = StudentGroup.objects.filter(students__isnull=False).first()
+        cls.group = group
+        cls.filter_params = [
+            {},
+            {'quiz': cls.data.psychological_quiz.pk},
+            {'faculty': FACULTIES[1]},
+            {'level': LEVELS[1]},
+            {'group': group.pk},
+            {'faculty': FACULTIES[0], 'level': LEVELS[0]},
+        ]
+
+    def setUp(self):
+        _clear_caches()
+
+    def test_datasets_match_baseline(self):
+        from main import psych_stats
+
+        now = timezone.now()
+        for params in self.filter_params:
+            filters = psych_stats.StatsFilters.from_query(params)
+            expected = _baseline_psych_stats(filters, now)
+            for name in psych_stats.DATASETS:
+                with self.subTest(filters=params, dataset=name):
+                    self.assertEqual(psych_stats.dataset(name, filters, now=now), expected[name])
+
+    def _assert_cube_matches_db(self, cube):
+        import itertools
+        from main import psych_stats
+
+        now = timezone.now()
+        quizzes = ['', *Quiz.objects.filter(quiz_type='psychological').values_list('pk', flat=True)]
+        for quiz, faculty, level, group in itertools.product(
+            quizzes, ['', FACULTIES[0], "Yo'q"], ['', LEVELS[1]], ['', self.group.pk],
+        ):
+            filters = psych_stats.StatsFilters.from_query(
+                {'quiz': quiz, 'faculty': faculty, 'level': level, 'group': group}
+            )
+            for name in psych_stats.DATASETS:
+                if name == 'recent':
+                    continue
+                with self.subTest(filters=filters, dataset=name):
+                    self.assertEqual(
+                        psych_stats.dataset(name, filters, source=cube, now=now),
+                        psych_stats.dataset(name, filters, now=now),
+                    )
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "NumPy o'rnatilmagan")
+    def test_cube_matches_db(self):
+        from main.scoring import score_attempts
+        from main.stats_cube import StatsCube
+
+        cube = StatsCube()
+        self._assert_cube_matches_db(cube)
+
+        # Yangi natijalar kubga qo'shimcha yuklash bilan tushadi
+        answer_key = self.data.psychological_quiz.get_answer_key()
+        answers = {option.question_id: option_id for option_id, option in answer_key.options.items()}
+        students = Student.objects.bulk_create([_build_student(100 + i, self.group) for i in range(3)])
+        score_attempts([
+            _finished_attempt(student, self.data.psychological_quiz, answers) for student in students
+        ])
+        cube.refresh()
+        self._assert_cube_matches_db(cube)
+
+
+# ==================== JAVOBLAR BUFERI ====================
+
+class MemoryAnswerBuffer:
+    """RedisAnswerBuffer o'rnini bosuvchi (bitta jarayon) - faqat testlar uchun"""
+
+    def __init__(self):
+        self.answers = {}
+
+    def record(self, attempt, rows):
+        self.answers.setdefault(attempt.pk, {}).update(
+            {row.question_id: row.selected_option_id for row in rows}
+        )
+
+    def peek(self, attempt_id):
+        return dict(self.answers.get(attempt_id, {}))
+
+    def pop(self, attempt_id):
+        return self.answers.pop(attempt_id, {})
+
+    def dirty_attempts(self):
+        return list(self.answers)
+
+
+class AnswerBufferTests(TestCase):
+    """Avtosaqlash, yakunlashdan oldin flush va kechikkan javoblar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_superuser('buffer_admin', 'buffer@example.com', 'buffer')
+        cls.quiz = _create_standard_quiz(author, 0, 4)
+        cls.questions = list(cls.quiz.questions.order_by('order'))
+        cls.student = _build_student(0)
+        cls.student.save()
+
+    def setUp(self):
+        from unittest import mock
+
+        _clear_caches()
+        self.buffer = MemoryAnswerBuffer()
+        patcher = mock.patch('main.answer_buffer._buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = _student_client(self.student)
+        self.attempt = QuizAttempt.objects.create(student=self.student, quiz=self.quiz)
+
+    def _autosave(self, answers):
+        return self.client.post(
+            reverse('quiz_autosave', kwargs={'pk': self.quiz.pk}),
+            data=json.dumps({'answers': answers}),
+            content_type='application/json',
+        )
+
+    def _correct(self, question):
+        return question.options.get(order=0).pk
+
+    def test_autosave_round_trip(self):
+        from main.answer_buffer import flush_dirty
+
+        first, second = self.questions[:2]
+        response = self._autosave({
+            str(first.pk): self._correct(first),
+            str(second.pk): self._correct(first),  # boshqa savolning varianti
+        })
+        self.assertEqual(response.json(), {'success': True, 'saved_count': 1, 'rejected_count': 1})
+        self.assertFalse(UserResponse.objects.filter(attempt=self.attempt).exists())
+
+        # Sahifa buferdagi javobni ko'rsatadi
+        page = self.client.get(reverse('quiz_take', kwargs={'pk': self.quiz.pk}))
+        self.assertEqual(page.context['responses'], {first.pk: self._correct(first)})
+
+        self.assertEqual(flush_dirty(), (1, 1))
+        self.assertEqual(
+            list(UserResponse.objects.filter(attempt=self.attempt).values_list('question_id', 'is_correct')),
+            [(first.pk, True)],
+        )
+        self.assertEqual(self.buffer.answers, {})
+
+    def test_submit_flushes_before_scoring(self):
+        self._autosave({str(question.pk): self._correct(question) for question in self.questions[:3]})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('quiz_take', kwargs={'pk': self.quiz.pk}), {'action': 'submit'})
+        self.assertRedirects(
+            response, reverse('quiz_result', kwargs={'attempt_id': self.attempt.pk}),
+            fetch_redirect_response=False,
+        )
+        result = Result.objects.get(attempt=self.attempt)
+        self.assertEqual((result.correct_answers, result.unanswered), (3, 1))
+        self.assertEqual(self.buffer.answers, {})
+
+    def test_late_answers_dropped(self):
+        from main.answer_buffer import flush_dirty
+
+        question = self.questions[0]
+        rows, _ = UserResponse.build_rows(self.attempt, {question.pk: self._correct(question)})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.attempt.complete_attempt()
+        # Yakunlashdan keyin yetib kelgan javob
+        self.buffer.record(self.attempt, rows)
+
+        self.assertEqual(self._autosave({str(question.pk): self._correct(question)}).status_code, 404)
+        self.assertEqual(flush_dirty(), (1, 0))
+        self.assertFalse(UserResponse.objects.filter(attempt=self.attempt).exists())
+        self.assertEqual(self.buffer.answers, {})
+
+    def test_database_buffer_writes_immediately(self):
+        from unittest import mock
+        from main.answer_buffer import DatabaseAnswerBuffer, flush_dirty
+
+        question = self.questions[1]
+        with mock.patch('main.answer_buffer._buffer', DatabaseAnswerBuffer()):
+            self.assertEqual(self._autosave({str(question.pk): self._correct(question)}).status_code, 200)
+            self.assertEqual(flush_dirty(), (0, 0))
+        self.assertTrue(
+            UserResponse.objects.filter(attempt=self.attempt, question=question, is_correct=True).exists()
+        )
+
+
+# ==================== BAHOLASH NAVBATI ====================
+
+class MemoryScoringQueue:
+    """RedisScoringQueue o'rnini bosuvchi - faqat testlar uchun"""
+
+    def __init__(self):
+        self.pending = []
+
+    def enqueue(self, attempts):
+        self.pending.extend(attempt.pk for attempt in attempts)
+
+    def claim(self, limit):
+        claimed, self.pending = self.pending[:limit], self.pending[limit:]
+        return claimed
+
+    def depth(self):
+        return len(self.pending)
+
+
+class ScoringQueueTests(TestCase):
+    """Yakunlash -> navbat -> natija va natija sahifasining kutish holati"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_superuser('queue_admin', 'queue@example.com', 'queue')
+        cls.quiz = _create_standard_quiz(author, 0, 3)
+        cls.question = cls.quiz.questions.order_by('order').first()
+        cls.student = _build_student(0)
+        cls.student.save()
+
+    def setUp(self):
+        _clear_caches()
+        self.client = _student_client(self.student)
+        self.attempt = QuizAttempt.objects.create(student=self.student, quiz=self.quiz)
+
+    def _queue(self, queue):
+        from unittest import mock
+
+        patcher = mock.patch('main.scoring_queue._queue', queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return queue
+
+    def _submit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('quiz_take', kwargs={'pk': self.quiz.pk}), {
+                'action': 'submit',
+                f'question_{self.question.pk}': self.question.options.get(order=0).pk,
+            })
+
+    def test_submit_scores_through_local_queue(self):
+        from main.scoring_queue import LocalScoringQueue
+
+        enqueued = []
+
+        class RecordingQueue(LocalScoringQueue):
+            def enqueue(self, attempts):
+                enqueued.extend(attempt.pk for attempt in attempts)
+                super().enqueue(attempts)
+
+        self._queue(RecordingQueue())
+        self._submit()
+        self.assertEqual(enqueued, [self.attempt.pk])
+        self.assertEqual(Result.objects.get(attempt=self.attempt).correct_answers, 1)
+
+    def test_result_page_pending_until_scored(self):
+        from main.scoring_queue import process_pending
+
+        queue = self._queue(MemoryScoringQueue())
+        self._submit()
+        self.assertEqual(queue.pending, [self.attempt.pk])
+        url = reverse('quiz_result', kwargs={'attempt_id': self.attempt.pk})
+
+        pending = self.client.get(url)
+        self.assertTemplateUsed(pending, 'result_pending.html')
+        self.assertFalse(Result.objects.filter(attempt=self.attempt).exists())
+
+        self.assertEqual(process_pending(), 1)
+        page = self.client.get(url)
+        self.assertTemplateNotUsed(page, 'result_pending.html')
+        self.assertTemplateUsed(page, 'result.html')
+        self.assertEqual(page.context['result'].correct_answers, 1)
+
+    def test_reconcile_scores_lost_attempts(self):
+        from main.scoring_queue import reconcile
+
+        self._queue(MemoryScoringQueue())
+        self._submit()
+        other = _build_student(1)
+        other.save()
+        recent = _finished_attempt(other, self.quiz)
+        # Navbatdan yo'qolgan (worker to'xtagan) urinish
+        QuizAttempt.objects.filter(pk=self.attempt.pk).update(
+            completed_at=timezone.now() - timedelta(minutes=5),
+        )
+
+        self.assertEqual(reconcile(older_than=60), 1)
+        self.assertTrue(Result.objects.filter(attempt=self.attempt).exists())
+        # Yaqinda yakunlangan urinish hali navbatda bo'lishi mumkin
+        self.assertFalse(Result.objects.filter(attempt=recent).exists())
+        self.assertEqual(reconcile(older_than=0), 1)
+        self.assertTrue(Result.objects.filter(attempt=recent).exists())
+
+
+# ==================== QAYTA BAHOLASH ====================
+
+class RescoringTests(TestCase):
+    """rescore_quiz, rescore_quiz buyrug'i va admin amali"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from main.scoring import score_attempts
+
+        _clear_caches()
+        cls.admin = User.objects.create_superuser('rescore_admin', 'rescore@example.com', 'rescore')
+        cls.standard = _create_standard_quiz(cls.admin, 0, 3)
+        cls.psychological = _create_psychological_quiz(cls.admin, 1, 3, scales=1)
+        students = Student.objects.bulk_create([_build_student(i) for i in range(2)])
+
+        cls.question = cls.standard.questions.order_by('order').first()
+        standard_answers = [0, 1]  # 1-talaba to'g'ri, 2-talaba noto'g'ri (hozircha) variant
+        cls.psych_question = cls.psychological.questions.order_by('order').first()
+        attempts = []
+        for student, order in zip(students, standard_answers):
+            attempts.append(_finished_attempt(student, cls.standard, {
+                cls.question.pk: cls.question.options.get(order=order).pk,
+            }))
+            attempts.append(_finished_attempt(student, cls.psychological, {
+                cls.psych_question.pk: cls.psych_question.options.get(order=order).pk,
+            }))
+        score_attempts(list(QuizAttempt.objects.filter(pk__in=[a.pk for a in attempts]).select_related('quiz')))
+        cls.standard_attempts = attempts[0::2]
+        cls.psych_attempts = attempts[1::2]
+
+    def setUp(self):
+        _clear_caches()
+
+    def _fix_standard_key(self):
+        """To'g'ri javob 1-variantdan 2-variantga ko'chadi"""
+        for order, is_correct in ((0, False), (1, True)):
+            option = self.question.options.get(order=order)
+            option.is_correct = is_correct
+            option.save()
+
+    def _fix_psychological_key(self):
+        option = self.psych_question.options.get(order=1)
+        option.psychological_score = 3
+        option.save()
+
+    def _state(self, attempts):
+        from main.models import PsychologicalScaleResult
+
+        attempt_ids = [attempt.pk for attempt in attempts]
+        return (
+            sorted(UserResponse.objects.filter(attempt_id__in=attempt_ids).values_list(
+                'attempt_id', 'is_correct', 'earned_score',
+            )),
+            sorted(Result.objects.filter(attempt_id__in=attempt_ids).values_list(
+                'attempt_id', 'correct_answers', 'total_score',
+            )),
+            sorted(PsychologicalScaleResult.objects.filter(result__attempt_id__in=attempt_ids).values_list(
+                'result__attempt_id', 'total_score', 'category_id',
+            )),
+            sorted(QuizAttempt.objects.filter(pk__in=attempt_ids).values_list('pk', 'score_version')),
+        )
+
+    def test_standard_dry_run(self):
+        from main.rescoring import rescore_quiz
+
+        self._fix_standard_key()
+        before = self._state(self.standard_attempts)
+        totals = rescore_quiz(self.standard.pk, dry_run=True)
+
+        self.assertEqual((totals['attempts'], totals['responses_changed'], totals['results_changed']), (2, 2, 2))
+        diffs = {attempt_id: (old[0], new[0]) for attempt_id, old, new in totals['diffs']}
+        self.assertEqual(diffs, {self.standard_attempts[0].pk: (1, 0), self.standard_attempts[1].pk: (0, 1)})
+        self.assertEqual(self._state(self.standard_attempts), before)
+
+    def test_standard_rescore(self):
+        from main.rescoring import rescore_quiz
+
+        self._fix_standard_key()
+        versions = dict(QuizAttempt.objects.filter(quiz=self.standard).values_list('pk', 'score_version'))
+        rescore_quiz(self.standard.pk)
+
+        first, second = self.standard_attempts
+        responses, results, _, score_versions = self._state(self.standard_attempts)
+        self.assertEqual(
+            [(attempt_id, is_correct) for attempt_id, is_correct, _ in responses],
+            [(first.pk, False), (second.pk, True)],
+        )
+        self.assertEqual([row[:2] for row in results], [(first.pk, 0), (second.pk, 1)])
+        self.assertEqual(score_versions, [(pk, version + 1) for pk, version in sorted(versions.items())])
+
+    def test_psychological_dry_run_and_rescore(self):
+        from django.core.management import call_command
+        from main.rescoring import rescore_quiz
+
+        self._fix_psychological_key()
+        before = self._state(self.psych_attempts)
+        out = io.StringIO()
+        call_command('rescore_quiz', self.psychological.pk, '--dry-run', stdout=out)
+        self.assertIn("1 ta natija o'zgaradi (dry-run)", out.getvalue())
+        self.assertEqual(self._state(self.psych_attempts), before)
+
+        totals = rescore_quiz(self.psychological.pk)
+        self.assertEqual((totals['responses_changed'], totals['results_changed']), (1, 1))
+        responses, _, scale_results, _ = self._state(self.psych_attempts)
+        second = self.psych_attempts[1].pk
+        self.assertIn((second, False, 3), responses)
+        self.assertEqual([row for row in scale_results if row[0] == second][0][1], 3)
+
+    def test_admin_action_limit(self):
+        client = Client()
+        client.force_login(self.admin)
+        self._fix_standard_key()
+        url = reverse('admin:main_quiz_changelist')
+        data = {'action': 'rescore_quizzes', admin.helpers.ACTION_CHECKBOX_NAME: [self.standard.pk]}
+
+        with override_settings(RESCORE_ADMIN_MAX_ATTEMPTS=1):
+            response = client.post(url, data, follow=True)
+        self.assertIn('rescore_quiz', str(list(response.context['messages'])[0]))
+        self.assertFalse(UserResponse.objects.filter(attempt=self.standard_attempts[1], is_correct=True).exists())
+
+        client.post(url, data)
+        self.assertTrue(UserResponse.objects.filter(attempt=self.standard_attempts[1], is_correct=True).exists())
+
+
+# ==================== TEST SAHIFASI ====================
+
+class QuizDetailTests(TestCase):
+    """QuizDetailView: eng yaxshi natija holat xaritasiga qarab olinadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from main.scoring import score_attempts
+
+        _clear_caches()
+        author = User.objects.create_superuser('detail_admin', 'detail@example.com', 'detail')
+        cls.standard = _create_standard_quiz(author, 0, 3)
+        cls.psychological = _create_psychological_quiz(author, 1, 3)
+        cls.student, cls.newcomer = Student.objects.bulk_create([_build_student(i) for i in range(2)])
+
+        questions = list(cls.standard.questions.order_by('order'))
+        correct = {question.pk: question.options.get(order=0).pk for question in questions}
+        one_correct = {question.pk: question.options.get(order=int(i > 0)).pk for i, question in enumerate(questions)}
+        score_attempts([
+            _finished_attempt(cls.student, cls.standard, one_correct),
+            _finished_attempt(cls.student, cls.standard, correct),
+        ])
+
+    def setUp(self):
+        _clear_caches()
+
+    def _get(self, student, quiz):
+        client = _student_client(student)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('quiz_detail', kwargs={'pk': quiz.pk}))
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries.captured_queries]
+        return response.context, sql
+
+    def _result_queries(self, sql, table):
+        return [statement for statement in sql if f'FROM "{table}"' in statement]
+
+    def test_best_result(self):
+        context, sql = self._get(self.student, self.standard)
+        self.assertEqual(context['best_result'].percentage, 100)
+        self.assertEqual(len(self._result_queries(sql, 'main_result')), 1)
+
+    def test_no_result_query_without_attempts(self):
+        context, sql = self._get(self.newcomer, self.standard)
+        self.assertIsNone(context['best_result'])
+        self.assertEqual(self._result_queries(sql, 'main_result'), [])
+
+    def test_no_psychological_query_while_in_progress(self):
+        _active_attempt(self.newcomer, self.psychological, overdue=False)
+        context, sql = self._get(self.newcomer, self.psychological)
+        self.assertIsNone(context['best_result'])
+        self.assertIsNotNone(context['current_attempt'])
+        self.assertEqual(self._result_queries(sql, 'main_psychologicalresult'), [])
+
+
+# ==================== JAVOBLARNI SAQLASH ====================
+
+class BulkSaveTests(TestCase):
+    """QuizTakeView.post: build_rows -> bulk_upsert"""
+
+    @classmethod
+    def setUpTestData(cls):
+        _clear_caches()
+        author = User.objects.create_superuser('bulk_admin', 'bulk@example.com', 'bulk')
+        cls.quiz = _create_standard_quiz(author, 0, 4)
+        cls.other_quiz = _create_standard_quiz(author, 1, 1)
+        cls.questions = list(cls.quiz.questions.order_by('order'))
+        cls.student = _build_student(0)
+        cls.student.save()
+
+    def setUp(self):
+        _clear_caches()
+        self.client = _student_client(self.student)
+        self.attempt = QuizAttempt.objects.create(student=self.student, quiz=self.quiz)
+
+    def _option(self, question, order):
+        return question.options.get(order=order).pk
+
+    def _save(self, answers):
+        response = self.client.post(
+            reverse('quiz_take', kwargs={'pk': self.quiz.pk}),
+            {f'question_{question_id}': option_id for question_id, option_id in answers.items()},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _saved(self):
+        return sorted(UserResponse.objects.filter(attempt=self.attempt).values_list(
+            'question_id', 'selected_option_id', 'is_correct', 'earned_score',
+        ))
+
+    def test_saved_and_rejected_counts(self):
+        first, second, third, fourth = self.questions
+        foreign = self.other_quiz.questions.get()
+        response = self._save({
+            first.pk: self._option(first, 0),
+            second.pk: self._option(second, 1),
+            third.pk: self._option(first, 1),  # boshqa savolning varianti
+            fourth.pk: self._option(foreign, 0),  # boshqa testning varianti
+            foreign.pk: self._option(foreign, 0),  # boshqa testning savoli
+        })
+
+        self.assertEqual((response['saved_count'], response['rejected_count']), (2, 3))
+        self.assertEqual(self._saved(), [
+            (first.pk, self._option(first, 0), True, first.score),
+            (second.pk, self._option(second, 1), False, 0),
+        ])
+
+    def test_upsert_overwrites_answer(self):
+        question = self.questions[0]
+        self._save({question.pk: self._option(question, 0)})
+        response = self._save({question.pk: self._option(question, 2)})
+
+        self.assertEqual((response['saved_count'], response['rejected_count']), (1, 0))
+        self.assertEqual(self._saved(), [(question.pk, self._option(question, 2), False, 0)])
+
+    def test_bulk_save_single_query(self):
+        answers = {question.pk: self._option(question, 0) for question in self.questions}
+        self.quiz.get_answer_key()  # kalit keshga tushadi
+        with self.assertNumQueries(1):
+            self.assertEqual(UserResponse.bulk_save(self.attempt, answers), (4, 0))
+        self.assertEqual(len(self._saved()), 4)
+
+
+# ==================== KUTISH ZALI ====================
+
+@override_settings(QUIZ_ADMISSION_ENABLED=True, QUIZ_ADMISSION_RATE=1, QUIZ_ADMISSION_WINDOW=60)
+class AdmissionTests(TestCase):
+    """Oynada bitta talaba qabul qilinadi, qolganlari navbatda kutadi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_superuser('admission_admin', 'admission@example.com', 'admission')
+        cls.quiz = _create_standard_quiz(author, 0, 2)
+        cls.first, cls.second = Student.objects.bulk_create([_build_student(i) for i in range(2)])
+
+    def setUp(self):
+        from unittest import mock
+
+        _clear_caches()
+        self.now = 1_000_000 * 60.0
+        patcher = mock.patch('main.admission.time')
+        self.clock = patcher.start()
+        self.clock.time.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+        self.take_url = reverse('quiz_take', kwargs={'pk': self.quiz.pk})
+        self.status_url = reverse('quiz_admission_status', kwargs={'pk': self.quiz.pk})
+
+    def _attempts(self, student):
+        return QuizAttempt.objects.filter(student=student, quiz=self.quiz).count()
+
+    def test_waiting_room_then_admitted(self):
+        from main.admission import SESSION_KEY, admission_stats
+
+        self.assertTemplateUsed(_student_client(self.first).get(self.take_url), 'take_quiz.html')
+
+        client = _student_client(self.second)
+        response = client.get(self.take_url)
+        self.assertTemplateUsed(response, 'quiz_waiting.html')
+        self.assertEqual(response.context['admission'].position, 1)
+        self.assertEqual(self._attempts(self.second), 0)
+        self.assertEqual(client.get(self.status_url).json()['admitted'], False)
+
+        # Keyingi oynada navbat boshi suriladi
+        self.now += 60
+        self.assertEqual(client.get(self.status_url).json(), {'admitted': True, 'position': 0, 'retry_after': 0})
+        self.assertTemplateUsed(client.get(self.take_url), 'take_quiz.html')
+        self.assertEqual(self._attempts(self.second), 1)
+        self.assertNotIn(str(self.quiz.pk), client.session[SESSION_KEY])
+        self.assertEqual(admission_stats(self.quiz.pk)['admitted'], 2)
+
+    def test_ticket_released_when_create_fails(self):
+        from unittest import mock
+        from django.db import IntegrityError
+        from main.admission import admission_stats
+
+        client = _student_client(self.first)
+        with mock.patch.object(QuizAttempt.objects, 'create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                client.get(self.take_url)
+        self.assertEqual(admission_stats(self.quiz.pk)['admitted'], 1)
+        self.assertEqual(self._attempts(self.first), 0)
+
+
+# ==================== KONTENT VERSIYASI ====================
+
+class ContentVersionTests(TestCase):
+    """Kontent o'zgarganda keshlangan kalit va sahifa eskiradi"""
+
+    @classmethod
+    def setUpTestData(cls):
+        _clear_caches()
+        author = User.objects.create_superuser('version_admin', 'version@example.com', 'version')
+        cls.standard = _create_standard_quiz(author, 0, 2)
+        cls.psychological = _create_psychological_quiz(author, 1, 2, scales=1)
+
+    def setUp(self):
+        _clear_caches()
+
+    def _changed(self, quiz, change):
+        """change() dan keyin versiya oshadi (kaskad o'chirishda bir necha marta) - yangilangan test qaytariladi"""
+        quiz.refresh_from_db()
+        version = quiz.content_version
+        change()
+        quiz.refresh_from_db()
+        self.assertGreater(quiz.content_version, version)
+        return quiz
+
+    def test_answer_key_invalidation(self):
+        question = self.standard.questions.order_by('order').first()
+        option = question.options.get(order=1)
+        self.assertFalse(self.standard.get_answer_key().lookup(question.pk, option.pk).is_correct)
+
+        option.is_correct = True
+        quiz = self._changed(self.standard, option.save)
+        self.assertTrue(quiz.get_answer_key().lookup(question.pk, option.pk).is_correct)
+
+        quiz = self._changed(quiz, option.delete)
+        self.assertIsNone(quiz.get_answer_key().options.get(option.pk))
+
+        question.score = 7
+        quiz = self._changed(quiz, question.save)
+        self.assertEqual(quiz.get_answer_key().questions[question.pk][0], 7)
+
+        quiz = self._changed(quiz, question.delete)
+        self.assertNotIn(question.pk, quiz.get_answer_key().questions)
+
+    def test_category_invalidation(self):
+        scale = self.psychological.psychological_scales.get()
+        category = scale.categories.order_by('order').first()
+        answer_key = self.psychological.get_answer_key()
+        self.assertEqual(answer_key.scales[scale.pk][0][1], category.max_score)
+
+        category.max_score += 1
+        quiz = self._changed(self.psychological, category.save)
+        self.assertEqual(quiz.get_answer_key().scales[scale.pk][0][1], category.max_score)
+
+        quiz = self._changed(quiz, category.delete)
+        self.assertNotIn(category.pk, [row[2] for row in quiz.get_answer_key().scales[scale.pk]])
+
+    def test_take_page_payload_invalidation(self):
+        student = _build_student(0)
+        student.save()
+        client = _student_client(student)
+        url = reverse('quiz_take', kwargs={'pk': self.standard.pk})
+        question = self.standard.questions.order_by('order').first()
+        option = question.options.get(order=1)
+        self.assertContains(client.get(url), option.option_text)
+
+        option.option_text = 'Yangilangan variant'
+        self._changed(self.standard, option.save)
+        self.assertContains(client.get(url), 'Yangilangan variant')
+
+        question.question_text = 'Yangilangan savol'
+        self._changed(self.standard, question.save)
+        self.assertContains(client.get(url), 'Yangilangan savol')
+
+        self._changed(self.standard, option.delete)
+        response = client.get(url)
+        self.assertNotContains(response, 'Yangilangan variant')
+        self.assertNotContains(response, f'value="{option.pk}"')
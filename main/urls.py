@@ -1,10 +1,11 @@
 from django.urls import path
 from .views import (
-    QuizResultView, QuizTakeView, QuizListView, QuizDetailView,
+    QuizResultView, QuizTakeView, QuizAutosaveView, QuizAdmissionStatusView, QuizListView, QuizDetailView,
     StudentDashboardView, HomeView, StudentProfileView,
     StudentStatisticsView, ResultsHistoryView,
     PsychologicalTestsView, PsychologicalResultsView,
-    AdminPsychologicalStatisticsView,
+    AdminPsychologicalStatisticsView, AdminPsychologicalStatisticsDatasetView,
+    AdminAdmissionStatsView, AdminItemAnalysisView,
 )
 
 
@@ -20,7 +21,16 @@ urlpatterns = [
     path('quiz/', QuizListView.as_view(), name='quiz_list'),
     path('quiz/<int:pk>/', QuizDetailView.as_view(), name='quiz_detail'),
     path('quiz/<int:pk>/take/', QuizTakeView.as_view(), name='quiz_take'),
+    path('quiz/<int:pk>/autosave/', QuizAutosaveView.as_view(), name='quiz_autosave'),
+    path('quiz/<int:pk>/admission/', QuizAdmissionStatusView.as_view(), name='quiz_admission_status'),
     path('quiz/<int:attempt_id>/result/', QuizResultView.as_view(), name='quiz_result'),
     path('quiz/psychological/', PsychologicalTestsView.as_view(), name='psychological_tests'),
     path('admin-stats/psychological/', AdminPsychologicalStatisticsView.as_view(), name='admin_psychological_stats'),
+    path(
+        'admin-stats/psychological/data/<slug:dataset>/',
+        AdminPsychologicalStatisticsDatasetView.as_view(),
+        name='admin_psychological_stats_dataset',
+    ),
+    path('admin-stats/admission/', AdminAdmissionStatsView.as_view(), name='admin_admission_stats'),
+    path('admin-stats/item-analysis/<int:pk>/', AdminItemAnalysisView.as_view(), name='admin_item_analysis'),
 ]
\ No newline at end of file
@@ -1,11 +1,9 @@
-from django.views.generic import TemplateView, ListView, DetailView
+from django.views.generic import TemplateView, ListView, DetailView, View
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
-from django.db.models import Avg
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
-from collections import defaultdict
 import json
 
 
@@ -50,7 +48,7 @@ class StudentDashboardView(StudentLoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         student = self.request.student
         
-        from main.models import Quiz, QuizAttempt, Result, PsychologicalResult
+        from main.models import Quiz, QuizAttempt, Result, PsychologicalResult, StudentStats
         
         # Student ma'lumotlari
         context['student'] = student
@@ -60,10 +58,10 @@ class StudentDashboardView(StudentLoginRequiredMixin, TemplateView):
         context['available_quizzes'] = available_quizzes
         context['total_quizzes'] = Quiz.objects.filter(is_active=True).count()
         
-        # Student urinishlari
-        attempts = QuizAttempt.objects.filter(student=student)
-        context['total_attempts'] = attempts.count()
-        context['completed_attempts'] = attempts.filter(status='completed').count()
+        # Hisoblagichlar - bitta indeksli so'rov
+        stats = StudentStats.for_student(student)
+        context['total_attempts'] = stats.total_attempts
+        context['completed_attempts'] = stats.completed_attempts
         
         # Joriy test (in_progress)
         in_progress = QuizAttempt.objects.filter(
@@ -73,29 +71,27 @@ class StudentDashboardView(StudentLoginRequiredMixin, TemplateView):
         context['current_attempt'] = in_progress
         
         # Standart testlar natijalari
-        standard_results = Result.objects.filter(attempt__student=student)
-        context['standard_results_count'] = standard_results.count()
-        context['standard_passed_count'] = standard_results.filter(passed=True).count()
-        context['standard_failed_count'] = standard_results.filter(passed=False).count()
+        context['standard_results_count'] = stats.standard_results_count
+        context['standard_passed_count'] = stats.standard_passed_count
+        context['standard_failed_count'] = stats.standard_failed_count
         
         # Psixologik testlar natijalari
-        psychological_results = PsychologicalResult.objects.filter(attempt__student=student)
-        context['psychological_results_count'] = psychological_results.count()
+        context['psychological_results_count'] = stats.psychological_results_count
         
         # O'rtacha ball (faqat standart testlar uchun)
-        if standard_results.exists():
-            avg_percentage = standard_results.aggregate(Avg('percentage'))['percentage__avg']
-            context['average_percentage'] = round(avg_percentage, 2)
-        else:
-            context['average_percentage'] = 0
+        context['average_percentage'] = stats.average_percentage
         
         # Oxirgi natijalar (aralash)
+        standard_results = Result.objects.filter(attempt__student=student)
+        psychological_results = PsychologicalResult.objects.filter(attempt__student=student)
         recent_standard = list(standard_results.select_related(
             'attempt__quiz'
         ).order_by('-created_at')[:3])
         
         recent_psychological = list(psychological_results.select_related(
             'attempt__quiz'
+        ).prefetch_related(
+            'scale_results__scale', 'scale_results__category'
         ).order_by('-created_at')[:2])
         
         # Aralashtirib, vaqt bo'yicha saralash
@@ -138,15 +134,12 @@ class StudentProfileView(StudentLoginRequiredMixin, TemplateView):
         ).order_by('-last_activity')
         
         # Test statistikasi
-        from main.models import QuizAttempt
-        total_attempts = QuizAttempt.objects.filter(student=student).count()
-        completed = QuizAttempt.objects.filter(
-            student=student,
-            status='completed'
-        ).count()
+        from main.models import StudentStats
+        stats = StudentStats.for_student(student)
         
-        context['total_attempts'] = total_attempts
-        context['completed_attempts'] = completed
+        context['total_attempts'] = stats.total_attempts
+        context['completed_attempts'] = stats.completed_attempts
+        context['passed_count'] = stats.standard_passed_count
         
         return context
 
@@ -165,15 +158,13 @@ class QuizListView(StudentLoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         student = self.request.student
         
-        # Har bir test uchun student urinishini qo'shish
-        from main.models import QuizAttempt
+        # Har bir test uchun student urinishi - keshlangan holat xaritasidan
+        from main.quiz_status import get_quiz_status_map
         quizzes = context['quizzes']
+        statuses = get_quiz_status_map(student)
         
         for quiz in quizzes:
-            quiz.student_attempt = QuizAttempt.objects.filter(
-                student=student,
-                quiz=quiz
-            ).order_by('-started_at').first()
+            quiz.student_attempt = statuses.get(quiz.pk)
         
         return context
 
@@ -193,31 +184,38 @@ class QuizDetailView(StudentLoginRequiredMixin, DetailView):
         quiz = self.object
         
         from main.models import QuizAttempt, Result, PsychologicalResult
+        from main.quiz_status import get_quiz_status_map
         
         # Student urinishlari
         attempts = QuizAttempt.objects.filter(
             student=student,
             quiz=quiz
         ).order_by('-started_at')
+        status = get_quiz_status_map(student).get(quiz.pk)
         
         context['attempts'] = attempts
-        context['total_attempts'] = attempts.count()
+        context['quiz_status'] = status
+        context['total_attempts'] = status.attempt_count if status else 0
         
         # Faol urinish
-        current_attempt = attempts.filter(status='in_progress').first()
+        current_attempt = None
+        if status and status.in_progress_attempt_id:
+            current_attempt = attempts.filter(
+                pk=status.in_progress_attempt_id, status='in_progress'
+            ).first()
         context['current_attempt'] = current_attempt
         
-        # Eng yaxshi natija
+        # Eng yaxshi natija (xaritada natija bo'lmasa bazaga murojaat qilinmaydi)
         best_result = None
         if quiz.is_standard():
             # Standart test
-            if attempts.filter(status='completed').exists():
+            if status and status.best_percentage is not None:
                 best_result = Result.objects.filter(
                     attempt__in=attempts
                 ).order_by('-percentage').first()
         else:
-            # Psixologik test - so'nggi natija
-            if attempts.filter(status='completed').exists():
+            # Psixologik test - so'nggi natija (faqat yakunlangan urinish bo'lsa)
+            if status and (status.status != 'in_progress' or status.attempt_count > 1):
                 best_result = PsychologicalResult.objects.filter(
                     attempt__in=attempts
                 ).order_by('-created_at').first()
@@ -225,9 +223,10 @@ class QuizDetailView(StudentLoginRequiredMixin, DetailView):
         context['best_result'] = best_result
         context['is_psychological'] = quiz.is_psychological()
         
-        # Urinish imkoni borligini tekshirish
+        # Urinish imkoni (ko'rsatish uchun keshlangan xaritadan,
+        # cheklov QuizTakeView da bazadan tekshiriladi)
         if quiz.is_standard():
-            context['can_attempt'] = quiz.can_attempt(student)
+            context['can_attempt'] = context['total_attempts'] < quiz.attempt_limit
         else:
             context['can_attempt'] = True  # Psixologik testlar uchun cheklov yo'q
         
@@ -249,7 +248,7 @@ class QuizTakeView(StudentLoginRequiredMixin, TemplateView):
             student=student,
             quiz=quiz,
             status='in_progress'
-        ).first()
+        ).select_related('quiz').first()
         
         if not attempt:
             if not quiz.can_attempt(student):
@@ -259,11 +258,24 @@ class QuizTakeView(StudentLoginRequiredMixin, TemplateView):
                     f"Boshqa urinish qila olmaysiz."
                 )
                 return redirect('quiz_detail', pk=quiz.pk)
-            
-            attempt = QuizAttempt.objects.create(
-                student=student,
-                quiz=quiz
-            )
+
+            # Bir vaqtda boshlovchilar ko'p bo'lsa - kutish zali
+            from main.admission import admit, release
+            admission = admit(request, quiz.pk)
+            if not admission.admitted:
+                return render(request, 'quiz_waiting.html', {
+                    'quiz': quiz,
+                    'admission': admission,
+                })
+
+            # Urinish yaratilmasa ham (masalan, unique_active_attempt) navbat raqami bo'shatiladi
+            try:
+                attempt = QuizAttempt.objects.create(
+                    student=student,
+                    quiz=quiz
+                )
+            finally:
+                release(request, quiz.pk)
             messages.success(request, f"Test boshlandi: {quiz.title}")
         
         if attempt.is_time_expired():
@@ -271,21 +283,27 @@ class QuizTakeView(StudentLoginRequiredMixin, TemplateView):
             messages.warning(request, "Vaqt tugadi! Test avtomatik yakunlandi.")
             return redirect('quiz_result', attempt_id=attempt.id)
         
-        questions = quiz.questions.prefetch_related('options').order_by('order')
-        
+        # Savollar qismi test versiyasi bo'yicha keshlangan
+        from main.quiz_payload import get_quiz_payload
+        quiz_payload = get_quiz_payload(quiz)
+
         from main.models import UserResponse
-        responses = {
-            r.question_id: r.selected_option_id
-            for r in UserResponse.objects.filter(attempt=attempt)
-        }
-        
+        from main.answer_buffer import get_answer_buffer
+        responses = dict(
+            UserResponse.objects.filter(attempt=attempt).values_list(
+                'question_id', 'selected_option_id'
+            )
+        )
+        # Hali bazaga ko'chirilmagan avtosaqlangan javoblar
+        responses.update(get_answer_buffer().peek(attempt.pk))
+
         context = {
             'quiz': quiz,
             'attempt': attempt,
-            'questions': questions,
+            'quiz_payload': quiz_payload,
             'responses': responses,
             'remaining_time': attempt.get_remaining_time(),
-            'total_questions': questions.count(),
+            'total_questions': quiz_payload['total_questions'],
             'answered_count': len(responses),
             'is_psychological': quiz.is_psychological(),
         }
@@ -294,17 +312,17 @@ class QuizTakeView(StudentLoginRequiredMixin, TemplateView):
     
     def post(self, request, pk):
         """Javoblarni saqlash"""
-        from main.models import Quiz, QuizAttempt, Question, Option, UserResponse
-        
+        from main.models import Quiz, QuizAttempt, UserResponse
+
         student = request.student
         quiz = get_object_or_404(Quiz, pk=pk)
-        
+
         # Faol urinishni topish
         attempt = QuizAttempt.objects.filter(
             student=student,
             quiz=quiz,
             status='in_progress'
-        ).first()
+        ).select_related('quiz').first()
         
         if not attempt:
             return JsonResponse({
@@ -319,32 +337,19 @@ class QuizTakeView(StudentLoginRequiredMixin, TemplateView):
                 'redirect': f'/quiz/{attempt.id}/result/'
             }, status=400)
         
+        # Avval buferdagi (eskiroq) javoblar, keyin formadagi javoblar saqlanadi
+        from main.answer_buffer import flush_attempt
+        flush_attempt(attempt)
+
         # Javoblarni saqlash
         action = request.POST.get('action', 'save')
-        saved_count = 0
-        
-        for key, value in request.POST.items():
-            if key.startswith('question_'):
-                question_id = key.split('_')[1]
-                option_id = value
-                
-                if not option_id:
-                    continue
-                
-                try:
-                    question = Question.objects.get(id=question_id, quiz=quiz)
-                    option = Option.objects.get(id=option_id, question=question)
-                    
-                    UserResponse.objects.update_or_create(
-                        attempt=attempt,
-                        question=question,
-                        defaults={'selected_option': option}
-                    )
-                    saved_count += 1
-                    
-                except (Question.DoesNotExist, Option.DoesNotExist):
-                    continue
-        
+        answers = {
+            key[len('question_'):]: value
+            for key, value in request.POST.items()
+            if key.startswith('question_') and value
+        }
+        saved_count, rejected_count = UserResponse.bulk_save(attempt, answers)
+
         # Agar "Yakunlash" bosilgan bo'lsa
         if action == 'submit':
             attempt.complete_attempt()
@@ -355,7 +360,70 @@ class QuizTakeView(StudentLoginRequiredMixin, TemplateView):
         return JsonResponse({
             'success': True,
             'message': f'{saved_count} ta javob saqlandi',
-            'saved_count': saved_count
+            'saved_count': saved_count,
+            'rejected_count': rejected_count,
+        })
+
+
+class QuizAutosaveView(StudentLoginRequiredMixin, View):
+    """Bitta yoki bir nechta javobni tezkor saqlash (write-behind bufer)"""
+
+    def post(self, request, pk):
+        from main.models import QuizAttempt, UserResponse
+        from main.answer_buffer import get_answer_buffer
+
+        try:
+            answers = json.loads(request.body or b'{}').get('answers', {})
+        except (ValueError, AttributeError):
+            answers = None
+
+        if not isinstance(answers, dict):
+            return JsonResponse({'error': "Noto'g'ri so'rov"}, status=400)
+
+        attempt = QuizAttempt.objects.filter(
+            student=request.student,
+            quiz_id=pk,
+            status='in_progress'
+        ).select_related('quiz').first()
+
+        if not attempt:
+            return JsonResponse({
+                'error': 'Urinish topilmadi'
+            }, status=404)
+
+        if attempt.is_time_expired():
+            attempt.expire_attempt()
+            return JsonResponse({
+                'error': 'Vaqt tugadi',
+                'redirect': f'/quiz/{attempt.id}/result/'
+            }, status=400)
+
+        # Javob kaliti bo'yicha tekshirish (bazaga murojaat yo'q) va buferga yozish
+        rows, rejected_count = UserResponse.build_rows(attempt, answers)
+        if rows:
+            get_answer_buffer().record(attempt, rows)
+
+        return JsonResponse({
+            'success': True,
+            'saved_count': len(rows),
+            'rejected_count': rejected_count,
+        })
+
+
+class QuizAdmissionStatusView(StudentLoginRequiredMixin, View):
+    """
+    Kutish zali uchun yengil holat endpointi - navbat keshda, view o'zi bazaga
+    murojaat qilmaydi (sessiya va talaba middleware'lari so'rovlari bundan tashqari)
+    """
+
+    def get(self, request, pk):
+        from main.admission import admit
+
+        admission = admit(request, pk)
+        return JsonResponse({
+            'admitted': admission.admitted,
+            'position': admission.position,
+            'retry_after': admission.retry_after,
         })
 
 
@@ -372,6 +440,43 @@ class QuizResultView(StudentLoginRequiredMixin, DetailView):
             id=attempt_id,
             student=self.request.student
         )
+
+    def get(self, request, *args, **kwargs):
+        from django.http import HttpResponse
+        from django.utils.cache import get_conditional_response, patch_cache_control
+        from main.result_page import get_result_snapshot, store_result_snapshot
+
+        self.object = self.get_object()
+        attempt = self.object
+        finished = attempt.status != 'in_progress'
+
+        # Flash xabarlar sahifaga render qilinadi - bunday javob keshlanmaydi
+        cacheable = finished and not list(messages.get_messages(request))
+
+        # Yakunlangan urinish - tayyor snapshot (ETag mos kelsa 304)
+        if cacheable:
+            snapshot = get_result_snapshot(attempt)
+            if snapshot is not None:
+                response = HttpResponse(snapshot.content)
+                response['ETag'] = snapshot.etag
+                patch_cache_control(response, private=True, no_cache=True)
+                return get_conditional_response(request, etag=snapshot.etag, response=response)
+
+        # Natija hali navbatda hisoblanmoqda
+        if finished and not attempt.has_result():
+            return render(request, 'result_pending.html', {
+                'attempt': attempt,
+                'quiz': attempt.quiz,
+            })
+
+        context = self.get_context_data(object=attempt)
+        response = self.render_to_response(context)
+        if cacheable:
+            response.render()
+            snapshot = store_result_snapshot(attempt, response.content)
+            response['ETag'] = snapshot.etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -385,22 +490,23 @@ class QuizResultView(StudentLoginRequiredMixin, DetailView):
         
         if quiz.is_standard():
             context['result'] = attempt.result
-            responses = UserResponse.objects.filter(
+            # Javoblar variantlari bilan - bitta prefetch, sanoq ro'yxatdan
+            responses = list(UserResponse.objects.filter(
                 attempt=attempt
             ).select_related(
                 'question',
                 'selected_option'
-            ).order_by('question__order')
+            ).prefetch_related('question__options').order_by('question__order'))
             
             context['responses'] = responses
             
-            correct_count = responses.filter(is_correct=True).count()
-            wrong_count = responses.filter(
-                is_correct=False,
-                selected_option__isnull=False
-            ).count()
+            correct_count = sum(1 for response in responses if response.is_correct)
+            wrong_count = sum(
+                1 for response in responses
+                if not response.is_correct and response.selected_option_id is not None
+            )
             total_questions = quiz.get_total_questions()
-            unanswered = total_questions - responses.count()
+            unanswered = total_questions - len(responses)
             
             context['correct_count'] = correct_count
             context['wrong_count'] = wrong_count
@@ -419,18 +525,18 @@ class QuizResultView(StudentLoginRequiredMixin, DetailView):
             
             context['scale_results'] = scale_results
             
-            responses = UserResponse.objects.filter(
+            responses = list(UserResponse.objects.filter(
                 attempt=attempt
             ).select_related(
                 'question',
                 'question__psychological_scale',
                 'selected_option'
-            ).order_by('question__order')
+            ).order_by('question__order'))
             
             context['responses'] = responses
             
             total_questions = quiz.get_total_questions()
-            answered = responses.count()
+            answered = len(responses)
             unanswered = total_questions - answered
             
             context['total_questions'] = total_questions
@@ -452,35 +558,22 @@ class ResultsHistoryView(StudentLoginRequiredMixin, ListView):
         return QuizAttempt.objects.filter(
             student=self.request.student,
             status='completed'
-        ).select_related('quiz').order_by('-completed_at')
+        ).select_related('quiz', 'result', 'psychological_result').prefetch_related(
+            'psychological_result__scale_results__scale',
+            'psychological_result__scale_results__category',
+        ).order_by('-completed_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        from main.models import Result, PsychologicalResult
-        
-        standard_results = Result.objects.filter(
-            attempt__student=self.request.student
-        )
+        from main.models import StudentStats
         
-        if standard_results.exists():
-            context['total_standard_tests'] = standard_results.count()
-            context['passed_tests'] = standard_results.filter(passed=True).count()
-            context['failed_tests'] = standard_results.filter(passed=False).count()
-            context['average_score'] = round(
-                standard_results.aggregate(Avg('percentage'))['percentage__avg'],
-                2
-            )
-        else:
-            context['total_standard_tests'] = 0
-            context['passed_tests'] = 0
-            context['failed_tests'] = 0
-            context['average_score'] = 0
-        
-        psychological_results = PsychologicalResult.objects.filter(
-            attempt__student=self.request.student
-        )
-        context['total_psychological_tests'] = psychological_results.count()
+        stats = StudentStats.for_student(self.request.student)
+        context['total_standard_tests'] = stats.standard_results_count
+        context['passed_tests'] = stats.standard_passed_count
+        context['failed_tests'] = stats.standard_failed_count
+        context['average_score'] = stats.average_percentage
+        context['total_psychological_tests'] = stats.psychological_results_count
         
         return context
 
@@ -495,9 +588,9 @@ class StudentStatisticsView(StudentLoginRequiredMixin, TemplateView):
         
         from main.models import Result
         
-        results = Result.objects.filter(
+        results = list(Result.objects.filter(
             attempt__student=student
-        ).select_related('attempt__quiz').order_by('created_at')
+        ).select_related('attempt__quiz').order_by('created_at'))
         
         chart_data = {
             'labels': [],
@@ -515,26 +608,19 @@ class StudentStatisticsView(StudentLoginRequiredMixin, TemplateView):
         
         context['chart_data'] = json.dumps(chart_data)
         
-        context['total_tests'] = results.count()
-        context['passed_tests'] = results.filter(passed=True).count()
-        context['failed_tests'] = results.filter(passed=False).count()
+        from main.models import StudentStats
+        stats = StudentStats.for_student(student)
         
-        if results.exists():
-            context['average_score'] = round(
-                results.aggregate(Avg('percentage'))['percentage__avg'],
-                2
-            )
-            context['highest_score'] = results.order_by('-percentage').first()
-            context['lowest_score'] = results.order_by('percentage').first()
-        else:
-            context['average_score'] = 0
-            context['highest_score'] = None
-            context['lowest_score'] = None
+        context['total_tests'] = stats.standard_results_count
+        context['passed_tests'] = stats.standard_passed_count
+        context['failed_tests'] = stats.standard_failed_count
+        context['average_score'] = stats.average_percentage
         
-        from main.models import PsychologicalResult
-        context['psychological_tests_count'] = PsychologicalResult.objects.filter(
-            attempt__student=student
-        ).count()
+        # Eng yuqori/past natija - yuklangan ro'yxatdan
+        context['highest_score'] = max(results, key=lambda r: r.percentage, default=None)
+        context['lowest_score'] = min(results, key=lambda r: r.percentage, default=None)
+        
+        context['psychological_tests_count'] = stats.psychological_results_count
         
         return context
 
@@ -550,21 +636,19 @@ class PsychologicalTestsView(StudentLoginRequiredMixin, ListView):
         return Quiz.objects.filter(
             is_active=True,
             quiz_type='psychological'
-        ).order_by('-created_at')
+        ).prefetch_related('psychological_scales').order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         student = self.request.student
         
-        # Har bir test uchun student urinishini qo'shish
-        from main.models import QuizAttempt
+        # Har bir test uchun student urinishi - keshlangan holat xaritasidan
+        from main.quiz_status import get_quiz_status_map
         quizzes = context['quizzes']
+        statuses = get_quiz_status_map(student)
         
         for quiz in quizzes:
-            quiz.student_attempt = QuizAttempt.objects.filter(
-                student=student,
-                quiz=quiz
-            ).order_by('-started_at').first()
+            quiz.student_attempt = statuses.get(quiz.pk)
         
         return context
 
@@ -576,22 +660,40 @@ class PsychologicalResultsView(StudentLoginRequiredMixin, ListView):
     paginate_by = 10
     
     def get_queryset(self):
-        from main.models import PsychologicalResult
+        from django.db.models import Prefetch
+        from main.models import PsychologicalResult, PsychologicalScaleResult
         
+        # Har bir natija uchun shkalalar - sahifa uchun bitta prefetch so'rovi
         return PsychologicalResult.objects.filter(
             attempt__student=self.request.student
-        ).select_related('attempt__quiz').order_by('-created_at')
+        ).select_related('attempt__quiz').prefetch_related(
+            Prefetch(
+                'scale_results',
+                queryset=PsychologicalScaleResult.objects.select_related('scale', 'category'),
+                to_attr='scale_results_list',
+            )
+        ).order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Har bir natija uchun shkalalarni qo'shish
-        from main.models import PsychologicalScaleResult
-        
+        from main.models import ScaleNorm
+
+        # Fakultet normalari bitta so'rov bilan, persentil - massivdan O(1)
+        norms = {
+            norm.scale_id: norm
+            for norm in ScaleNorm.objects.filter(
+                scale__quiz__in=[result.attempt.quiz for result in context['results']],
+                cohort_type='faculty',
+                cohort_value=self.request.student.faculty,
+            )
+        }
         for result in context['results']:
-            result.scale_results_list = PsychologicalScaleResult.objects.filter(
-                result=result
-            ).select_related('scale', 'category')
+            for scale_result in result.scale_results_list:
+                norm = norms.get(scale_result.scale_id)
+                if norm:
+                    scale_result.faculty_percentile = norm.percentile(scale_result.total_score)
+                    scale_result.faculty_t_score = norm.t_score(scale_result.total_score)
         
         return context
 
@@ -608,293 +710,104 @@ class AdminPsychologicalStatisticsView(TemplateView):
     - Vaqt bo'yicha stacked bar
     - Shkalalar bo'yicha horizontal bar
     - Fakultet va guruh bo'yicha grafiklar
+    Sahifa faqat filtrlar bilan qaytariladi, grafiklar va jadval
+    AdminPsychologicalStatisticsDatasetView dan parallel yuklanadi.
     """
     template_name = 'admin_psychological_stats.html'
 
-    # ─── Rang ikonlari ───
-    COLOR_ICONS = {
-        'green': '🟢',
-        'yellow': '🟡',
-        'orange': '🟠',
-        'red': '🔴',
-    }
-    COLOR_LABELS = {
-        'green': 'Yashil',
-        'yellow': 'Sariq',
-        'orange': "To'q sariq",
-        'red': 'Qizil',
-    }
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        from main.models import (
-            PsychologicalResult, PsychologicalScaleResult,
-            Quiz
-        )
-        from student.models import Student, StudentGroup
+        from main import psych_stats
+        from main.stats_cache import get_or_compute
 
         # ── GET params ──
-        selected_quiz_id  = self.request.GET.get('quiz', '')
-        selected_faculty  = self.request.GET.get('faculty', '')
-        selected_level    = self.request.GET.get('level', '')
-        selected_group_id = self.request.GET.get('group', '')
-
-        # ── Base queryset ──
-        qs = PsychologicalResult.objects.select_related(
-            'attempt__student__group',
-            'attempt__quiz',
-        ).prefetch_related(
-            'scale_results__category',
-            'scale_results__scale',
-        ).order_by('-created_at')
+        filters = psych_stats.StatsFilters.from_query(self.request.GET)
 
-        if selected_quiz_id:
-            qs = qs.filter(attempt__quiz__id=selected_quiz_id)
-        if selected_faculty:
-            qs = qs.filter(attempt__student__faculty=selected_faculty)
-        if selected_level:
-            qs = qs.filter(attempt__student__level=selected_level)
-        if selected_group_id:
-            qs = qs.filter(attempt__student__group__id=selected_group_id)
-
-        total_results = qs.count()
-
-        # ── Color counts ──
-        color_counts = defaultdict(int)
-        for result in qs:
-            for sr in result.scale_results.all():
-                if sr.category:
-                    color_counts[sr.category.color] += 1
-
-        total_color = sum(color_counts.values()) or 1
-
-        def pct(val):
-            return round(val / total_color * 100, 1)
-
-        # ── Color chart data (donut) ──
-        color_chart_data = {
-            'labels': ['Yashil', 'Sariq', "To'q sariq", 'Qizil'],
-            'values': [
-                color_counts['green'],
-                color_counts['yellow'],
-                color_counts['orange'],
-                color_counts['red'],
-            ],
-            'percentages': [
-                pct(color_counts['green']),
-                pct(color_counts['yellow']),
-                pct(color_counts['orange']),
-                pct(color_counts['red']),
-            ],
-        }
-
-        # ── Timeline data (last 10 months) ──
-        from django.utils import timezone
-        from datetime import timedelta
+        # ── Filter options (filtrlardan qat'i nazar bitta kesh yozuvi) ──
+        options, _ = get_or_compute(('options',), self.filter_options)
+        context.update(options)
+        context.update({
+            'datasets': list(psych_stats.DATASETS),
+            # selected values
+            'selected_quiz_id': filters.quiz_id,
+            'selected_faculty': filters.faculty,
+            'selected_level': filters.level,
+            'selected_group_id': filters.group_id,
+        })
+        return context
 
-        timeline_labels = []
-        tl_green = []
-        tl_yellow = []
-        tl_orange = []
-        tl_red = []
+    @staticmethod
+    def filter_options():
+        from main import psych_stats
+        from main.models import Quiz
 
-        now = timezone.now()
-        for i in range(9, -1, -1):
-            month_start = (now.replace(day=1) - timedelta(days=i * 30)).replace(
-                day=1, hour=0, minute=0, second=0, microsecond=0
-            )
-            if i == 0:
-                month_end = now
-            else:
-                next_month = (month_start.replace(day=28) + timedelta(days=4))
-                month_end = next_month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-            label = month_start.strftime('%b %Y')
-            timeline_labels.append(label)
-
-            month_qs = qs.filter(created_at__gte=month_start, created_at__lt=month_end)
-
-            mc = defaultdict(int)
-            for r in month_qs.prefetch_related('scale_results__category'):
-                for sr in r.scale_results.all():
-                    if sr.category:
-                        mc[sr.category.color] += 1
-
-            tl_green.append(mc['green'])
-            tl_yellow.append(mc['yellow'])
-            tl_orange.append(mc['orange'])
-            tl_red.append(mc['red'])
-
-        timeline_chart_data = {
-            'labels': timeline_labels,
-            'green': tl_green,
-            'yellow': tl_yellow,
-            'orange': tl_orange,
-            'red': tl_red,
+        faculties, levels, groups = psych_stats.filter_options()
+        return {
+            'quizzes': list(Quiz.objects.filter(quiz_type='psychological', is_active=True)),
+            'faculties': faculties,
+            'levels': levels,
+            'groups': groups,
         }
 
-        # ── Scale stats ──
-        quizzes_qs = Quiz.objects.filter(quiz_type='psychological')
-        if selected_quiz_id:
-            quizzes_qs = quizzes_qs.filter(id=selected_quiz_id)
-
-        scale_stats = []
-        scale_bar_labels = []
-        scale_bar_avg = []
-
-        for quiz in quizzes_qs:
-            for scale in quiz.psychological_scales.prefetch_related('categories').all():
-                sr_qs = PsychologicalScaleResult.objects.filter(
-                    scale=scale,
-                    result__in=qs,
-                ).select_related('category')
-
-                total_sr = sr_qs.count()
-                if total_sr == 0:
-                    continue
-
-                avg_score = sr_qs.aggregate(a=Avg('total_score'))['a'] or 0
-                scale_bar_labels.append(f"{scale.name[:25]}")
-                scale_bar_avg.append(round(avg_score, 1))
-
-                cat_counts = defaultdict(int)
-                for sr in sr_qs:
-                    cat_name = sr.category.name if sr.category else 'Nomalum'
-                    cat_color = sr.category.color if sr.category else 'none'
-                    cat_counts[(cat_name, cat_color)] += 1
-
-                cat_stats_list = []
-                for (name, color), count in sorted(cat_counts.items(), key=lambda x: -x[1]):
-                    cat_stats_list.append({
-                        'category_name': name,
-                        'color': color,
-                        'count': count,
-                        'pct': round(count / total_sr * 100, 1),
-                    })
-
-                scale_stats.append({
-                    'scale_name': scale.name,
-                    'total_results': total_sr,
-                    'avg_score': round(avg_score, 1),
-                    'category_stats': cat_stats_list,
-                })
 
-        scale_chart_data = {
-            'labels': scale_bar_labels,
-            'avg_scores': scale_bar_avg,
-        }
+@method_decorator(staff_member_required, name='dispatch')
+class AdminPsychologicalStatisticsDatasetView(View):
+    """
+    Psixologik statistika sahifasining bitta ma'lumot to'plami (JSON)
+    color, timeline, scale, faculty, group, recent - filtrlar sahifa bilan bir xil.
+    Grafiklar xotiradagi kubdan (main.stats_cube), NumPy yo'q bo'lsa bazadan;
+    har bir to'plam alohida keshlanadi (main.stats_cache).
+    """
 
-        # ── Faculty stats ──
-        faculties_list = list(
-            Student.objects.values_list('faculty', flat=True)
-            .distinct().exclude(faculty__isnull=True).exclude(faculty='')
-        )
+    def get(self, request, dataset):
+        from django.conf import settings
+        from django.http import Http404
+        from main import psych_stats
+        from main.stats_cache import get_or_compute
+        from main.stats_cube import get_cube
 
-        # ── Level (kurs) list ──
-        levels_list = list(
-            Student.objects.values_list('level', flat=True)
-            .distinct().exclude(level__isnull=True).exclude(level='')
-            .order_by('level')
+        if dataset not in psych_stats.DATASETS:
+            raise Http404("Bunday ma'lumot to'plami yo'q")
+
+        filters = psych_stats.StatsFilters.from_query(request.GET)
+        data, cache_status = get_or_compute(
+            (dataset, *filters),
+            lambda: psych_stats.dataset(dataset, filters, source=None if dataset == 'recent' else get_cube()),
         )
-        faculty_labels = []
-        fac_green = []; fac_yellow = []; fac_orange = []; fac_red = []
-
-        for faculty in faculties_list:
-            fac_qs = qs.filter(attempt__student__faculty=faculty)
-            if not fac_qs.exists():
-                continue
-            fmc = defaultdict(int)
-            for r in fac_qs.prefetch_related('scale_results__category'):
-                for sr in r.scale_results.all():
-                    if sr.category:
-                        fmc[sr.category.color] += 1
-            if sum(fmc.values()) == 0:
-                continue
-            short = faculty[:15] + '…' if len(faculty) > 15 else faculty
-            faculty_labels.append(short)
-            fac_green.append(fmc['green'])
-            fac_yellow.append(fmc['yellow'])
-            fac_orange.append(fmc['orange'])
-            fac_red.append(fmc['red'])
-
-        faculty_chart_data = {
-            'labels': faculty_labels,
-            'green': fac_green,
-            'yellow': fac_yellow,
-            'orange': fac_orange,
-            'red': fac_red,
-        }
-        faculty_stats = bool(faculty_labels)
-
-        # ── Group stats ──
-        groups_qs = StudentGroup.objects.all()
-        group_labels = []; group_values = []
-        for g in groups_qs:
-            cnt = qs.filter(attempt__student__group=g).count()
-            if cnt > 0:
-                group_labels.append(g.group_name[:12])
-                group_values.append(cnt)
-
-        group_chart_data = {
-            'labels': group_labels,
-            'values': group_values,
-        }
+        response = JsonResponse(data)
+        response['X-Stats-Cache'] = cache_status
+        response['Cache-Control'] = f"private, max-age={getattr(settings, 'PSYCH_STATS_CACHE_SOFT_TIMEOUT', 60)}"
+        return response
 
-        # ── Recent results (last 30) ──
-        recent_list = []
-        for r in qs[:30]:
-            student = r.attempt.student
-            grp = student.group
-
-            tags = []
-            for sr in r.scale_results.all():
-                if sr.category:
-                    tags.append({
-                        'color': sr.category.color,
-                        'icon': self.COLOR_ICONS.get(sr.category.color, '⚪'),
-                        'label': sr.category.name,
-                    })
-
-            recent_list.append({
-                'id': r.id,
-                'student_name': student.student_name or '-',
-                'faculty': student.faculty or '-',
-                'group_name': grp.group_name if grp else '-',
-                'quiz_title': r.attempt.quiz.title,
-                'color_tags': tags[:4],
-                'created_at': r.created_at.strftime('%d.%m.%Y %H:%M') if r.created_at else '-',
-            })
 
-        # ── Filter selects ──
-        context.update({
-            # filter options
-            'quizzes': Quiz.objects.filter(quiz_type='psychological', is_active=True),
-            'faculties': faculties_list,
-            'levels': levels_list,
-            'groups': StudentGroup.objects.all(),
-            # selected values
-            'selected_quiz_id': selected_quiz_id,
-            'selected_faculty': selected_faculty,
-            'selected_level': selected_level,
-            'selected_group_id': selected_group_id,
-            # summary
-            'total_results': total_results,
-            'color_counts': dict(color_counts),
-            'green_pct': pct(color_counts['green']),
-            'yellow_pct': pct(color_counts['yellow']),
-            'orange_pct': pct(color_counts['orange']),
-            'red_pct': pct(color_counts['red']),
-            # chart JSON
-            'color_chart_data': json.dumps(color_chart_data),
-            'timeline_chart_data': json.dumps(timeline_chart_data),
-            'scale_chart_data': json.dumps(scale_chart_data),
-            'faculty_chart_data': json.dumps(faculty_chart_data),
-            'group_chart_data': json.dumps(group_chart_data),
-            'timeline_labels': timeline_labels,
-            # scale cards
-            'scale_stats': scale_stats,
-            'faculty_stats': faculty_stats,
-            # table
-            'recent_results': recent_list,
+@method_decorator(staff_member_required, name='dispatch')
+class AdminAdmissionStatsView(View):
+    """Faol testlar bo'yicha navbat uzunligi va kutish vaqti"""
+
+    def get(self, request):
+        from main.models import Quiz
+        from main.admission import admission_stats
+
+        return JsonResponse({
+            'quizzes': [
+                admission_stats(quiz_id)
+                for quiz_id in Quiz.objects.filter(is_active=True).values_list('pk', flat=True)
+            ]
         })
-        return context
\ No newline at end of file
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class AdminItemAnalysisView(View):
+    """Standart test savollari tahlili (qiyinlik, farqlash, distraktorlar, KR-20)"""
+
+    def get(self, request, pk):
+        from main.models import Quiz
+        from main.item_analysis import get_item_analysis
+
+        quiz = get_object_or_404(Quiz, pk=pk)
+        analysis = get_item_analysis(quiz)
+        if analysis is None:
+            return JsonResponse({
+                'error': "Tahlil faqat standart testlar uchun mavjud"
+            }, status=400)
+        return JsonResponse(analysis)
@@ -1,9 +1,20 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, Case, When, Value, IntegerField, OuterRef, Subquery
 from .models import Student, StudentGirls, StudentGroup
 
 
+# Umumiy natija rangi: kichik - yomonroq
+COLOR_PRIORITY = {'red': 0, 'orange': 1, 'yellow': 2, 'green': 3}
+COLOR_HEX = {
+    'red': ('#FEE2E2', '#EF4444', '🔴', 'Qizil'),
+    'orange': ('#FFEDD5', '#F97316', '🟠', "To'q sariq"),
+    'yellow': ('#FEF9C3', '#CA8A04', '🟡', 'Sariq'),
+    'green': ('#DCFCE7', '#16A34A', '🟢', 'Yashil'),
+}
+PRIORITY_COLOR = {priority: color for color, priority in COLOR_PRIORITY.items()}
+
+
 # ─────────────────────────────────────────────
 # StudentsGroup Admin
 # ─────────────────────────────────────────────
@@ -15,6 +26,14 @@ class StudentGroupsAdmin(admin.ModelAdmin):
     search_fields = ('group_name', 'group_code')
     list_filter = ('group_faculty', 'group_level', 'group_year')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(students_total=Count('students'))
+
+    def get_student_count(self, obj):
+        return obj.students_total
+
+    get_student_count.admin_order_field = 'students_total'
+
 
 # ─────────────────────────────────────────────
 # StudentGirls Admin
@@ -111,12 +130,37 @@ class StudentAdmin(admin.ModelAdmin):
 
     gender_display.short_description = 'Jins'
 
+    def get_queryset(self, request):
+        """Ro'yxat ustunlari uchun: guruh, hisoblagichlar va eng yomon rang"""
+        from main.models import PsychologicalScaleResult
+
+        worst_color = PsychologicalScaleResult.objects.filter(
+            result__attempt__student=OuterRef('pk'),
+            category__isnull=False,
+        ).annotate(
+            priority=Case(
+                *[When(category__color=color, then=Value(priority)) for color, priority in COLOR_PRIORITY.items()],
+                default=Value(99),
+                output_field=IntegerField(),
+            )
+        ).order_by('priority').values('priority')[:1]
+
+        return super().get_queryset(request).select_related('group', 'quiz_stats').annotate(
+            worst_color_priority=Subquery(worst_color, output_field=IntegerField()),
+        )
+
+    def _stats(self, obj):
+        """Materiallashtirilgan hisoblagichlar (urinishsiz talabada yo'q)"""
+        from main.models import StudentStats
+        try:
+            return obj.quiz_stats
+        except StudentStats.DoesNotExist:
+            return None
+
     def tests_count_display(self, obj):
         """Talaba topshirgan testlar soni"""
-        from main.models import QuizAttempt
-        count = QuizAttempt.objects.filter(
-            student=obj, status='completed'
-        ).count()
+        stats = self._stats(obj)
+        count = stats.completed_attempts if stats else 0
         if count == 0:
             return format_html('<span style="color:#9CA3AF;">0 ta</span>')
         return format_html(
@@ -129,27 +173,8 @@ class StudentAdmin(admin.ModelAdmin):
 
     def overall_result_display(self, obj):
         """Umumiy natija (psixologik + standart, eng yomon rang bo'yicha)"""
-        from main.models import PsychologicalScaleResult, Result, QuizAttempt
-
-        COLOR_PRIORITY = {'red': 0, 'orange': 1, 'yellow': 2, 'green': 3}
-        COLOR_HEX = {
-            'red': ('#FEE2E2', '#EF4444', '🔴', 'Qizil'),
-            'orange': ('#FFEDD5', '#F97316', '🟠', "To'q sariq"),
-            'yellow': ('#FEF9C3', '#CA8A04', '🟡', 'Sariq'),
-            'green': ('#DCFCE7', '#16A34A', '🟢', 'Yashil'),
-        }
-
-        # Psixologik natijalar
-        scale_results = PsychologicalScaleResult.objects.filter(
-            result__attempt__student=obj
-        ).select_related('category')
-
-        worst_color = None
-        for sr in scale_results:
-            if sr.category:
-                c = sr.category.color
-                if worst_color is None or COLOR_PRIORITY.get(c, 99) < COLOR_PRIORITY.get(worst_color, 99):
-                    worst_color = c
+        # Psixologik natijalar - get_queryset dagi annotatsiyadan
+        worst_color = PRIORITY_COLOR.get(getattr(obj, 'worst_color_priority', None))
 
         if worst_color and worst_color in COLOR_HEX:
             bg, text, icon, label = COLOR_HEX[worst_color]
@@ -160,9 +185,9 @@ class StudentAdmin(admin.ModelAdmin):
             )
 
         # Standart test natijalari
-        std_results = Result.objects.filter(attempt__student=obj)
-        if std_results.exists():
-            avg = std_results.aggregate(Avg('percentage'))['percentage__avg'] or 0
+        stats = self._stats(obj)
+        if stats and stats.standard_results_count:
+            avg = stats.average_percentage
             if avg >= 86:
                 bg, text, icon, label = '#DCFCE7', '#16A34A', '🟢', "A'lo"
             elif avg >= 71: